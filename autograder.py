@@ -1,184 +1,87 @@
 '''
 Version 0.6
 Python 3
+
+    python autograder.py [2013|2015] [hosts awards nominees presenters winner]     # runs gg_api live
+    python autograder.py 2015 --results gg2015results.json                          # grades a precomputed results file
+    python autograder.py --results run_a/ run_b/ --workers 4                        # results directories, concurrently
 '''
-import sys
+import os
+import re
 import json
-import difflib
+import argparse
 from pprint import pprint
-from collections import Counter
-
-from nltk.metrics import edit_distance
-
-import gg_api
-
-global toMovie
-toMovie = {'johann johannsson': 'the theory of everything', 'alexandre desplat': 'the imitation game', 'trent reznor and atticus ross': 'gone girl', 'antonio sanchez': 'birdman', 'hans zimmer': 'interstellar', 'glory': 'selma', 'big eyes': 'big eyes', 'mercy is': 'noah', 'opportunity': 'annie', 'yellow flicker beat': 'the hunger games mockingjay part 1', 'alejandro gonzalez inarritu': 'birdman', 'wes anderson': 'the grand budapest hotel', 'gillian flynn': 'gone girl', 'richard linklater': 'boyhood', 'graham moore': 'the imitation game'}
-
-
-def norm_text(textstring):
-    """Takes a string of text and returns a string of normalized text."""
-    return "".join([c.lower() for c in textstring if c.isalnum() or c.isspace()])
-
-
-def text(resultstr, answerstr):
-    """Accepts two normalized texts, as output by the norm_text
-    function, and returns a score based on the match length relative
-    to the longest text length."""
-
-    result = resultstr.split()
-    answer = answerstr.split()
-
-    len_result = len(result)
-    len_answer = len(answer)
-
-    if (resultstr in answerstr) or (answerstr in resultstr):
-        textscore = min(len_result, len_answer)/float(max(len_result, len_answer))
-    else:
-        s = difflib.SequenceMatcher(None, result, answer)
-
-        longest = s.find_longest_match(0, len_result, 0, len_answer)
-        longest = longest.size/float(max(len_result, len_answer))
-
-        if longest > 0.3:
-            matchlen = sum([m[2] for m in s.get_matching_blocks() if m[2] > 1])
-            textscore = float(matchlen)/max(len_result, len_answer)
-        else:
-            textscore = longest
-
-    return textscore
 
-
-def spell_check(r, a, s, scores, weight=1):
-    change = weight*(1-(edit_distance(r, a)/float(max(len(r), len(a)))))
-    if s in scores:
-        # penalty for returning multiple of the same result when
-        # one instance is incorrectly spelled
-        return (scores[s] + change)/2.0
-    else:
-        return change
-
-
-def calc_translation(result, answer):
-    '''Accepts two lists of strings, determines the best matches
-    between them, and returns a translation dictionary and
-    score.'''
-
-    resultmap = {norm_text(r): r for r in result}
-    answermap = {norm_text(a): a for a in answer}
-    result = set(resultmap.keys())
-    answer = set(answermap.keys())
-
-    intersection = result.intersection(answer)
-    translation = {resultmap[i]: answermap[i] for i in intersection}
-    scores = dict(list(zip(list(translation.values()), [1]*len(intersection))))
-    score_by_results = {}
-    score_by_answers = {}
-
-    # loop through results that didn't have a perfect match
-    # and get a score for each of them.
-    comp = list(result - intersection)
-
-    for r in comp:
-        score_by_results[r] = Counter()
-        for a in answer:
-            if a not in score_by_answers:
-                score_by_answers[a] = Counter()
-
-            score_by_results[r][a] = text(r, a)
-            score_by_answers[a][r] = score_by_results[r][a]
-
-    for r in score_by_results:
-        cnt = 0
-        ranking = score_by_results[r].most_common()
-        flag = True
-        while flag:
-            # The answer that best matches the result
-            answer_match = ranking[cnt][0]
-            # The top result matching that answer
-            max_result = score_by_answers[answer_match].most_common(1)[0]
-
-            if score_by_results[r][answer_match] < 0.45:
-                bestAnswer = False
-                score = 0
-
-                # Unacceptably low score.
-                # Check if we have a case of returning the movie instead
-                # of the person, or vice versa.
-                for ha in toMovie:
-                    tempScore = text(r, ha)
-                    if tempScore > score:
-                        score = tempScore
-                        bestAnswer = ha
-
-                if bestAnswer and score > 0.45:
-                    translation[resultmap[r]] = toMovie[ha]
-                    scores[toMovie[ha]] = spell_check(r, ha, toMovie[ha], scores, 0.5)
-
-                flag = False
-            elif (max_result[0] == r) or (score_by_results[r][answer_match] > score_by_answers[answer_match][max_result[0]]):
-                # if the top result matching that answer is our current result or
-                # if the current result's score is greater than the previous top result
-                translation[resultmap[r]] = answermap[answer_match]
-                scores[answermap[answer_match]] = spell_check(r, answer_match, answer_match, scores)
-
-                flag = False
-
-            cnt += 1
-            if cnt == len(ranking):
-                flag = False
-
-    if scores:
-        return sum(scores.values())/float(len(scores)), translation
-    else:
-        return 0, translation
-
-
-def calc_score(result, answer):
-    result = set(result)
-    intersection = result.intersection(answer)
-    len_intersection = len(intersection)
-    len_union = len(result.union(answer))
-    len_result = len(result)
-    len_answer = len(answer)
-
-    if len_union == 0:
-        return 0
-    elif len_result == len_answer and len_intersection == len_answer:
-        m = 1.0
-    elif len_intersection == len_result:
-        # all results correspond to a correct answer, but some 
-        # answers are missing
-        m = 0.95
-    elif len_intersection == len_answer:
-        # all answers correspond to a result, but there are
-        # some extra results as well
-        m = 0.9
-    elif len_intersection > 0:
-        # there is some post-translation intersection between
-        # results and answers.
-        m = 0.85
-    else:
-        return 0
-
-    return (len_intersection / float(len_union)) * m
-
-
-def score_structured(year, answers, info_type):
+# memoized pairwise scoring (normalization, similarity, translation, completeness) -- see scoring.py
+from scoring import toMovie, norm_text, text, spell_check, calc_translation, calc_score
+from parallel import make_executor
+
+YEARS = ['2013', '2015']
+GRADING = ["hosts", "awards", "nominees", "presenters", "winner"]
+ANSWERS_FILE = 'gg%sanswers.json'
+# precomputed results looked up in a results directory, in this order (gg_api.main() writes gg<year>answers.json)
+RESULTS_FILES = ['gg%sresults.json', 'gg%sanswers.json']
+# the year of a results file is read off its name
+RESULTS_FILE_REGEX = re.compile(r'gg(\d{4})(results|answers)\.json$')
+
+
+def live_results(year, info_type):
+    # runs the pipeline -- gg_api (and its spaCy model) is only imported when results are not precomputed
+    import gg_api
+    return getattr(gg_api, 'get_%s' % info_type)(year)
+
+
+def results_from_output(output):
+    '''Converts a results file in the format gg_api.main() writes
+    ({"hosts": [...], "awards": [...], "award_data": {award: {"winner", "nominees", "presenters"}}})
+    into the return values of the get_<info_type> functions, keyed by info type.
+    Info types missing from the file are left out (grade scores them 0); so are awards missing from award_data.'''
+    if not isinstance(output, dict):
+        raise ValueError('expected a JSON object with hosts / awards / award_data')
+    results = {info_type: output[info_type] for info_type in ['hosts', 'awards'] if isinstance(output.get(info_type), list)}
+    award_data = output.get('award_data')
+    if isinstance(award_data, dict):
+        for info_type in ['nominees', 'presenters', 'winner']:
+            found = {award: data[info_type] for award, data in award_data.items()
+                     if isinstance(data, dict) and info_type in data}
+            if found:
+                results[info_type] = found
+    return results
+
+
+def results_file_year(fp):
+    # year in the name of a results file (gg<year>results.json / gg<year>answers.json), or None
+    match = RESULTS_FILE_REGEX.search(os.path.basename(fp))
+    return match.group(1) if match else None
+
+
+def find_results_file(path, year):
+    # path: a results directory holding gg<year>results.json / gg<year>answers.json
+    for name in RESULTS_FILES:
+        fp = os.path.join(path, name % year)
+        if os.path.isfile(fp):
+            return fp
+    return None
+
+
+def score_structured(year, answers, info_type, results=None):
     # c_score is the completeness score
     spelling_score = 0
     c_score = 0
-    results = getattr(gg_api, 'get_%s' % info_type)(year)
+    if results is None:
+        results = live_results(year, info_type)
     length = 26
 
     if info_type == "nominees":
         tempans = answers['award_data']['cecil b. demille award']
         del answers['award_data']['cecil b. demille award']
-        tempres = results['cecil b. demille award']
-        del results['cecil b. demille award']
+        tempres = results.pop('cecil b. demille award', None)
         length = 25
 
     for a in answers['award_data']:
+        if a not in results:
+            # award missing from a (partial) results file: scores 0
+            continue
         if info_type == 'winner':
             temp_spelling, translation = calc_translation([results[a]], [answers['award_data'][a][info_type]])
         else:
@@ -188,51 +91,150 @@ def score_structured(year, answers, info_type):
 
     if info_type == "nominees":
         answers['award_data']['cecil b. demille award'] = tempans
-        results['cecil b. demille award'] = tempres
+        if tempres is not None:
+            results['cecil b. demille award'] = tempres
 
     return spelling_score/length, c_score/length
 
 
-def score_unstructured(year, answers, info_type):
-    results = getattr(gg_api, 'get_%s' % info_type)(year)
+def score_unstructured(year, answers, info_type, results=None):
+    if results is None:
+        results = live_results(year, info_type)
     spelling_score, translation = calc_translation(results, answers[info_type])
     c_score = calc_score([translation[res] if res in translation else res for res in results], answers[info_type])
 
     return spelling_score, c_score
 
 
-def main(years, grading):
-    types = ['spelling', 'completeness']
+def load_answers(year, answers_dir='.'):
+    with open(os.path.join(answers_dir, ANSWERS_FILE % year), 'r') as f:
+        return json.load(f)
 
-    scores = {y: {g: {t:0 for t in types} for g in grading} for y in years}
-    for y in years:
-        with open('gg%sanswers.json' % y, 'r') as f:
-            answers = json.load(f)
 
-        answers['awards'] = list(answers['award_data'].keys())
-
-        for g in grading:
-            if g in ['hosts', 'awards']:
-                scores[y][g]['spelling'], scores[y][g]['completeness'] = score_unstructured(y, answers, g)
-            else:
-                scores[y][g]['spelling'], scores[y][g]['completeness'] = score_structured(y, answers, g)
+def grade(year, answers, grading, results=None):
+    '''Scores one year. results: {info_type: return value of get_<info_type>} (precomputed),
+    or None to run gg_api; precomputed info types missing from results score 0 (gg_api is never run for them).'''
+    types = ['spelling', 'completeness']
+    scores = {g: {t: 0 for t in types} for g in grading}
+
+    answers['awards'] = list(answers['award_data'].keys())
+
+    for g in grading:
+        g_results = None
+        if results is not None:
+            if g not in results:
+                print('No %s in the results: scored 0' % g)
+                continue
+            g_results = results[g]
+        if g in ['hosts', 'awards']:
+            scores[g]['spelling'], scores[g]['completeness'] = score_unstructured(year, answers, g, g_results)
+        else:
+            scores[g]['spelling'], scores[g]['completeness'] = score_structured(year, answers, g, g_results)
+
+    if "winner" in grading:
+        del scores['winner']['completeness']
+    return scores
+
+
+def grade_results_file(year, results_fp, grading, answers_dir='.'):
+    # one grading job: a precomputed results file against the year's answer key (runs in a worker process)
+    with open(results_fp, 'r') as f:
+        try:
+            results = results_from_output(json.load(f))
+        except ValueError as e:
+            raise ValueError('%s is not a results file: %s' % (results_fp, e))
+    return grade(year, load_answers(year, answers_dir), grading, results)
+
+
+def results_jobs(results_paths, years, answers_dir='.'):
+    '''(year, results file) pairs to grade. A results file is graded for the year in its name; a file without
+    one needs exactly one year to be selected (ValueError otherwise). Directories are searched for every year.'''
+    jobs = []
+    for path in results_paths:
+        if os.path.isfile(path):
+            year = results_file_year(path)
+            if year is None:
+                if len(years) != 1:
+                    raise ValueError('cannot tell the year of %s from its name: select one year (%s)'
+                                     % (path, ' or '.join(years)))
+                year = years[0]
+            elif year not in years:
+                print('Skipping %s: not a results file for %s' % (path, ' / '.join(years)))
+                continue
+            candidates = [(year, path)]
+        elif os.path.isdir(path):
+            candidates = [(y, find_results_file(path, y)) for y in years]
+        else:
+            raise ValueError('no such results file or directory: %s' % path)
+
+        for y, fp in candidates:
+            if fp is None:
+                continue
+            answers_fp = os.path.join(answers_dir, ANSWERS_FILE % y)
+            if os.path.abspath(fp) == os.path.abspath(answers_fp):
+                print('Skipping %s: it is the answer key itself' % fp)
+                continue
+            if not os.path.isfile(answers_fp):
+                raise ValueError('no answer key %s to grade %s against' % (answers_fp, fp))
+            jobs.append((y, fp))
+    return jobs
+
+
+def main(years, grading, results_paths=None, answers_dir='.', n_workers=1):
+    '''
+    years: years to grade; grading: categories to grade
+    results_paths: precomputed results files or directories (None: run gg_api live)
+    answers_dir: directory holding the gg<year>answers.json answer keys
+    n_workers: worker processes grading (results file, year) pairs concurrently
+    '''
+    if not results_paths:
+        scores = {y: grade(y, load_answers(y, answers_dir), grading) for y in years}
+        pprint(scores)
+        return scores
+
+    jobs = results_jobs(results_paths, years, answers_dir)
+
+    if n_workers > 1 and len(jobs) > 1:
+        with make_executor(min(n_workers, len(jobs))) as executor:
+            futures = [executor.submit(grade_results_file, y, fp, grading, answers_dir) for y, fp in jobs]
+            graded = [future.result() for future in futures]
+    else:
+        graded = [grade_results_file(y, fp, grading, answers_dir) for y, fp in jobs]
 
-        if "winner" in grading:
-            del scores[y]['winner']['completeness']
+    if len(results_paths) == 1:
+        # same {year: scores} layout as live grading
+        scores = {y: year_scores for (y, fp), year_scores in zip(jobs, graded)}
+    else:
+        scores = {}
+        for (y, fp), year_scores in zip(jobs, graded):
+            scores.setdefault(fp, {})[y] = year_scores
     pprint(scores)
+    return scores
 
 if __name__ == '__main__':
-    years = ['2013', '2015']
-    grading = ["hosts", "awards", "nominees", "presenters", "winner"]
-
-    if len(sys.argv) > 1:
-        if '2013' in sys.argv:
+    parser = argparse.ArgumentParser(description='Grades gg_api results against the gg<year>answers.json answer keys')
+    parser.add_argument('selection', nargs='*', help='a year (2013 or 2015) and/or categories: ' + ', '.join(GRADING))
+    parser.add_argument('--results', nargs='+', default=None,
+                        help='precomputed results files or directories (holding gg<year>results.json or '
+                             'gg<year>answers.json) to grade instead of running gg_api')
+    parser.add_argument('--answers-dir', default='.', help='directory holding the answer keys')
+    parser.add_argument('--workers', type=int, default=1, help='grade results files / years concurrently')
+    args = parser.parse_args()
+
+    years = YEARS
+    grading = GRADING
+
+    if len(args.selection) > 0:
+        if '2013' in args.selection:
             years = ['2013']
-        elif '2015' in sys.argv:
+        elif '2015' in args.selection:
             years = ['2015']
 
-        newg = [g for g in grading if g in sys.argv]
+        newg = [g for g in grading if g in args.selection]
         if len(newg) > 0:
             grading = newg
 
-    main(years, grading)
\ No newline at end of file
+    try:
+        main(years, grading, args.results, args.answers_dir, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
@@ -0,0 +1,286 @@
+'''Stage benchmark: runs the pipeline stage by stage on one corpus and reports, per stage, wall/CPU time,
+throughput and peak memory -- so regressions and scaling limits can be measured.
+
+    python synthetic_corpus.py 1m                                # synthetic_1m/gg2015.json
+    python benchmark.py 2015 --dir synthetic_1m --json bench_1m.json
+    python benchmark.py 2015 --stages loading,hashtag_counter,candidate_hashtags --tracemalloc
+    python benchmark.py 2015 --dir synthetic_1m --repeat 5        # median of 5 runs, each in a fresh process
+    python benchmark.py --import-budget 0.5                      # cold `import gg_api` check, exits 1 if over budget
+    GG_INSTRUMENT=1 python benchmark.py 2015 --json bench.json   # + per-function breakdown (see instrumentation.py)
+
+Stages run in pipeline order (later stages reuse what earlier ones built):
+    import               import gg_api (no models are loaded at import)
+    model                gg_api.get_ner: load the spaCy model and open the NER cache
+    loading              get_corpus (JSON / binary corpus) and one pass over the texts
+    hashtag_counter      HashtagParser.initialize_hashtag_counter + initialize_uncased_mappings
+    candidate_hashtags   HashtagParser.get_candidate_hashtags
+    award_names          HashtagParser.parse_award_names
+    title_winners        HashtagParser.get_title_award_to_winner
+    ner                  PERSON entities of the win-indicating tweets (NER cache disabled)
+    get_hosts, get_awards, get_winner, get_nominees, get_presenters
+                         (share one gg_api.CeremonyAnalysis: each times only what earlier get_* stages
+                         have not computed yet, e.g. get_winner reuses the award names of get_awards)
+'''
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import statistics
+import subprocess
+import importlib
+import tracemalloc
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import instrumentation
+
+STAGES = ['import', 'model', 'loading', 'hashtag_counter', 'candidate_hashtags', 'award_names', 'title_winners', 'ner',
+          'get_hosts', 'get_awards', 'get_winner', 'get_nominees', 'get_presenters']
+# stages a stage builds on (besides import and loading, which every stage needs)
+DEPENDENCIES = {'candidate_hashtags': ['hashtag_counter'], 'award_names': ['candidate_hashtags'],
+                'title_winners': ['award_names'], 'ner': ['model'], 'get_winner': ['model'], 'get_nominees': ['model'],
+                'get_presenters': ['model']}
+# modules a plain `import gg_api` must not pull in (models and large libraries are loaded on first use)
+HEAVY_MODULES = ['spacy', 'thinc', 'torch', 'pandas']
+PEOPLE_WORDS = ['actor', 'actress', 'director', 'cecil']
+
+
+def max_rss_mb() -> float:
+    # high-water mark of the resident set size of this process (ru_maxrss is in KB on Linux, bytes on macOS)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024.0 * 1024.0) if sys.platform == 'darwin' else rss / 1024.0
+
+
+def import_time(module: str = 'gg_api') -> Dict:
+    """
+    Cold import of a module in a fresh interpreter -- the start-up cost of every short-lived scoring / query process
+    :param module: module to import (from this directory)
+    :return: {'module', 'import_s', 'heavy_modules': the HEAVY_MODULES the import loaded}
+    """
+    code = ('import sys, time; t = time.perf_counter(); import %s; t = time.perf_counter() - t; '
+            'print(t, ",".join(m for m in %r if m in sys.modules) or "-")' % (module, HEAVY_MODULES))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.dirname(os.path.abspath(__file__)),
+                                                       os.environ.get('PYTHONPATH', '')]))
+    out = subprocess.run([sys.executable, '-c', code], env=env, stdout=subprocess.PIPE, check=True,
+                         universal_newlines=True).stdout.strip().split('\n')[-1].split()
+    return {'module': module, 'import_s': float(out[0]), 'heavy_modules': [m for m in out[1].split(',') if m != '-']}
+
+
+def check_import_budget(budget_s: float, module: str = 'gg_api', runs: int = 3) -> bool:
+    """
+    :param budget_s: maximum cold import time in seconds (best of <runs> imports, to ignore disk cache noise)
+    :return: True if the import stays within budget and loads none of the HEAVY_MODULES
+    """
+    results = [import_time(module) for _ in range(runs)]
+    best = min(result['import_s'] for result in results)
+    heavy = sorted(set(m for result in results for m in result['heavy_modules']))
+    print('import %s: %.3f s (budget %.3f s)%s' % (module, best, budget_s,
+                                                   '  heavy modules loaded: ' + ', '.join(heavy) if heavy else ''))
+    return best <= budget_s and not heavy
+
+
+def run_stage(name: str, fn: Callable[[], int], trace_memory: bool = False) -> Dict:
+    """
+    :param name: stage name
+    :param fn: runs the stage, returns the number of items (tweets, texts) it processed
+    :param trace_memory: if True, also record the peak of Python allocations during the stage (slower)
+    :return: stage measurements
+    """
+    if trace_memory:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    n_items = fn()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    result = {'stage': name, 'wall_s': wall, 'cpu_s': cpu, 'items': n_items,
+              'items_per_s': n_items / wall if n_items and wall > 0 else None, 'max_rss_mb': max_rss_mb()}
+    if trace_memory:
+        result['peak_alloc_mb'] = tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0)
+        tracemalloc.stop()
+    return result
+
+
+class PipelineBenchmark(object):
+    def __init__(self, year, hashtag_n_workers: int = 1, award_n_workers: int = 1, ner_sample: int = 20000):
+        """
+        :param year: ceremony year of the corpus in the working directory (gg<year>.json / gg<year>.corpus)
+        :param ner_sample: maximum number of win-indicating tweets sent through NER in the 'ner' stage
+        """
+        self.year = year
+        self.hashtag_n_workers = hashtag_n_workers
+        self.award_n_workers = award_n_workers
+        self.ner_sample = ner_sample
+        self.gg_api = None
+        self.corpus = None
+        self.hp = None
+        self.award_names = None
+        self.n_tweets = 0
+
+    def stage_import(self) -> int:
+        self.gg_api = importlib.import_module('gg_api')
+        self.gg_api.HASHTAG_N_WORKERS = self.hashtag_n_workers
+        self.gg_api.AWARD_N_WORKERS = self.award_n_workers
+        return 0
+
+    def stage_model(self) -> int:
+        self.gg_api.get_ner()
+        return 0
+
+    def stage_loading(self) -> int:
+        self.corpus = self.gg_api.get_corpus(self.year, reload=True)
+        self.n_tweets = sum(1 for _ in self.corpus.texts)
+        return self.n_tweets
+
+    def stage_hashtag_counter(self) -> int:
+        self.hp = self.gg_api.HashtagParser(year=self.year, n_workers=self.hashtag_n_workers)
+        self.hp.initialize_hashtag_counter(self.corpus)
+        self.hp.initialize_uncased_mappings()
+        return self.hp.raw_hashtag_counter.total()
+
+    def stage_candidate_hashtags(self) -> int:
+        self.hp.get_candidate_hashtags(verbose=False)
+        return len(self.hp.raw_hashtag_counter)
+
+    def stage_award_names(self) -> int:
+        self.award_names = self.hp.parse_award_names(self.corpus, verbose=False)
+        return self.n_tweets
+
+    def stage_title_winners(self) -> int:
+        title_awards = [a for a in self.gg_api.OFFICIAL_AWARDS_1315 if not any(w in a for w in PEOPLE_WORDS)]
+        self.hp.get_title_award_to_winner(self.corpus, self.award_names, title_awards, PEOPLE_WORDS)
+        return self.n_tweets
+
+    def stage_ner(self) -> int:
+        texts = []
+        for text in self.corpus.texts:
+            if self.gg_api.indicatesWin(text.lower()):
+                texts.append(text)
+                if len(texts) >= self.ner_sample:
+                    break
+        ner = self.gg_api.get_ner()
+        cache, ner.cache = ner.cache, None
+        try:
+            self.gg_api.find_persons_batch(texts)
+        finally:
+            ner.cache = cache
+        return len(texts)
+
+    def stage_get(self, name: str) -> int:
+        getattr(self.gg_api, name)(self.year)
+        return self.n_tweets
+
+    def run(self, stages: List[str], trace_memory: bool = False) -> List[Dict]:
+        needed = {'import', 'loading'}
+        pending = list(stages)
+        while pending:
+            stage = pending.pop()
+            if stage not in needed:
+                needed.add(stage)
+                pending.extend(DEPENDENCIES.get(stage, []))
+        needed = sorted(needed, key=STAGES.index)
+
+        results = []
+        for stage in needed:
+            fn = (lambda stage=stage: self.stage_get(stage)) if stage.startswith('get_') else getattr(self, 'stage_' + stage)
+            result = run_stage(stage, fn, trace_memory)
+            result['requested'] = stage in stages
+            results.append(result)
+            print_result(result)
+        return results
+
+
+def print_result(result: Dict) -> None:
+    throughput = '%12.0f/s' % result['items_per_s'] if result['items_per_s'] else ' ' * 14
+    peak = '  peak alloc %8.1f MB' % result['peak_alloc_mb'] if 'peak_alloc_mb' in result else ''
+    print('%-20s wall %9.3f s  cpu %9.3f s  items %10i %s  max rss %8.1f MB%s'
+          % (result['stage'], result['wall_s'], result['cpu_s'], result['items'] or 0, throughput,
+             result['max_rss_mb'], peak))
+
+
+def median_results(runs: List[List[Dict]]) -> List[Dict]:
+    """
+    :param runs: the stage measurements of several benchmark runs (same stages, in the same order)
+    :return: per stage, the median wall / CPU time and max RSS over the runs (plus every run's wall time)
+    """
+    results = []
+    for stage_runs in zip(*runs):
+        result = dict(stage_runs[0])
+        for key in ['wall_s', 'cpu_s', 'max_rss_mb', 'peak_alloc_mb']:
+            if key in result:
+                result[key] = statistics.median(run[key] for run in stage_runs)
+        result['items_per_s'] = result['items'] / result['wall_s'] if result['items'] and result['wall_s'] > 0 else None
+        result['runs_wall_s'] = [run['wall_s'] for run in stage_runs]
+        results.append(result)
+    return results
+
+
+def repeat_benchmark(args, n_runs: int) -> List[Dict]:
+    """
+    Run the benchmark n_runs times, each in a fresh interpreter -- stages build on per-process caches (corpus,
+    CeremonyAnalysis), so a run can't be repeated in-process -- and report the median of every stage.
+    Single runs vary by tens of percent on a busy machine; compare medians.
+    """
+    runs = []
+    for run in range(n_runs):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_fp = os.path.join(tmp_dir, 'run.json')
+            cmd = [sys.executable, os.path.abspath(__file__), args.year, '--stages', args.stages,
+                   '--hashtag-workers', str(args.hashtag_workers), '--award-workers', str(args.award_workers),
+                   '--ner-sample', str(args.ner_sample), '--json', json_fp]
+            if args.tracemalloc:
+                cmd.append('--tracemalloc')
+            print('run %i/%i' % (run + 1, n_runs))
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            with open(json_fp) as f:
+                runs.append(json.load(f)['results'])
+    print('median of %i runs:' % n_runs)
+    results = median_results(runs)
+    for result in results:
+        print_result(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time every pipeline stage separately on one corpus')
+    parser.add_argument('year', nargs='?', default='2015', help='ceremony year of gg<year>.json')
+    parser.add_argument('--dir', default=None, help='run directory holding the corpus (e.g. from synthetic_corpus.py)')
+    parser.add_argument('--stages', default=','.join(STAGES), help='comma-separated subset of: ' + ', '.join(STAGES))
+    parser.add_argument('--hashtag-workers', type=int, default=1)
+    parser.add_argument('--award-workers', type=int, default=1)
+    parser.add_argument('--ner-sample', type=int, default=20000)
+    parser.add_argument('--tracemalloc', action='store_true', help='record peak Python allocations per stage (slower)')
+    parser.add_argument('--json', default=None, help='also write the measurements to this file')
+    parser.add_argument('--repeat', type=int, default=1, metavar='N',
+                        help='run the benchmark N times, each in a fresh process, and report the median per stage')
+    parser.add_argument('--import-budget', type=float, default=None, metavar='SECONDS',
+                        help='only check that a cold `import gg_api` takes at most this long and loads no models')
+    args = parser.parse_args()
+
+    if args.import_budget is not None:
+        sys.exit(0 if check_import_budget(args.import_budget) else 1)
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error('unknown stages: %s' % ', '.join(unknown))
+    json_fp = os.path.abspath(args.json) if args.json else None
+    if args.dir:
+        os.chdir(args.dir)
+
+    if args.repeat > 1:
+        results = repeat_benchmark(args, args.repeat)
+        report = {'year': args.year, 'dir': os.getcwd(), 'runs': args.repeat, 'results': results}
+    else:
+        benchmark = PipelineBenchmark(args.year, args.hashtag_workers, args.award_workers, args.ner_sample)
+        results = benchmark.run(stages, args.tracemalloc)
+        report = {'year': args.year, 'dir': os.getcwd(), 'results': results,
+                  'instrumentation': instrumentation.recorder.report()}
+    if json_fp:
+        with open(json_fp, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+from corpus import corpus_path, get_corpus, MappedTweetCorpus
+from loading_utils import iter_tweet_columns_from_json
+
+# width of a time bucket (timestamp_ms)
+BUCKET_MS = 60 * 1000
+# a bucket is part of a burst if it holds at least BURST_RATIO times the term's expected share of the bucket's volume
+BURST_RATIO = 3.0
+# ... and at least this many matching tweets
+BURST_MIN_COUNT = 3
+# hot buckets separated by at most this many cold buckets belong to the same burst
+BURST_MAX_GAP = 1
+
+
+class Burst(NamedTuple):
+    start: int  # timestamp_ms of the start of the first bucket
+    end: int  # timestamp_ms of the end of the last bucket (exclusive)
+    count: int  # matching tweets inside the burst
+    peak: int  # timestamp_ms of the start of the busiest bucket
+
+
+def load_timestamps(year) -> np.ndarray:
+    """
+    :param year: ceremony year
+    :return: int64 timestamp_ms per tweet, aligned with get_corpus(year) (-1 where missing)
+    """
+    corpus = get_corpus(year)
+    if isinstance(corpus, MappedTweetCorpus) and corpus.timestamps is not None:
+        return np.frombuffer(corpus.timestamps, dtype=np.int64)
+    return np.fromiter((timestamp for _, _, _, timestamp in iter_tweet_columns_from_json(corpus_path(year))),
+                       dtype=np.int64)
+
+
+class BurstIndex(object):
+    def __init__(self, timestamps: np.ndarray, bucket_ms: int = BUCKET_MS):
+        """
+        Time-bucketed index over a corpus: every tweet is assigned to a bucket of <bucket_ms> by its timestamp_ms,
+        and the overall tweet volume per bucket is kept as the baseline bursts are measured against.
+        Any set of tweets (matching an award, a hashtag, ...) is then given as document ids, i.e. corpus positions.
+        :param timestamps: timestamp_ms per tweet (negative = missing, never part of a burst)
+        """
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.bucket_ms = bucket_ms
+        valid = self.timestamps >= 0
+        self.start = int(self.timestamps[valid].min()) if valid.any() else 0
+        self.buckets = np.where(valid, (self.timestamps - self.start) // bucket_ms, -1)
+        self.n_buckets = int(self.buckets.max()) + 1 if valid.any() else 0
+        self.volume = np.bincount(self.buckets[valid], minlength=self.n_buckets)
+
+    @classmethod
+    def for_year(cls, year, bucket_ms: int = BUCKET_MS) -> 'BurstIndex':
+        return cls(load_timestamps(year), bucket_ms)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def bucket_start(self, bucket: int) -> int:
+        return self.start + bucket * self.bucket_ms
+
+    def series(self, doc_ids: Iterable[int]) -> np.ndarray:
+        """
+        :param doc_ids: corpus positions of the tweets of interest
+        :return: number of those tweets per bucket
+        """
+        buckets = self.buckets[np.fromiter(doc_ids, dtype=np.int64)]
+        return np.bincount(buckets[buckets >= 0], minlength=self.n_buckets)
+
+    def bursts(self, doc_ids: Iterable[int], ratio: float = BURST_RATIO, min_count: int = BURST_MIN_COUNT,
+               max_gap: int = BURST_MAX_GAP) -> List[Burst]:
+        """
+        Volume bursts of a set of tweets: runs of buckets where the set is over-represented relative to the
+        corpus as a whole (more than <ratio> times its overall share of the bucket's tweets)
+        :param doc_ids: corpus positions of the tweets of interest
+        :return: bursts, largest (most matching tweets) first
+        """
+        series = self.series(doc_ids)
+        total = series.sum()
+        if total == 0:
+            return []
+        expected = self.volume * (total / self.volume.sum())
+        hot = np.flatnonzero((series >= min_count) & (series > ratio * expected)).tolist()
+
+        runs = []
+        for bucket in hot:
+            if runs and bucket - runs[-1][1] <= max_gap + 1:
+                runs[-1][1] = bucket
+            else:
+                runs.append([bucket, bucket])
+
+        bursts = []
+        for first, last in runs:
+            window = series[first:last + 1]
+            bursts.append(Burst(start=self.bucket_start(first), end=self.bucket_start(last + 1),
+                                count=int(window.sum()), peak=self.bucket_start(first + int(window.argmax()))))
+        return sorted(bursts, key=lambda burst: (-burst.count, burst.start))
+
+    def strongest_burst(self, doc_ids: Iterable[int], **kwargs) -> Optional[Burst]:
+        bursts = self.bursts(doc_ids, **kwargs)
+        return bursts[0] if len(bursts) else None
+
+    def in_window(self, doc_ids: Iterable[int], window: Tuple[int, int]) -> np.ndarray:
+        """
+        :param doc_ids: corpus positions
+        :param window: (start, end) timestamp_ms, end exclusive
+        :return: boolean mask, aligned with doc_ids, of the tweets posted inside the window
+        """
+        timestamps = self.timestamps[np.fromiter(doc_ids, dtype=np.int64)]
+        return (timestamps >= window[0]) & (timestamps < window[1])
+
+
+def pad_window(burst: Optional[Burst], padding: Tuple[float, float]) -> Optional[Tuple[int, int]]:
+    """
+    :param burst: burst to widen (None: no burst detected)
+    :param padding: (minutes before, minutes after) the burst
+    :return: (start, end) timestamp_ms, or None
+    """
+    if burst is None:
+        return None
+    return burst.start - int(padding[0] * 60 * 1000), burst.end + int(padding[1] * 60 * 1000)
+
+
+def hashtag_bursts(burst_index: BurstIndex, index, hashtags: Iterable[str], **kwargs) -> Dict[str, List[Burst]]:
+    """
+    :param burst_index: BurstIndex over the corpus
+    :param index: InvertedIndex over the same corpus (document ids = corpus positions)
+    :param hashtags: hashtags (without '#')
+    :return: hashtag --> its volume bursts, largest first
+    """
+    return {tag: burst_index.bursts(sorted(index.term_postings('#' + tag.lower())), **kwargs) for tag in hashtags}
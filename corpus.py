@@ -0,0 +1,233 @@
+import os
+import sys
+import mmap
+import struct
+from array import array
+from typing import Dict, Iterator, Tuple
+from tqdm import tqdm
+
+from loading_utils import iter_tweet_text_from_json, iter_tweet_columns_from_json
+from instrumentation import instrument
+
+# dumps larger than this are streamed from disk on every pass instead of being held in memory
+STREAMING_THRESHOLD_BYTES = 1 << 30
+
+# binary corpus layout (native byte order, all sections 8-byte aligned):
+#   header: magic, version, flags, n_tweets, text_start, text_len, offsets_start, columns_start
+#   text buffer: UTF-8 tweet texts, back to back
+#   offsets: n_tweets + 1 uint64 byte offsets into the text buffer
+#   columns: n_tweets int64 values per column present in flags (tweet id, user id, timestamp_ms); -1 if missing
+BINARY_CORPUS_MAGIC = b'GGCORPUS'
+BINARY_CORPUS_VERSION = 1
+BINARY_CORPUS_HEADER = struct.Struct('=8sIIQQQQQ')
+BINARY_CORPUS_COLUMNS = ['id', 'user_id', 'timestamp_ms']
+BYTE_ORDER_FLAG = 1 << 31 if sys.byteorder == 'big' else 0
+
+
+def corpus_path(year) -> str:
+    return 'gg' + str(year) + '.json'
+
+
+def binary_corpus_path(year) -> str:
+    return 'gg' + str(year) + '.corpus'
+
+
+class TweetCorpus(object):
+    def __init__(self, year, texts: Tuple[str, ...]):
+        """
+        Read-only, in-memory view of the tweets of one ceremony year.
+            - only the tweet text is kept (no per-tweet dicts)
+            - identical texts (retweets, copy-pasted announcements) share a single string object
+        Build it through get_corpus(year) so that every pipeline stage shares the same instance.
+        """
+        self.year = str(year)
+        self.texts = texts
+
+    @classmethod
+    def from_json(cls, year, fp: str = None) -> 'TweetCorpus':
+        fp = corpus_path(year) if fp is None else fp
+        interned = {}
+        texts = []
+        for text in tqdm(iter_tweet_text_from_json(fp), desc='Loading tweets from corpus'):
+            texts.append(interned.setdefault(text, text))
+        del interned
+        return cls(year, tuple(texts))
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.texts)
+
+    def __getitem__(self, ix):
+        return self.texts[ix]
+
+
+class StreamingTweetCorpus(object):
+    def __init__(self, year, fp: str = None):
+        """
+        Lazily streamed view of the tweets of one ceremony year.
+            - every iteration re-reads gg<year>.json incrementally (ijson), so memory stays flat
+            - supports the same iteration protocol as TweetCorpus, but no len() or indexing
+        """
+        self.year = str(year)
+        self.fp = corpus_path(year) if fp is None else fp
+        self.texts = self
+
+    def __iter__(self) -> Iterator[str]:
+        return iter_tweet_text_from_json(self.fp)
+
+
+@instrument('corpus.write_binary')
+def write_binary_corpus(year, fp: str = None, out_fp: str = None, columns: bool = True) -> str:
+    """
+    Convert gg<year>.json into the binary corpus format read by MappedTweetCorpus.
+    The JSON is streamed, so only the offset/column arrays (8 bytes per tweet each) are held in memory.
+    :param year: ceremony year
+    :param fp: JSON dump path (default gg<year>.json)
+    :param out_fp: output path (default gg<year>.corpus)
+    :param columns: if True, also store tweet id, user id and timestamp_ms columns
+    :return: output path
+    """
+    fp = corpus_path(year) if fp is None else fp
+    out_fp = binary_corpus_path(year) if out_fp is None else out_fp
+    offsets = array('Q', [0])
+    column_values = [array('q') for _ in BINARY_CORPUS_COLUMNS] if columns else []
+    text_start = BINARY_CORPUS_HEADER.size
+
+    tmp_fp = out_fp + '.tmp'
+    with open(tmp_fp, 'wb') as f:
+        f.write(b'\0' * text_start)
+        position = 0
+        for text, *values in tqdm(iter_tweet_columns_from_json(fp), desc='Writing binary corpus ' + out_fp):
+            encoded = text.encode('utf-8')
+            f.write(encoded)
+            position += len(encoded)
+            offsets.append(position)
+            for column, value in zip(column_values, values):
+                column.append(value)
+
+        # pad the text buffer so the arrays that follow stay 8-byte aligned
+        f.write(b'\0' * (-(text_start + position) % 8))
+        offsets_start = f.tell()
+        offsets.tofile(f)
+        columns_start = f.tell()
+        for column in column_values:
+            column.tofile(f)
+
+        flags = BYTE_ORDER_FLAG | sum(1 << ix for ix in range(len(column_values)))
+        f.seek(0)
+        f.write(BINARY_CORPUS_HEADER.pack(BINARY_CORPUS_MAGIC, BINARY_CORPUS_VERSION, flags, len(offsets) - 1,
+                                          text_start, position, offsets_start, columns_start))
+    os.replace(tmp_fp, out_fp)
+    return out_fp
+
+
+class MappedTweetCorpus(object):
+    def __init__(self, year, fp: str = None):
+        """
+        Memory-mapped view of a binary corpus written by write_binary_corpus (see gg_api.pre_ceremony)
+            - opening is O(1): nothing is parsed, texts are decoded on access
+            - pages are shared by every process that maps the same file (e.g. forked workers)
+            - optional int64 columns: self.ids, self.user_ids, self.timestamps (None if not stored)
+        """
+        self.year = str(year)
+        self.fp = binary_corpus_path(year) if fp is None else fp
+        self.texts = self
+
+        with open(self.fp, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, flags, self.n_tweets, self._text_start, text_len,
+         offsets_start, columns_start) = BINARY_CORPUS_HEADER.unpack_from(self._mm, 0)
+        if magic != BINARY_CORPUS_MAGIC or version != BINARY_CORPUS_VERSION:
+            raise ValueError('%s is not a version %i binary corpus' % (self.fp, BINARY_CORPUS_VERSION))
+        if flags & (1 << 31) != BYTE_ORDER_FLAG:
+            raise ValueError('%s was written on a machine with a different byte order' % self.fp)
+
+        buffer = memoryview(self._mm)
+        self._offsets = buffer[offsets_start:offsets_start + 8 * (self.n_tweets + 1)].cast('Q')
+        column_views = {}
+        position = columns_start
+        for ix, name in enumerate(BINARY_CORPUS_COLUMNS):
+            if flags & (1 << ix):
+                column_views[name] = buffer[position:position + 8 * self.n_tweets].cast('q')
+                position += 8 * self.n_tweets
+        self.ids = column_views.get('id')
+        self.user_ids = column_views.get('user_id')
+        self.timestamps = column_views.get('timestamp_ms')
+
+    def __len__(self) -> int:
+        return self.n_tweets
+
+    def __getitem__(self, ix: int) -> str:
+        if ix < 0:
+            ix += self.n_tweets
+        if not 0 <= ix < self.n_tweets:
+            raise IndexError('tweet index out of range')
+        start = self._text_start
+        return self._mm[start + self._offsets[ix]:start + self._offsets[ix + 1]].decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        mm, offsets, start = self._mm, self._offsets, self._text_start
+        for ix in range(self.n_tweets):
+            yield mm[start + offsets[ix]:start + offsets[ix + 1]].decode('utf-8')
+
+
+def has_binary_corpus(year) -> bool:
+    # a binary corpus is only used while it is at least as recent as the JSON dump it was built from
+    if not os.path.exists(binary_corpus_path(year)):
+        return False
+    if not os.path.exists(corpus_path(year)):
+        return True
+    return os.path.getmtime(binary_corpus_path(year)) >= os.path.getmtime(corpus_path(year))
+
+
+# one corpus per year, shared by every gg_api entry point and the HashtagParser
+_corpus_cache: Dict[str, object] = {}
+
+
+def corpus_kind(corpus) -> str:
+    # 'mapped' (binary corpus), 'stream' (re-read from JSON on every pass) or 'memory' (texts held in memory)
+    if isinstance(corpus, MappedTweetCorpus):
+        return 'mapped'
+    return 'stream' if isinstance(corpus, StreamingTweetCorpus) else 'memory'
+
+
+def get_corpus(year, reload: bool = False, stream: bool = None):
+    """
+    Load the corpus for a year once per process and return the shared instance on later calls.
+    A binary corpus (gg<year>.corpus, written by gg_api.pre_ceremony) always wins: while it is up to date it is
+    memory-mapped whatever stream asks for (memory stays flat and the texts are still indexable).
+    Otherwise the JSON dump is streamed or held in memory, and a cached corpus of the other kind is replaced
+    when stream asks for a specific kind.
+    :param year: ceremony year, e.g. 2015 or '2015'
+    :param reload: if True, drop the cached corpus and read it again
+    :param stream: if True, return a StreamingTweetCorpus; if False, a TweetCorpus;
+        if None, the cached corpus of any kind -- or, when loading, stream only dumps above STREAMING_THRESHOLD_BYTES
+    :return: MappedTweetCorpus, TweetCorpus or StreamingTweetCorpus
+    """
+    year = str(year)
+    if has_binary_corpus(year):
+        wanted = 'mapped'
+    elif stream is None:
+        wanted = None
+    else:
+        wanted = 'stream' if stream else 'memory'
+
+    cached = _corpus_cache.get(year)
+    if reload or cached is None or (wanted is not None and corpus_kind(cached) != wanted):
+        if wanted == 'mapped':
+            _corpus_cache[year] = MappedTweetCorpus(year)
+            return _corpus_cache[year]
+        if stream is None:
+            stream = os.path.getsize(corpus_path(year)) > STREAMING_THRESHOLD_BYTES
+        _corpus_cache[year] = StreamingTweetCorpus(year) if stream else TweetCorpus.from_json(year)
+    return _corpus_cache[year]
+
+
+def clear_corpus_cache() -> None:
+    _corpus_cache.clear()
+    # per-corpus data cached downstream goes with it (tweet_labels imports this module, so look it up lazily)
+    tweet_labels = sys.modules.get('tweet_labels')
+    if tweet_labels is not None:
+        tweet_labels.clear_label_cache()
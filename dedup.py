@@ -0,0 +1,150 @@
+import re
+import zlib
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+import numpy as np
+
+# collapsing modes
+EXACT = 'exact'  # identical texts only -- downstream results are unchanged
+NORMALIZED = 'normalized'  # identical after normalize_text (retweets of the same text, case/whitespace variants)
+NEAR = 'near'  # normalized + near-duplicates found by MinHash/LSH over word shingles
+DEDUP_MODES = [EXACT, NORMALIZED, NEAR]
+
+# MinHash / LSH settings: signature length, number of LSH bands (rows per band = permutations / bands),
+# words per shingle, and the shingle Jaccard similarity a candidate pair must reach to be merged
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 3
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# Mersenne prime 2^31 - 1: (a * h + b) stays below 2^63 for 31-bit a, b, h
+MINHASH_PRIME = (1 << 31) - 1
+
+RETWEET_PREFIX_REGEX = re.compile(r'^(\s*rt\s+@\w+:?\s*)+')
+URL_REGEX = re.compile(r'https?://\S+')
+WHITESPACE_REGEX = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Key under which retweets and copy-paste variants of a tweet collide:
+    lowercased, leading "RT @user:" prefixes and links removed, whitespace collapsed
+    """
+    text = RETWEET_PREFIX_REGEX.sub('', text.lower())
+    text = URL_REGEX.sub('', text)
+    return WHITESPACE_REGEX.sub(' ', text).strip()
+
+
+class DuplicateClusters(object):
+    def __init__(self, representatives: List[str], counts: List[int], labels: List[int]):
+        """
+        Result of collapsing duplicate tweets
+        :param representatives: one tweet per cluster (its first occurrence), in first-seen order
+        :param counts: multiplicity of every cluster, i.e. how many input tweets it stands for
+        :param labels: cluster id of every input tweet
+        """
+        self.representatives = representatives
+        self.counts = counts
+        self.labels = labels
+
+    def __len__(self) -> int:
+        return len(self.representatives)
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        return zip(self.representatives, self.counts)
+
+    def expand(self, values: Sequence) -> List:
+        """
+        :param values: one value per representative (e.g. its entities)
+        :return: one value per input tweet
+        """
+        return [values[label] for label in self.labels]
+
+    def masked_counts(self, mask: Sequence[bool]) -> List[int]:
+        """
+        :param mask: one flag per input tweet (e.g. posted inside a time window)
+        :return: per cluster, how many of its input tweets are flagged
+        """
+        flags = np.asarray(mask, dtype=np.float64)
+        return np.bincount(np.asarray(self.labels, dtype=np.int64), weights=flags, minlength=len(self)).astype(np.int64).tolist()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    :return: sorted unique 32-bit hashes of the word <size>-grams of text (the whole text if it is shorter)
+    """
+    words = text.split()
+    grams = [' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))]
+    return np.unique(np.array([zlib.crc32(gram.encode('utf-8')) for gram in grams], dtype=np.uint64))
+
+
+class MinHasher(object):
+    def __init__(self, n_permutations: int = MINHASH_PERMUTATIONS, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, MINHASH_PRIME, size=n_permutations).astype(np.uint64)
+        self.b = rng.randint(0, MINHASH_PRIME, size=n_permutations).astype(np.uint64)
+
+    def signature(self, shingle_hashes: np.ndarray) -> np.ndarray:
+        hashes = (shingle_hashes % MINHASH_PRIME)[:, None]
+        return ((self.a[None, :] * hashes + self.b[None, :]) % MINHASH_PRIME).min(axis=0)
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    # a, b: sorted unique shingle hashes
+    shared = len(np.intersect1d(a, b, assume_unique=True))
+    return shared / float(len(a) + len(b) - shared)
+
+
+def collapse_duplicates(texts: Iterable[str], mode: str = EXACT,
+                        threshold: float = NEAR_DUPLICATE_THRESHOLD, bands: int = LSH_BANDS,
+                        hasher: MinHasher = None) -> DuplicateClusters:
+    """
+    Collapses duplicate tweets into clusters, so that per-tweet work (NER, regexes) runs once per cluster
+    and its result is weighted by the cluster's count.
+        - EXACT / NORMALIZED: one hash lookup per tweet (on the text itself / on normalize_text(text))
+        - NEAR: additionally, every new normalized text is MinHashed and looked up in an LSH table (banded
+          signatures); it joins the first earlier cluster whose representative shares a band and whose
+          shingle Jaccard similarity is at least <threshold>
+    :param texts: tweet strings
+    :param mode: EXACT, NORMALIZED or NEAR
+    :return: DuplicateClusters (representatives in first-seen order)
+    """
+    if mode not in DEDUP_MODES:
+        raise ValueError('unknown dedup mode %s (expected one of %s)' % (mode, DEDUP_MODES))
+    if mode == NEAR and hasher is None:
+        hasher = MinHasher()
+
+    representatives, counts, labels = [], [], []
+    key_to_cluster: Dict[str, int] = {}
+    band_to_clusters: Dict[Tuple[int, bytes], List[int]] = {}
+    cluster_shingles: Dict[int, np.ndarray] = {}
+
+    for text in texts:
+        key = text if mode == EXACT else normalize_text(text)
+        cluster = key_to_cluster.get(key)
+
+        if cluster is None and mode == NEAR:
+            text_shingles = shingles(key)
+            signature = hasher.signature(text_shingles)
+            band_keys = [(band, rows.tobytes()) for band, rows in enumerate(np.array_split(signature, bands))]
+            for band_key in band_keys:
+                for candidate in band_to_clusters.get(band_key, []):
+                    if jaccard(text_shingles, cluster_shingles[candidate]) >= threshold:
+                        cluster = candidate
+                        break
+                if cluster is not None:
+                    break
+            if cluster is None:
+                cluster = len(representatives)
+                cluster_shingles[cluster] = text_shingles
+                for band_key in band_keys:
+                    band_to_clusters.setdefault(band_key, []).append(cluster)
+            key_to_cluster[key] = cluster
+
+        if cluster is None:
+            cluster = len(representatives)
+            key_to_cluster[key] = cluster
+        if cluster == len(representatives):
+            representatives.append(text)
+            counts.append(0)
+        counts[cluster] += 1
+        labels.append(cluster)
+    return DuplicateClusters(representatives, counts, labels)
@@ -0,0 +1,71 @@
+from typing import Callable, Iterable, List, Sequence
+
+from ner_cache import NERCache, ENTITIES, NOUN_CHUNKS
+from instrumentation import count
+
+PERSON = 'PERSON'
+WORK_OF_ART = 'WORK_OF_ART'
+
+# pipeline components each analysis needs (en_core_web_sm 3.x)
+#   - the ner component carries its own tok2vec, so entity extraction can run with everything else disabled
+#   - noun chunks are read off the dependency parse, which needs the shared tok2vec + POS tags
+NER_COMPONENTS = ['ner']
+NOUN_CHUNK_COMPONENTS = ['tok2vec', 'tagger', 'attribute_ruler', 'parser']
+
+
+class EntityExtractor(object):
+    def __init__(self, nlp, batch_size: int = 256, n_process: int = 1, cache: NERCache = None):
+        """
+        Batched spaCy analysis of tweets via nlp.pipe
+            - only the pipeline components required by an analysis are run
+            - n_process > 1 spreads the batches over worker processes
+            - each distinct text is analyzed once; with a cache, analyses persist across runs
+        :param nlp: loaded spaCy Language object (e.g. en_core_web_sm)
+        :param batch_size: number of texts per nlp.pipe batch
+        :param n_process: number of processes used by nlp.pipe
+        :param cache: optional NERCache consulted before running the model
+        """
+        self.nlp = nlp
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.cache = cache
+
+    def _pipe(self, texts: Sequence[str], components: List[str]):
+        disable = [name for name in self.nlp.pipe_names if name not in components]
+        # worker processes only pay off for reasonably large inputs
+        n_process = self.n_process if len(texts) > self.batch_size else 1
+        return self.nlp.pipe(texts, batch_size=self.batch_size, n_process=n_process, disable=disable)
+
+    def _analyze(self, texts: Sequence[str], analysis: str, components: List[str], read_doc: Callable) -> List:
+        unique_texts = list(dict.fromkeys(texts))
+        found = self.cache.get_many(unique_texts, analysis) if self.cache is not None else {}
+        missing = [text for text in unique_texts if text not in found]
+        count('ner.texts', len(texts))
+        count('ner.cache_hits', len(found))
+        count('ner.model_texts', len(missing))
+
+        computed = {text: read_doc(doc) for text, doc in zip(missing, self._pipe(missing, components))}
+        if self.cache is not None:
+            self.cache.put_many(computed, analysis)
+        found.update(computed)
+        return [found[text] for text in texts]
+
+    def extract_entities(self, texts: Iterable[str], labels: Sequence[str] = (PERSON,)) -> List[List[str]]:
+        """
+        :param texts: tweet strings
+        :param labels: entity labels to keep, e.g. ('PERSON',) or ('WORK_OF_ART',)
+        :return: one list of entity strings per input text (same order as the input)
+        """
+        # all (label, text) spans are kept, so that cached analyses serve any label
+        entities = self._analyze(list(texts), ENTITIES, NER_COMPONENTS,
+                                 lambda doc: [[ent.label_, ent.text] for ent in doc.ents])
+        return [[text for label, text in ents if label in labels] for ents in entities]
+
+    def extract_noun_chunks(self, texts: Iterable[str]) -> List[List[str]]:
+        """
+        :param texts: tweet strings
+        :return: one list of noun chunk strings per input text (same order as the input)
+        """
+        noun_chunks = self._analyze(list(texts), NOUN_CHUNKS, NOUN_CHUNK_COMPONENTS,
+                                    lambda doc: [chunk.text for chunk in doc.noun_chunks])
+        return [list(chunks) for chunks in noun_chunks]
@@ -1,7 +1,7 @@
 from hashtag_parsing import HashtagParser
-from loading_utils import load_tweet_text_from_json
+from corpus import get_corpus
 
-data = load_tweet_text_from_json('gg2015.json')
+data = get_corpus(2015)
 hp = HashtagParser(data)
 award_names = hp.parse_award_names(data, verbose=True)
 
@@ -1,62 +1,119 @@
 '''Version 0.35'''
-from multiprocessing.connection import answer_challenge
+import os
 import re
+import math
 import json
-import csv
-import spacy 
-import pandas as pd
+from functools import partial
 from tqdm import tqdm
-from hashtag_parsing import HashtagParser
-from loading_utils import load_tweet_text_from_json
+from hashtag_parsing import HashtagParser, hashtag_state_path, has_hashtag_state
+from corpus import get_corpus, corpus_path, write_binary_corpus
+from entity_extraction import EntityExtractor, PERSON, WORK_OF_ART
+from ner_cache import NERCache, model_key
+from tweet_index import InvertedIndex
+from string_utils import MultiPatternMatcher
+from parallel import map_forked
+from burst_index import BurstIndex, pad_window
+from dedup import collapse_duplicates
+from instrumentation import instrument, stage, recorder
+from tweet_labels import get_tweet_labels, clear_label_cache, is_reasonable, TweetClassifier, HYPOTHETICAL_REGEX, HYPOTHETICAL, HISTORICAL, RETWEET
 
 # ----------------------------------- Global Variables -----------------------------------
+CEREMONY_YEARS = [2013, 2015]
 OFFICIAL_AWARDS_1315 = ['cecil b. demille award', 'best motion picture - drama', 'best performance by an actress in a motion picture - drama', 'best performance by an actor in a motion picture - drama', 'best motion picture - comedy or musical', 'best performance by an actress in a motion picture - comedy or musical', 'best performance by an actor in a motion picture - comedy or musical', 'best animated feature film', 'best foreign language film', 'best performance by an actress in a supporting role in a motion picture', 'best performance by an actor in a supporting role in a motion picture', 'best director - motion picture', 'best screenplay - motion picture', 'best original score - motion picture', 'best original song - motion picture', 'best television series - drama', 'best performance by an actress in a television series - drama', 'best performance by an actor in a television series - drama', 'best television series - comedy or musical', 'best performance by an actress in a television series - comedy or musical', 'best performance by an actor in a television series - comedy or musical', 'best mini-series or motion picture made for television', 'best performance by an actress in a mini-series or motion picture made for television', 'best performance by an actor in a mini-series or motion picture made for television', 'best performance by an actress in a supporting role in a series, mini-series or motion picture made for television', 'best performance by an actor in a supporting role in a series, mini-series or motion picture made for television']
 OFFICIAL_AWARDS_1819 = ['best motion picture - drama', 'best motion picture - musical or comedy', 'best performance by an actress in a motion picture - drama', 'best performance by an actor in a motion picture - drama', 'best performance by an actress in a motion picture - musical or comedy', 'best performance by an actor in a motion picture - musical or comedy', 'best performance by an actress in a supporting role in any motion picture', 'best performance by an actor in a supporting role in any motion picture', 'best director - motion picture', 'best screenplay - motion picture', 'best motion picture - animated', 'best motion picture - foreign language', 'best original score - motion picture', 'best original song - motion picture', 'best television series - drama', 'best television series - musical or comedy', 'best television limited series or motion picture made for television', 'best performance by an actress in a limited series or a motion picture made for television', 'best performance by an actor in a limited series or a motion picture made for television', 'best performance by an actress in a television series - drama', 'best performance by an actor in a television series - drama', 'best performance by an actress in a television series - musical or comedy', 'best performance by an actor in a television series - musical or comedy', 'best performance by an actress in a supporting role in a series, limited series or motion picture made for television', 'best performance by an actor in a supporting role in a series, limited series or motion picture made for television', 'cecil b. demille award']
-answers = {"hosts": ["amy poehler","tina fey"],"award_data": {"best screenplay - motion picture": {"nominees": ["the grand budapest hotel","gone girl","boyhood","the imitation game"],"presenters": ["bill hader","kristen wiig"],"winner": "birdman"},"best director - motion picture": {"nominees": ["wes anderson","ava duvernay","david fincher","alejandro inarritu gonzalez"],"presenters": ["harrison ford"],"winner": "richard linklater"},"best performance by an actress in a television series - comedy or musical": {"nominees": ["lena dunham","edie falco","julia louis-dreyfus","taylor schilling"],"presenters": ["bryan cranston","kerry washington"],"winner": "gina rodriguez"},"best foreign language film": {"nominees": ["force majeure","gett: the trial of viviane amsalem","ida","tangerines"],"presenters": ["colin farrell","lupita nyong'o"],"winner": "leviathan"},"best performance by an actor in a supporting role in a motion picture": {"nominees": ["robert duvall","edward norton","mark ruffalo"],"presenters": ["jennifer aniston","benedict cumberbatch"],"winner": "j.k. simmons"},"best performance by an actress in a supporting role in a series, mini-series or motion picture made for television": {"nominees": ["uzo aduba","kathy bates","allison janney","michelle monaghan"],"presenters": ["jamie dornan","dakota johnson"],"winner": "joanne froggatt"},"best motion picture - comedy or musical": {"nominees": ["birdman","into the woods","pride","st. vincent"],"presenters": ["robert downey, jr."],"winner": "the grand budapest hotel"},"best performance by an actress in a motion picture - comedy or musical": {"nominees": ["emily blunt","helen mirren","julianne moore","quvenzhane wallis"],"presenters": ["ricky gervais"],"winner": "amy adams"},"best mini-series or motion picture made for television": {"nominees": ["the missing","the normal heart","olive kitteridge","true detective"],"presenters": ["jennifer lopez","jeremy renner"],"winner": "fargo"},"best original score - motion picture": {"nominees": ["the imitation game","birdman","gone girl","interstellar"],"presenters": ["sienna miller","vince vaughn"],"winner": "the theory of everything"},"best performance by an actress in a television series - drama": {"nominees": ["claire danes","viola davis","julianna margulies","robin wright"],"presenters": ["anna faris","chris pratt"],"winner": "ruth wilson"},"best performance by an actress in a motion picture - drama": {"nominees": ["jennifer aniston","felicity jones","rosamund pike","reese witherspoon"],"presenters": ["matthew mcconaughey"],"winner": "julianne moore"},"cecil b. demille award": {"nominees": [],"presenters": ["don cheadle","julianna margulies"],"winner": "george clooney"},"best performance by an actor in a motion picture - comedy or musical": {"nominees": ["ralph fiennes","bill murray","joaquin phoenix","christoph waltz"],"presenters": ["amy adams"],"winner": "michael keaton"},"best motion picture - drama": {"nominees": ["foxcatcher","the imitation game","selma","the theory of everything"],"presenters": ["meryl streep"],"winner": "boyhood"},"best performance by an actor in a supporting role in a series, mini-series or motion picture made for television": {"nominees": ["alan cumming","colin hanks","bill murray","jon voight"],"presenters": ["katie holmes","seth meyers"],"winner": "matt bomer"},"best performance by an actress in a supporting role in a motion picture": {"nominees": ["jessica chastain","keira knightley","emma stone","meryl streep"],"presenters": ["jared leto"],"winner": "patricia arquette"},"best television series - drama": {"nominees": ["downton abbey (masterpiece)","game of thrones","the good wife","house of cards"],"presenters": ["adam levine","paul rudd"],"winner": "the affair"},"best performance by an actor in a mini-series or motion picture made for television": {"nominees": ["martin freeman","woody harrelson","matthew mcconaughey","mark ruffalo"],"presenters": ["jennifer lopez","jeremy renner"],"winner": "billy bob thornton"},"best performance by an actress in a mini-series or motion picture made for television": {"nominees": ["jessica lange","frances mcdormand","frances o'connor","allison tolman"],"presenters": ["kate beckinsale","adrien brody"],"winner": "maggie gyllenhaal"},"best animated feature film": {"nominees": ["big hero 6","the book of life","the boxtrolls","the lego movie"],"presenters": ["kevin hart","salma hayek"],"winner": "how to train your dragon 2"},"best original song - motion picture": {"nominees": ["big eyes","noah","annie","the hunger games: mockingjay - part 1"],"presenters": ["prince"],"winner": "selma"},"best performance by an actor in a motion picture - drama": {"nominees": ["steve carell","benedict cumberbatch","jake gyllenhaal","david oyelowo"],"presenters": ["gwyneth paltrow"],"winner": "eddie redmayne"},"best television series - comedy or musical": {"nominees": ["girls","jane the virgin","orange is the new black","silicon valley"],"presenters": ["bryan cranston","kerry washington"],"winner": "transparent"},"best performance by an actor in a television series - drama": {"nominees": ["clive owen","liev schreiber","james spader","dominic west"],"presenters": ["david duchovny","katherine heigl"],"winner": "kevin spacey"},"best performance by an actor in a television series - comedy or musical": {"nominees": ["louis c.k.","don cheadle","ricky gervais","william h. macy"],"presenters": ["jane fonda","lily tomlin"],"winner": "jeffrey tambor"}}}
-print('Loading spacy model: en_core_web_sm')
-nlp = spacy.load("en_core_web_sm")
+# batched NER settings: texts per nlp.pipe batch, and worker processes used by nlp.pipe
+NER_BATCH_SIZE = 256
+NER_N_PROCESS = 1
+# persistent NER/parse cache, kept next to the corpus (set NER_CACHE_PATH = None to disable)
+NER_CACHE_PATH = 'gg_ner_cache.sqlite'
+NER_CACHE_MAX_ENTRIES = 1000000
+# worker processes for the HashtagParser's per-tweet passes (hashtag counting, award phrase mining); 1 = serial
+HASHTAG_N_WORKERS = 1
+# worker processes evaluating awards concurrently in get_winner / get_nominees (forked: model + corpus are shared); 1 = serial
+AWARD_N_WORKERS = 1
+# restrict get_winner / get_nominees / get_presenters to tweets posted around each award's announcement burst
+BURST_WINDOWS = False
+# (minutes before, minutes after) the announcement burst kept by each of them
+BURST_WINDOW_PADDING = {'winner': (2, 10), 'nominees': (30, 5), 'presenters': (10, 2)}
+# duplicate tweets are analyzed once and counted with their multiplicity (see dedup.py):
+# 'exact' keeps results unchanged, 'normalized' / 'near' also merge retweets and near-duplicate copies
+DEDUP_MODE = 'exact'
+# award keywords marking awards that go to people (the others go to titles)
+PEOPLE_AWARD_WORDS = ['actor', 'actress', 'director', 'cecil']
+# words of tweets announcing presenters
+PRESENTER_WORDS = ["present", "announces", "announcing", "announced"]
+# spaCy model used for NER and noun chunks -- loaded on first use (get_nlp), not when gg_api is imported
+SPACY_MODEL = os.environ.get('GG_SPACY_MODEL', 'en_core_web_sm')
+
+# ----------------------------------- Models -----------------------------------
+# spaCy model name --> loaded pipeline
+_nlp_models = {}
+# shared EntityExtractor, created by get_ner
+_ner = None
+
+def get_nlp(model = None):
+    '''The spaCy pipeline <model> (default: SPACY_MODEL), loaded on first use and shared by every caller'''
+    model = model or SPACY_MODEL
+    if model not in _nlp_models:
+        import spacy
+        print('Loading spacy model:', model)
+        _nlp_models[model] = spacy.load(model)
+    return _nlp_models[model]
+
+def get_ner():
+    '''The shared EntityExtractor over get_nlp() and the persistent NER cache, created on first use'''
+    global _ner
+    if _ner is None:
+        nlp = get_nlp()
+        cache = NERCache(NER_CACHE_PATH, model=model_key(nlp), max_entries=NER_CACHE_MAX_ENTRIES) if NER_CACHE_PATH else None
+        _ner = EntityExtractor(nlp, batch_size=NER_BATCH_SIZE, n_process=NER_N_PROCESS, cache=cache)
+    return _ner
+
+def __getattr__(name):
+    # gg_api.nlp / gg_api.ner / gg_api.ner_cache still work, loading the model when first accessed
+    if name == 'nlp':
+        return get_nlp()
+    if name == 'ner':
+        return get_ner()
+    if name == 'ner_cache':
+        return get_ner().cache
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
 # ----------------------------------- Helper Functions -----------------------------------
 def find_persons(text):
-    # Create Doc object
-    doc2 = nlp(text)
-
-    # Identify the persons
-    persons = [ent.text for ent in doc2.ents if ent.label_ == 'PERSON']
-
-    # Return persons
-    return persons
+    return find_persons_batch([text])[0]
 
 def find_films(text):
-    # Create Doc object
-    doc2 = nlp(text)
+    return find_films_batch([text])[0]
 
-    # ID the films
-    films = [ent.text for ent in doc2.ents if ent.label_ == 'WORK_OF_ART']
+@instrument('ner.persons', items_arg=0)
+def find_persons_batch(texts):
+    # one list of PERSON entities per text
+    return get_ner().extract_entities(texts, labels=(PERSON,))
 
-    return films
+@instrument('ner.films', items_arg=0)
+def find_films_batch(texts):
+    # one list of WORK_OF_ART entities per text
+    return get_ner().extract_entities(texts, labels=(WORK_OF_ART,))
+
+@instrument('ner.noun_chunks', items_arg=0)
+def find_noun_chunks_batch(texts):
+    # one list of noun chunks per text
+    return get_ner().extract_noun_chunks(texts)
 
 def isHypothetical(text):
-    indicator = r"\?|\bhope\b|\bhoping\b|\bbet|\bthink|\bwill\b|\bpredict|\bgoing to\b|\bgonna\b|\bshould|\bif\b|\bnomin"
-    if re.search(indicator, text):
-        return True
-    return False
+    return HYPOTHETICAL_REGEX.search(text) is not None
 
-def isHistorical(text):
-    if (re.findall(r"\d\d\d\d", text) and '2015' not in text and '2014' not in text) or 'last year' in text:
-        return True
-    return False
+def isHistorical(text, year = 2015):
+    return bool(TweetClassifier(year).label(text) & HISTORICAL)
 
-def isReasonable(text):
-    if not isHypothetical(text.lower()) and not isHistorical(text.lower()):
-        return True
-    return False
+def isReasonable(text, year = 2015):
+    return is_reasonable(TweetClassifier(year).label(text))
+
+WIN_INDICATORS = MultiPatternMatcher({'win': ['won', 'win', 'congrat', 'goes to', 'went to', 'snag', 'takes home', 'took home']})
 
 def indicatesWin(text):
-    winIndicators = ['won', 'win', 'congrat', 'goes to', 'went to', 'snag', 'takes home', 'took home']
-    for word in winIndicators:
-        if word in text:
-            return True
-    return False
+    return WIN_INDICATORS.any_in(text)
 
 def isWinningTweet(text, awardIndicators, trips = []):
     """
@@ -106,6 +163,31 @@ def isNomTweet(text, awardIndicators, trips = []):
 
     return True
 
+def findWinningTweetIds(index, awardIndicators, trips = [], allowed = None):
+    """
+        index-backed equivalent of [i for i, t in enumerate(index.texts) if isWinningTweet(t, awardIndicators, trips)]
+        <index> = InvertedIndex over the candidate tweets
+        <allowed> = optional boolean mask over the candidate tweets (e.g. inside the award's burst window)
+    """
+    maxMissing = math.floor(0.5 * float(len(awardIndicators)) - 2) # same threshold as isWinningTweet
+    if maxMissing < 0:
+        return []
+    candidates = index.candidates(awardIndicators, len(awardIndicators) - maxMissing, excluded=trips)
+    return [i for i in candidates if (allowed is None or allowed[i]) and indicatesWin(index.texts[i].lower())]
+
+def findWinningTweets(index, awardIndicators, trips = [], allowed = None):
+    return [index.texts[i] for i in findWinningTweetIds(index, awardIndicators, trips, allowed)]
+
+def findNomTweets(index, awardIndicators, trips = [], allowed = None):
+    """
+        index-backed equivalent of [t for t in index.texts if isNomTweet(t, awardIndicators, trips)]
+        <index> = InvertedIndex over the candidate tweets
+        <allowed> = optional boolean mask over the candidate tweets (e.g. inside the award's burst window)
+    """
+    maxMissing = math.floor(0.5 * float(len(awardIndicators))) # same threshold as isNomTweet
+    candidates = index.candidates(awardIndicators, len(awardIndicators) - maxMissing, excluded=trips)
+    return [index.texts[i] for i in candidates if allowed is None or allowed[i]]
+
 def awardNameToKeywords(text):
     stops = ['by', 'an', 'a', 'or', 'in', 'for', '-']
     l = text.lower().split()
@@ -140,18 +222,11 @@ def findTripwords(award, awardList):
 
 def tweet_cleaner(year):
     '''
-    Returns a dataframe of the cleaned tweets.
+    Returns the tweet texts of the year's corpus, as an iterable.
+    The corpus is loaded once per process (see corpus.get_corpus) and shared by every caller;
+    very large dumps are streamed from disk instead, so only iterate over the result.
     '''
-    # Opening JSON file
-    fname = 'gg' + str(year) + '.json'
-    f = open(fname)
-    data = json.load(f)
-    tt = []
-    for tweet in tqdm(data, desc="Loading tweets from corpus"):
-        tt.append(tweet['text'])
-    del data
-    f.close()
-    return tt
+    return get_corpus(year).texts
 
 def pass_cap_ratio(sentence, ratio_filter = 0.66, sentence_length = 3):
     words = sentence.split(" ")
@@ -171,466 +246,740 @@ class AwardObj:
         self.tripwords = tripwords
         self.winner = ""
 
-def get_hosts(year):
-    '''Hosts is a list of one or more strings. Do NOT change the name
-    of this function or what it returns.'''
-    tweet_list = tweet_cleaner(year)
-
-    matches = []
-    namePattern = r"[A-Z][a-z]+ [A-Z][a-z]+"
-
-    #finding tweets that contain 'host'
-    for i, tweet in enumerate(tqdm(tweet_list, desc='Searching for hosts in tweets')):
-        tweet_lower = tweet.lower()
-        if 'host' in tweet_lower:
-            if isReasonable(tweet_lower):
-                matches.append(re.findall(namePattern, tweet))
-
-    namesDict = {}
-    for match in matches:
-        for name in match:
-            if name in namesDict.keys():
-                namesDict[name] += 1
-            else:
-                namesDict[name] = 1
+# ----------------------------------- ceremony analysis -----------------------------------
+def artifact(fn):
+    '''Turns a CeremonyAnalysis method into a lazily computed attribute: computed on first access, then memoized'''
+    name = fn.__name__
+
+    def get(self):
+        if name in self._artifacts:
+            return self._artifacts[name]
+        with stage('analysis.' + name):
+            value = self._artifacts[name] = fn(self)
+        self.release()
+        return value
+    get.__doc__ = fn.__doc__
+    return property(get)
+
+class CeremonyAnalysis:
+    '''
+    Everything the get_* functions compute for one ceremony year, as lazily computed artifacts. An artifact is
+    computed on first access, from the artifacts it depends on (DEPENDENCIES), and at most once per analysis --
+    so e.g. get_awards and get_winner share one HashtagParser and one parse of the award names.
+    Module settings (BURST_WINDOWS, DEDUP_MODE, ...) are read when an artifact is computed: change them before
+    the first get_* call, or start over with get_analysis(year, reload=True) / invalidate().
+    '''
+    # artifact --> artifacts it is computed from
+    DEPENDENCIES = {
+        'corpus': [],
+        'texts': ['corpus'],
+        'labels': ['corpus'],
+        'hashtag_parser': ['corpus'],
+        'award_names': ['corpus', 'hashtag_parser'],
+        'award_list': [],
+        'people_awards': ['award_list'],
+        'title_awards': ['award_list'],
+        'title_award_winners': ['corpus', 'hashtag_parser', 'award_names', 'title_awards'],
+        'reasonable_tweets': ['texts', 'labels'],
+        'hypothetical_tweets': ['texts', 'labels'],
+        'announcement_bursts': ['award_list', 'reasonable_tweets'],
+        'presenter_tweets': ['texts'],
+        'presenter_entities': ['presenter_tweets', 'announcement_bursts'],
+        'hosts': ['texts', 'labels'],
+        'winners': ['people_awards', 'title_award_winners', 'reasonable_tweets', 'announcement_bursts'],
+        'nominees': ['people_awards', 'title_awards', 'hypothetical_tweets', 'announcement_bursts'],
+        'presenters': ['presenter_entities'],
+    }
+
+    # large intermediates (tweet lists, inverted indexes, NER output): dropped as soon as every artifact computed
+    # from them has been computed, so the analysis only holds on to O(corpus) data while the awards are mined --
+    # accessing one again afterwards recomputes it
+    TRANSIENT = ['reasonable_tweets', 'hypothetical_tweets', 'presenter_tweets', 'presenter_entities']
+
+    def __init__(self, year):
+        self.year = str(year)
+        self._artifacts = {}
+
+    def computed(self):
+        '''names of the artifacts computed so far'''
+        return [name for name in self.DEPENDENCIES if name in self._artifacts]
+
+    def dependents(self, name):
+        '''names of the artifacts computed (directly or transitively) from artifact <name>'''
+        found = set()
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            for other, dependencies in self.DEPENDENCIES.items():
+                if current in dependencies and other not in found:
+                    found.add(other)
+                    pending.append(other)
+        return found
+
+    def consumers(self, name):
+        '''names of the artifacts computed directly from artifact <name> (with the current module settings)'''
+        consumers = [other for other, dependencies in self.DEPENDENCIES.items() if name in dependencies]
+        if not BURST_WINDOWS:
+            # announcement bursts are only computed for the burst windows
+            consumers = [other for other in consumers if other != 'announcement_bursts']
+        return consumers
+
+    def release(self):
+        '''Drops the TRANSIENT artifacts whose consumers have all been computed'''
+        for name in self.TRANSIENT:
+            if name in self._artifacts and all(other in self._artifacts for other in self.consumers(name)):
+                del self._artifacts[name]
+
+    def invalidate(self, *names):
+        '''Drops artifacts and everything computed from them; they are recomputed on next access'''
+        for name in names:
+            for stale in {name} | self.dependents(name):
+                self._artifacts.pop(stale, None)
+
+    # ---------- data ----------
+    @artifact
+    def corpus(self):
+        '''the year's tweets (corpus.get_corpus -- loaded once per process)'''
+        return get_corpus(self.year)
+
+    @artifact
+    def texts(self):
+        '''tweet texts in corpus order (see tweet_cleaner)'''
+        return self.corpus.texts
+
+    @artifact
+    def labels(self):
+        '''reasonableness label byte per tweet (see tweet_labels)'''
+        return get_tweet_labels(self.year)
+
+    @artifact
+    def reasonable_tweets(self):
+        '''(corpus positions, InvertedIndex) of the original, reasonable tweets (not retweets, hypothetical or historic)'''
+        ttr = [] # pruned tweets by reasonability - i.e. not hypothetical and not historic
+        ttrIds = [] # their corpus positions
+        for i, (t, label) in enumerate(zip(self.texts, self.labels)):
+            if not label & RETWEET:
+                if is_reasonable(label):
+                    ttr.append(t)
+                    ttrIds.append(i)
+        return ttrIds, InvertedIndex(ttr)
+
+    @artifact
+    def hypothetical_tweets(self):
+        '''(corpus positions, InvertedIndex) of the hypothetical tweets (nominee candidates)'''
+        ttr = []
+        ttrIds = []
+        for i, (t, label) in enumerate(zip(self.texts, self.labels)):
+            if label & HYPOTHETICAL:
+                ttr.append(t)
+                ttrIds.append(i)
+        return ttrIds, InvertedIndex(ttr)
+
+    # ---------- awards ----------
+    @artifact
+    def hashtag_parser(self):
+        '''HashtagParser with the hashtag counts of the corpus -- with counts, uncased mappings and linked hashtags
+        loaded from the state pre_ceremony saved (gg<year>.hashtags) while it is up to date, built otherwise'''
+        if has_hashtag_state(self.year):
+            try:
+                return HashtagParser.from_state(hashtag_state_path(self.year), year=self.year, n_workers=HASHTAG_N_WORKERS)
+            except ValueError as e:
+                print('Rebuilding the hashtag parser state:', e)
+        return HashtagParser(self.corpus, year=self.year, n_workers=HASHTAG_N_WORKERS)
+
+    @artifact
+    def award_names(self):
+        '''award names found in the tweets (hashtag co-occurrence)'''
+        return self.hashtag_parser.parse_award_names(self.corpus, verbose=False)
+
+    @artifact
+    def award_list(self):
+        '''AwardObj per official award, with keywords and tripwords (read-only: shared by the award jobs)'''
+        awardList = [AwardObj(name=a, keywords=awardNameToKeywords(a)) for a in OFFICIAL_AWARDS_1315]
+        for a in awardList:
+            a.tripwords = findTripwords(award=a, awardList=awardList)
+        return awardList
+
+    @artifact
+    def people_awards(self):
+        '''official awards that go to people. this info could go in a config file if we really needed to'''
+        return [ggAward for ggAward in self.award_list
+                if any([people_word in ggAward.keywords for people_word in PEOPLE_AWARD_WORDS])]
+
+    @artifact
+    def title_awards(self):
+        '''official awards that go to titles (films, series, songs)'''
+        return [ggAward for ggAward in self.award_list
+                if not any([people_word in ggAward.keywords for people_word in PEOPLE_AWARD_WORDS])]
+
+    @artifact
+    def title_award_winners(self):
+        '''title award name --> winner, from hashtag co-occurrence with the award names found'''
+        return self.hashtag_parser.get_title_award_to_winner(self.corpus, self.award_names,
+                                                             [ggAward.name for ggAward in self.title_awards],
+                                                             PEOPLE_AWARD_WORDS)
+
+    @artifact
+    @instrument('burst.announcements')
+    def announcement_bursts(self):
+        '''(BurstIndex over the corpus, {award name: announcement burst or None}): when each official award was
+        announced -- the strongest volume burst (see burst_index) of the win-indicating tweets about the award,
+        i.e. the tweets winners tallies for it'''
+        burstIndex = BurstIndex.for_year(self.year)
+        ttrIds, ttrIndex = self.reasonable_tweets
+        bursts = {}
+        for ggAward in self.award_list:
+            found = findWinningTweetIds(ttrIndex, ggAward.keywords, ggAward.tripwords)
+            if len(found) == 0:
+                found = findWinningTweetIds(ttrIndex, ggAward.keywords)
+            bursts[ggAward.name] = burstIndex.strongest_burst([ttrIds[i] for i in found])
+        return burstIndex, bursts
+
+    def announcement_windows(self, awardNames, tweetIds, padding):
+        '''award name --> boolean mask over tweetIds (corpus positions) of the tweets posted inside the award's
+        padded announcement window, or None (no restriction) if BURST_WINDOWS is off or no burst was found'''
+        if not BURST_WINDOWS:
+            return {name: None for name in awardNames}
+        burstIndex, bursts = self.announcement_bursts
+        windows = {}
+        for name in awardNames:
+            window = pad_window(bursts.get(name), padding)
+            windows[name] = None if window is None else burstIndex.in_window(tweetIds, window)
+        return windows
+
+    # ---------- presenters ----------
+    @artifact
+    def presenter_tweets(self):
+        '''(texts, corpus positions) of the tweets that mention presenting a "best ..." award'''
+        presMatcher = MultiPatternMatcher({'pres': PRESENTER_WORDS})
+        presTweets = []
+        presIds = []
+        for i, tweet in enumerate(self.texts):
+            tweet = tweet.replace('\n', ' ')
+            if presMatcher.any_in(tweet) and "best" in tweet.lower():
+                presTweets.append(tweet)
+                presIds.append(i)
+        return presTweets, presIds
+
+    @artifact
+    def presenter_entities(self):
+        '''(DuplicateClusters of the presenter tweets, {award name: window mask over them or None},
+        PERSON entities and noun chunks per distinct tweet) -- NER runs once per distinct tweet'''
+        presTweets, presIds = self.presenter_tweets
+        # optionally only count a tweet for an award if it was posted around the award's announcement
+        windows = self.announcement_windows(OFFICIAL_AWARDS_1315, presIds, BURST_WINDOW_PADDING['presenters'])
+        if BURST_WINDOWS and all(window is not None for window in windows.values()):
+            # ... and skip NER on tweets outside of every award's window
+            inAnyWindow = [any(window[i] for window in windows.values()) for i in range(len(presTweets))]
+            presTweets = [tweet for tweet, keep in zip(presTweets, inAnyWindow) if keep]
+            windows = {name: window[inAnyWindow] for name, window in windows.items()}
+
+        clusters = collapse_duplicates(presTweets, DEDUP_MODE)
+        return clusters, windows, find_persons_batch(clusters.representatives), find_noun_chunks_batch(clusters.representatives)
+
+    # ---------- answers ----------
+    @artifact
+    def hosts(self):
+        '''the two names mentioned most in reasonable tweets about hosting'''
+        tweet_labels = self.labels
+
+        hostTweets = []
+        namePattern = r"[A-Z][a-z]+ [A-Z][a-z]+"
+
+        #finding tweets that contain 'host'
+        for i, (tweet, label) in enumerate(tqdm(zip(self.texts, tweet_labels), desc='Searching for hosts in tweets', total=len(tweet_labels))):
+            if is_reasonable(label):
+                if 'host' in tweet.lower():
+                    hostTweets.append(tweet)
+
+        # the name regex runs once per distinct tweet, names are counted once per copy
+        namesDict = {}
+        for tweet, count in collapse_duplicates(hostTweets, DEDUP_MODE):
+            for name in re.findall(namePattern, tweet):
+                if name in namesDict.keys():
+                    namesDict[name] += count
+                else:
+                    namesDict[name] = count
+
+        counts = (sorted(namesDict.items(), key=lambda item: 1/item[1]))
+        hosts = []
+        hosts.append(counts[0][0].lower())
+        hosts.append(counts[1][0].lower())
+        return hosts
+
+    @artifact
+    def nominees(self):
+        '''official award name --> nominees'''
+        Nominees = {}
+        ttrIds, ttrIndex = self.hypothetical_tweets
+        peopleAwards, titleAwards = self.people_awards, self.title_awards
+        # optionally only look at tweets posted shortly before/around each award's announcement
+        windows = self.announcement_windows(OFFICIAL_AWARDS_1315, ttrIds, BURST_WINDOW_PADDING['nominees'])
+        # evaluate every award (people awards, then titles) -- independent jobs, possibly run concurrently
+        jobs = [partial(person_award_nominees, ggAward, ttrIndex, windows[ggAward.name]) for ggAward in peopleAwards] + \
+               [partial(title_award_nominees, ggAward, ttrIndex, windows[ggAward.name]) for ggAward in titleAwards]
+        for ggAward, nominees in zip(peopleAwards + titleAwards, run_award_jobs(jobs)):
+            Nominees[ggAward.name] = nominees
+        return Nominees
+
+    @artifact
+    def winners(self):
+        '''official award name --> winner'''
+        winners = {}
+        ttrIds, ttrIndex = self.reasonable_tweets
+        peopleAwards = self.people_awards
+        # optionally only look at tweets posted around each award's announcement
+        windows = self.announcement_windows([ggAward.name for ggAward in peopleAwards], ttrIds, BURST_WINDOW_PADDING['winner'])
+
+        # find winners of non-people-related awards (hashtag co-occurrence)
+        for canonical_name, found_winner in self.title_award_winners.items():
+            print("----------------------------------------------------------------")
+            print("Award name: ", canonical_name)
+            print("\tPredicted winner: ", found_winner)
+            winners[canonical_name] = found_winner
+
+        # find winners of people-related awards -- independent jobs, possibly run concurrently
+        jobs = [partial(person_award_winner, ggAward, ttrIndex, windows[ggAward.name]) for ggAward in peopleAwards]
+        for ggAward, winner in zip(peopleAwards, run_award_jobs(jobs)):
+            winners[ggAward.name] = winner
+        return winners
+
+    @artifact
+    def presenters(self):
+        '''official award name --> presenters'''
+        not_pres_keywords = ["win", "@", ]
+
+        presDict = {}
+
+        # own award objects: their keywords are edited below
+        awardList = []
+        for a in OFFICIAL_AWARDS_1315:
+            awardList.append(AwardObj(name=a, keywords=awardNameToKeywords(a)))
+
+        for ggAward in awardList:
+            presDict[ggAward] = {}
+            not_pres_keywords = not_pres_keywords + ggAward.keywords
+            try:
+                ggAward.keywords.remove("best")
+        #         print("removed best")
+            except:
+                continue
 
-    counts = (sorted(namesDict.items(), key=lambda item: 1/item[1]))
-    hosts = []
-    hosts.append(counts[0][0].lower())
-    hosts.append(counts[1][0].lower())
-    return hosts
+        notPresMatcher = MultiPatternMatcher({'not_pres': not_pres_keywords})
 
-def get_awards(year):
-    '''Awards is a list of strings. Do NOT change the name
-    of this function or what it returns.'''
+        # NER and noun chunking ran once per distinct tweet, its presenters are counted once per copy
+        clusters, windows, persons, noun_chunks_per_tweet = self.presenter_entities
+        windowCounts = {} # award name --> copies of each distinct tweet posted inside the award's window
+        for c, ((tweet, count), people, noun_chunks) in enumerate(zip(clusters, persons, noun_chunks_per_tweet)):
+            candPresenters = []
 
-    ### some hashtag parser setup
-    hp_data = load_tweet_text_from_json('gg' + str(year) + '.json')
-    hp = HashtagParser(hp_data, year=year)
-    award_names = hp.parse_award_names(hp_data, verbose=False)
-    return award_names
-   
-
-def get_nominees(year):
-    '''Nominees is a dictionary with the hard coded award
-    names as keys, and each entry a list of strings. Do NOT change
-    the name of this function or what it returns.'''
-    
-    tweet_list = tweet_cleaner(year)
+            people = [person for person in people if not notPresMatcher.any_in(person.lower())]
+            candPresenters = candPresenters + people
 
-    # AWARD NOMINEES:
-    Nominees = {}
+            noun_phrases = [noun_chunk.strip('"').strip("''").lower() for noun_chunk in noun_chunks if 'RT @' not in noun_chunk]
 
-    people_words_hardcode = ['actor', 'actress', 'director', 'cecil']
 
+            mostRelevantAward = awardList[0]
+            highestRelevancy = 0
+            for ggAward in awardList:
+                currentAwardRelevancy = 0
 
-    ############### KEEP THE HASHTAG SOLUTIONS FOR AWARDS THAT GO TO MOVIES, USE THIS FOR PEOPLE AWARDS
-    # create list of award objects
-    awardList = []
-    for a in OFFICIAL_AWARDS_1315:
-        # print(a)
-        # print(awardNameToKeywords(a))
-        awardList.append(AwardObj(name=a, keywords=awardNameToKeywords(a)))
 
-    # find tripwords!
-    for a in awardList:
-        a.tripwords = findTripwords(award=a, awardList=awardList)
+                for noun_phrase in noun_phrases:
+                    for word in noun_phrase.split(" "):
+                        if any(word in award for award in ggAward.keywords if len(word)>2):
+                            currentAwardRelevancy += 1
 
-    #filter to only awards that go to people. this info could go in a config file if we really needed to
-    peopleAwards = []
-    titleAwards = []
-    for ggAward in awardList:
-        if any([people_word in ggAward.keywords for people_word in people_words_hardcode]):
-            peopleAwards.append(ggAward)
-        else:
-            titleAwards.append(ggAward)
-
-
-    ttr = [] # pruned tweets by reasonability - i.e. not hypothetical and not historic
-    for t in tweet_list:
-        if isHypothetical(t.lower()):
-            ttr.append(t)
-    # find winner of every award
-    for ggAward in peopleAwards:
-        Nominees[ggAward.name] = []
-        print("----------------------------------------------------------------")
-        print("Award name: ", ggAward.name)
-        winningTweets = []
-        # iter over tweets and add tweets that could contain the answer to our question
-        for t in ttr:
-            if isNomTweet(t, ggAward.keywords, ggAward.tripwords):
-                winningTweets.append(t)
-        # in the case that we've been too restrictive, loosen constraints - no tripwords
-        if len(winningTweets) == 0:
-            print('no ideal tweets found, removing tripword requirement.')
-            for t in ttr:
-                if isNomTweet(t, ggAward.keywords):
-                    winningTweets.append(t)
-        
+                if currentAwardRelevancy > highestRelevancy or (currentAwardRelevancy == highestRelevancy and len(ggAward.keywords) < len(mostRelevantAward.keywords)):
+                    mostRelevantAward = ggAward
+                    highestRelevancy = currentAwardRelevancy
 
-        # print("number of potential nominee tweets found: ", len(winningTweets))
 
-        # candWinners is a dict of counts of co-occurance of each candidate for winning. in the end we return the most popular name from the tweets.
-        candWinners = {}
-        # set for hash table speed
-        namesSet = set(())
+            if windows[mostRelevantAward.name] is not None:
+                if mostRelevantAward.name not in windowCounts:
+                    windowCounts[mostRelevantAward.name] = clusters.masked_counts(windows[mostRelevantAward.name])
+                count = windowCounts[mostRelevantAward.name][c]
+                if count == 0:
+                    continue
+            if (highestRelevancy>0):
+        #             print("most relevant nomination for ", mostRelevantAward.name)
+                for candPresenter in candPresenters:
+                    try:
+                        presDict[mostRelevantAward][candPresenter] += count
+        #                     print("add " , presDict[mostRelevantAward])
+            #                     print("award for this tweet: ", mostRelevantAward.name)
+                    except:
+                        presDict[mostRelevantAward][candPresenter] = count
+        #                     print("create " , presDict[mostRelevantAward])
+            else:
+        #             print("no award from this tweet")
+                    continue
 
-        for t in winningTweets:
-            people = find_persons(t)
-            # print(t)
-            # print(films)
-            # print(people)
-            for p in people:
-                if '@' in p or 'RT' in p or 'golden' in p:
-                    people = people.remove(p)
-            if not people:
-                continue
-            # print(people)
-            # find counts
-            if people:
-                for p in people:
-                    if p in namesSet:
-                        candWinners[p] += 1
-                    else:
-                        candWinners[p] = 1
-                    namesSet.add(p)
-
-        # post processing - cleaning
-        toDelete = []
-        for name in candWinners.keys():
-            if '@' in name or 'golden' in name.lower() or '.' in name.lower():
-                # print("@ found")
-                toDelete.append(name)
-                continue
-            ns = name.lower().split()
-            # print("ns", ns)
-            nsl = 0
-            for i in ns:
-                # print(i, ' in ', ggAward.name, ' ? ')
-                # print(i in ggAward.name)
-                if i in ggAward.name:
-                    nsl += 1
-            if nsl == len(ns):
-                # print("mistaken award name for recipient")
-                toDelete.append(name)
-
-        for d in toDelete:
-            candWinners.pop(d)
-        
-        # sort by popularity then print winner
-
-        winnerCounts = (sorted(candWinners.items(), key=lambda item: 1/item[1]))
-        try:
-            print("predicted nominees: ")
-            iter = 0
-            for prediction in winnerCounts[:5]:
-                name = prediction[0]
-                if find_persons(name):
-                    print(name)
-                    Nominees[ggAward.name].append(name)
-                    iter += 1
-                if iter > 4:
+        # print(presDict)
+        final_presenters_dict = {}
+        for award, presenters in presDict.items():
+            if award not in final_presenters_dict:
+                final_presenters_dict[award.name] = []
+            # print("\n\n", award.name)
+
+            i = 0
+            presenters = dict(sorted(presenters.items(), key=lambda item: item[1], reverse=True))
+            for presenter in presenters:
+                if i > 3:
                     break
-        except:
-            print("no answer found")
-            Nominees[ggAward.name].append("no answer found")
-
-    # find winner of every award - TITLES
-    for ggAward in titleAwards:
-        print("----------------------------------------------------------------")
-        print("Award name: ", ggAward.name)
-        Nominees[ggAward.name] = []
-
-        winningTweets = []
-        # iter over tweets and add tweets that could contain the answer to our question
-        for t in ttr:
-            if isNomTweet(t, ggAward.keywords, ggAward.tripwords):
-                winningTweets.append(t)
-        # in the case that we've been too restrictive, loosen constraints - no tripwords
-        if len(winningTweets) == 0:
-            print('no ideal tweets found for award, removing tripword requirement.')
-            for t in ttr:
-                if isNomTweet(t, ggAward.keywords):
-                    winningTweets.append(t)
-        
-
-        # print("number of potential nominee tweets found: ", len(winningTweets))
+                # print(presenter, presDict[award][presenter])
+                if '.' not in presenter and ':' not in presenter:
+                    final_presenters_dict[award.name].append(presenter)
+                    i+=1
+        return final_presenters_dict
+
+# year --> CeremonyAnalysis shared by the get_* functions
+_analyses = {}
+
+def get_analysis(year, reload = False):
+    '''The shared CeremonyAnalysis of a year (created on first use; reload=True starts a new one)'''
+    year = str(year)
+    if reload or year not in _analyses:
+        _analyses[year] = CeremonyAnalysis(year)
+    return _analyses[year]
+
+@instrument('get_hosts')
+def get_hosts(year):
+    '''Hosts is a list of one or more strings. Do NOT change the name
+    of this function or what it returns.'''
+    return list(get_analysis(year).hosts)
 
-        # candWinners is a dict of counts of co-occurance of each candidate for winning. in the end we return the most popular name from the tweets.
-        candWinners = {}
-        # set for hash table speed
-        namesSet = set(())
+@instrument('get_awards')
+def get_awards(year):
+    '''Awards is a list of strings. Do NOT change the name
+    of this function or what it returns.'''
+    return list(get_analysis(year).award_names)
+   
 
-        for t in winningTweets:
-            films = find_films(t)
+def award_logger():
+    # collects the lines an award job prints, so that concurrently evaluated awards still print in a fixed order
+    lines = []
+    def log(*args):
+        lines.append(' '.join([str(arg) for arg in args]))
+    return lines, log
+
+# set in forked award worker processes (see init_award_worker)
+_in_award_worker = False
+
+def init_award_worker():
+    global _in_award_worker
+    _in_award_worker = True
+    # award jobs already run one per worker process -- no nested nlp.pipe worker pools
+    get_ner().n_process = 1
+    # the statistics inherited through fork are the parent's: record only the worker's own
+    recorder.reset()
+
+def run_award_job(job):
+    # (result, printed lines, instrumentation snapshot of the job -- None if it ran in this process)
+    result, lines = job()
+    if not _in_award_worker:
+        return result, lines, None
+    snapshot = recorder.snapshot()
+    recorder.reset()
+    return result, lines, snapshot
+
+def run_award_jobs(jobs):
+    '''Evaluates per-award jobs (functions returning (result, printed lines)), in forked worker
+    processes if AWARD_N_WORKERS > 1. Lines are printed and results returned in job order; the stage timings
+    and counters recorded by worker processes are merged into this process' instrumentation.'''
+    if AWARD_N_WORKERS > 1:
+        # load the model before forking, so that the workers share it instead of each loading its own
+        get_ner()
+    results = map_forked(lambda ix: run_award_job(jobs[ix]), len(jobs), AWARD_N_WORKERS, initializer=init_award_worker)
+    for _, lines, snapshot in results:
+        for line in lines:
+            print(line)
+        if snapshot is not None:
+            recorder.merge(snapshot)
+    return [result for result, _, _ in results]
+
+def get_announcement_bursts(year):
+    '''(BurstIndex over the corpus, {award name: announcement burst or None}) of the year, computed once'''
+    return get_analysis(year).announcement_bursts
+
+def announcement_windows(year, awardNames, tweetIds, padding):
+    '''award name --> boolean mask over tweetIds (corpus positions) of the tweets posted inside the award's
+    padded announcement window, or None (no restriction) if BURST_WINDOWS is off or no burst was found'''
+    return get_analysis(year).announcement_windows(awardNames, tweetIds, padding)
+
+@instrument('award.person_nominees')
+def person_award_nominees(ggAward, ttrIndex, allowed = None):
+    lines, log = award_logger()
+    nominees = []
+    log("----------------------------------------------------------------")
+    log("Award name: ", ggAward.name)
+    # look up tweets that could contain the answer to our question
+    winningTweets = findNomTweets(ttrIndex, ggAward.keywords, ggAward.tripwords, allowed)
+    # in the case that we've been too restrictive, loosen constraints - no tripwords
+    if len(winningTweets) == 0:
+        log('no ideal tweets found, removing tripword requirement.')
+        winningTweets = findNomTweets(ttrIndex, ggAward.keywords, allowed=allowed)
+
+
+    # print("number of potential nominee tweets found: ", len(winningTweets))
+
+    # candWinners is a dict of counts of co-occurance of each candidate for winning. in the end we return the most popular name from the tweets.
+    candWinners = {}
+    # set for hash table speed
+    namesSet = set(())
+
+    # NER runs once per distinct tweet, its names are counted once per copy
+    clusters = collapse_duplicates(winningTweets, DEDUP_MODE)
+    for (t, count), people in zip(clusters, find_persons_batch(clusters.representatives)):
+        # print(t)
+        # print(films)
+        # print(people)
+        for p in people:
+            if '@' in p or 'RT' in p or 'golden' in p:
+                people = people.remove(p)
+        if not people:
+            continue
+        # print(people)
+        # find counts
+        if people:
+            for p in people:
+                if p in namesSet:
+                    candWinners[p] += count
+                else:
+                    candWinners[p] = count
+                namesSet.add(p)
 
-            for f in films:
-                if '@' in f or 'RT' in f or 'golden' in f.lower():
-                    films = films.remove(f)
-            if not films:
-                continue
-            if films:
-                for f in films:
-                    if f in namesSet:
-                        candWinners[f] += 1
-                    else:
-                        candWinners[f] = 1
-                    namesSet.add(f)
-
-        # post processing - cleaning
-        toDelete = []
-        for name in candWinners.keys():
-            if '@' in name or 'golden' in name.lower() or '.' in name:
-                # print("@ found")
-                toDelete.append(name)
-                continue
-            ns = name.lower().split()
-            # print("ns", ns)
-            nsl = 0
-            for i in ns:
-                # print(i, ' in ', ggAward.name, ' ? ')
-                # print(i in ggAward.name)
-                if i in ggAward.name:
-                    nsl += 1
-            if nsl > 1:
-                # print("mistaken award name for recipient")
-                toDelete.append(name)
-
-        for d in toDelete:
-            candWinners.pop(d)
-        
-        # sort by popularity then print winner
-        winnerCounts = (sorted(candWinners.items(), key=lambda item: 1/item[1]))
-        try:
-            print("predicted nominees: ")
-            iter = 0
-            for prediction in winnerCounts[:5]:
-                name = prediction[0]
-                print(name)
-                Nominees[ggAward.name].append(name)
+    # post processing - cleaning
+    toDelete = []
+    for name in candWinners.keys():
+        if '@' in name or 'golden' in name.lower() or '.' in name.lower():
+            # print("@ found")
+            toDelete.append(name)
+            continue
+        ns = name.lower().split()
+        # print("ns", ns)
+        nsl = 0
+        for i in ns:
+            # print(i, ' in ', ggAward.name, ' ? ')
+            # print(i in ggAward.name)
+            if i in ggAward.name:
+                nsl += 1
+        if nsl == len(ns):
+            # print("mistaken award name for recipient")
+            toDelete.append(name)
+
+    for d in toDelete:
+        candWinners.pop(d)
+
+    # sort by popularity then print winner
+
+    winnerCounts = (sorted(candWinners.items(), key=lambda item: 1/item[1]))
+    try:
+        log("predicted nominees: ")
+        iter = 0
+        top_predictions = winnerCounts[:5]
+        for prediction, prediction_persons in zip(top_predictions, find_persons_batch([p[0] for p in top_predictions])):
+            name = prediction[0]
+            if prediction_persons:
+                log(name)
+                nominees.append(name)
                 iter += 1
-                if iter > 4:
-                    break
-        except:
-            print("no answer found")
-            Nominees[ggAward.name].append(name)
-
-
-    return Nominees
+            if iter > 4:
+                break
+    except:
+        log("no answer found")
+        nominees.append("no answer found")
+    return nominees, lines
+
+@instrument('award.title_nominees')
+def title_award_nominees(ggAward, ttrIndex, allowed = None):
+    lines, log = award_logger()
+    log("----------------------------------------------------------------")
+    log("Award name: ", ggAward.name)
+    nominees = []
+
+    # look up tweets that could contain the answer to our question
+    winningTweets = findNomTweets(ttrIndex, ggAward.keywords, ggAward.tripwords, allowed)
+    # in the case that we've been too restrictive, loosen constraints - no tripwords
+    if len(winningTweets) == 0:
+        log('no ideal tweets found for award, removing tripword requirement.')
+        winningTweets = findNomTweets(ttrIndex, ggAward.keywords, allowed=allowed)
+
+
+    # print("number of potential nominee tweets found: ", len(winningTweets))
+
+    # candWinners is a dict of counts of co-occurance of each candidate for winning. in the end we return the most popular name from the tweets.
+    candWinners = {}
+    # set for hash table speed
+    namesSet = set(())
+
+    # NER runs once per distinct tweet, its titles are counted once per copy
+    clusters = collapse_duplicates(winningTweets, DEDUP_MODE)
+    for (t, count), films in zip(clusters, find_films_batch(clusters.representatives)):
+
+        for f in films:
+            if '@' in f or 'RT' in f or 'golden' in f.lower():
+                films = films.remove(f)
+        if not films:
+            continue
+        if films:
+            for f in films:
+                if f in namesSet:
+                    candWinners[f] += count
+                else:
+                    candWinners[f] = count
+                namesSet.add(f)
+
+    # post processing - cleaning
+    toDelete = []
+    for name in candWinners.keys():
+        if '@' in name or 'golden' in name.lower() or '.' in name:
+            # print("@ found")
+            toDelete.append(name)
+            continue
+        ns = name.lower().split()
+        # print("ns", ns)
+        nsl = 0
+        for i in ns:
+            # print(i, ' in ', ggAward.name, ' ? ')
+            # print(i in ggAward.name)
+            if i in ggAward.name:
+                nsl += 1
+        if nsl > 1:
+            # print("mistaken award name for recipient")
+            toDelete.append(name)
+
+    for d in toDelete:
+        candWinners.pop(d)
+
+    # sort by popularity then print winner
+    winnerCounts = (sorted(candWinners.items(), key=lambda item: 1/item[1]))
+    try:
+        log("predicted nominees: ")
+        iter = 0
+        for prediction in winnerCounts[:5]:
+            name = prediction[0]
+            log(name)
+            nominees.append(name)
+            iter += 1
+            if iter > 4:
+                break
+    except:
+        log("no answer found")
+        nominees.append(name)
+    return nominees, lines
+
+def tallyWinnerCandidates(candWinners, people, weight = 1):
+    '''Adds the PERSON entities of one winning tweet (seen <weight> times) to the candidate counts (shared by get_winner and live.py)'''
+    for p in people:
+        if '@' in p or 'RT' in p or 'golden' in p:
+            people = people.remove(p)
+    if not people:
+        return
+    for p in people:
+        if p in candWinners:
+            candWinners[p] += weight
+        else:
+            candWinners[p] = weight
+
+def rankWinnerCandidates(candWinners, awardName):
+    '''Cleans up the candidate counts of an award and sorts them by popularity (shared by get_winner and live.py)'''
+    # post processing - cleaning
+    toDelete = []
+    for name in candWinners.keys():
+        if '@' in name or 'golden' in name.lower():
+            toDelete.append(name)
+            continue
+        ns = name.lower().split()
+        # print("ns", ns)
+        nsl = 0
+        for i in ns:
+            if i in awardName:
+                nsl += 1
+        if nsl == len(ns):
+            toDelete.append(name)
+
+    return sorted([item for item in candWinners.items() if item[0] not in toDelete], key=lambda item: 1/item[1])
+
+@instrument('award.person_winner')
+def person_award_winner(ggAward, ttrIndex, allowed = None):
+    lines, log = award_logger()
+    log("----------------------------------------------------------------")
+    log("Award name: ", ggAward.name)
+
+
+    # print(ggAward.name)
+    # look up tweets that could contain the answer to our question
+    winningTweets = findWinningTweets(ttrIndex, ggAward.keywords, ggAward.tripwords, allowed)
+    # in the case that we've been too restrictive, loosen constraints - no tripwords
+    if len(winningTweets) == 0:
+        log('no ideal tweets found, removing tripword requirement')
+        winningTweets = findWinningTweets(ttrIndex, ggAward.keywords, allowed=allowed)
+
+
+    # print("number of relevant winning tweets found: ", len(winningTweets))
+
+    # candWinners is a dict of counts of co-occurance of each candidate for winning. in the end we return the most popular name from the tweets.
+    candWinners = {}
+    # NER runs once per distinct tweet, its names are counted once per copy
+    clusters = collapse_duplicates(winningTweets, DEDUP_MODE)
+    for (t, count), people in zip(clusters, find_persons_batch(clusters.representatives)):
+        tallyWinnerCandidates(candWinners, people, count)
+
+    # sort by popularity then print winner
+    winnerCounts = rankWinnerCandidates(candWinners, ggAward.name)
+    try:
+        log("predicted winner: ", winnerCounts[0][0])
+        winner = winnerCounts[0][0]
+    except:
+        log("no answer found")
+        winner = "we don't know"
+    return winner, lines
+
+@instrument('get_nominees')
+def get_nominees(year):
+    '''Nominees is a dictionary with the hard coded award
+    names as keys, and each entry a list of strings. Do NOT change
+    the name of this function or what it returns.'''
+    return {award: list(nominees) for award, nominees in get_analysis(year).nominees.items()}
 
+@instrument('get_winner')
 def get_winner(year):
     '''Winners is a dictionary with the hard coded award
     names as keys, and each entry containing a single string.
     Do NOT change the name of this function or what it returns.'''
-    
-    tweet_list = tweet_cleaner(year)
-    people_words_hardcode = ['actor', 'actress', 'director', 'cecil']
-    winners = {}
-
-    hp_data = load_tweet_text_from_json('gg' + str(year) + '.json')
-    hp = HashtagParser(hp_data, year=year)
-    award_names = hp.parse_award_names(hp_data, verbose=False)
-
-    ############### KEEP THE HASHTAG SOLUTIONS FOR AWARDS THAT GO TO MOVIES, USE THIS FOR PEOPLE AWARDS
-    # create list of award objects
-    awardList = []
-    for a in OFFICIAL_AWARDS_1315:
-        # print(a)
-        # print(awardNameToKeywords(a))
-        awardList.append(AwardObj(name=a, keywords=awardNameToKeywords(a)))
-
-    # find tripwords!
-    for a in awardList:
-        a.tripwords = findTripwords(award=a, awardList=awardList)
-
-    #filter to only awards that go to people. this info could go in a config file if we really needed to
-    peopleAwards = []
-    titleAwards = []
-    for ggAward in awardList:
-        if any([people_word in ggAward.keywords for people_word in people_words_hardcode]):
-            peopleAwards.append(ggAward)
-        else:
-            titleAwards.append(ggAward.name)
-
-    ttr = [] # pruned tweets by reasonability - i.e. not hypothetical and not historic
-    for t in tweet_list:
-        if 'RT' not in t:
-            if isReasonable(t):
-                ttr.append(t)
-
-    award_names = get_awards(year)
-    # find winners of non-people-related awards (hashtag co-occurrence)
-    title_award_winners = hp.get_title_award_to_winner(hp_data, award_names, titleAwards, people_words_hardcode)
-    for canonical_name, found_winner in title_award_winners.items():
-        print("----------------------------------------------------------------")
-        print("Award name: ", canonical_name)
-        print("\tPredicted winner: ", found_winner)
-        winners[canonical_name] = found_winner
-
-    # find winners of people-related awards
-    for ggAward in peopleAwards:
-        print("----------------------------------------------------------------")
-        print("Award name: ", ggAward.name)
-
-
-        # print(ggAward.name)
-        winningTweets = []
-        # iter over tweets and add tweets that could contain the answer to our question
-        for t in ttr:
-            if isWinningTweet(t, ggAward.keywords, ggAward.tripwords):
-                winningTweets.append(t)
-        # in the case that we've been too restrictive, loosen constraints - no tripwords
-        if len(winningTweets) == 0:
-            print('no ideal tweets found, removing tripword requirement')
-            for t in ttr:
-                if isWinningTweet(t, ggAward.keywords):
-                    winningTweets.append(t)
-        
-
-        # print("number of relevant winning tweets found: ", len(winningTweets))
-
-        # candWinners is a dict of counts of co-occurance of each candidate for winning. in the end we return the most popular name from the tweets.
-        candWinners = {}
-        # set for hash table speed
-        namesSet = set(())
-
-        for t in winningTweets:
-            people = find_persons(t)
-            for p in people:
-                if '@' in p or 'RT' in p or 'golden' in p:
-                    people = people.remove(p)
-            if not people:
-                continue
-            for p in people:
-                if p in namesSet:
-                    candWinners[p] += 1
-                else:
-                    candWinners[p] = 1
-                namesSet.add(p)
-
-        # post processing - cleaning
-        toDelete = []
-        for name in candWinners.keys():
-            if '@' in name or 'golden' in name.lower():
-                toDelete.append(name)
-                continue
-            ns = name.lower().split()
-            # print("ns", ns)
-            nsl = 0
-            for i in ns:
-                if i in ggAward.name:
-                    nsl += 1
-            if nsl == len(ns):
-                toDelete.append(name)
-
-        for d in toDelete:
-            candWinners.pop(d)
-        
-        # sort by popularity then print winner
-        winnerCounts = (sorted(candWinners.items(), key=lambda item: 1/item[1]))
-        try:
-            print("predicted winner: ", winnerCounts[0][0])
-            winners[ggAward.name] = winnerCounts[0][0]
-        except:
-            print("no answer found")
-            winners[ggAward.name] = "we don't know"
-    
-    return winners
+    return dict(get_analysis(year).winners)
 
+@instrument('get_presenters')
 def get_presenters(year):
     '''Presenters is a dictionary with the hard coded award
     names as keys, and each entry a list of strings. Do NOT change the
     name of this function or what it returns.'''
-    pres_keywords = ["present", "announces", "announcing", "announced"]
-    not_pres_keywords = ["win", "@", ]
-
-    presDict = {}
-
-    awardList = []
-    for a in OFFICIAL_AWARDS_1315:
-        # print(a)
-        # print(awardNameToKeywords(a))
-        awardList.append(AwardObj(name=a, keywords=awardNameToKeywords(a)))
-
-    for ggAward in awardList:
-        presDict[ggAward] = {}
-        not_pres_keywords = not_pres_keywords + ggAward.keywords
-        try:
-            ggAward.keywords.remove("best")
-    #         print("removed best")
-        except:
-            continue
-              
-    for tweet in tweet_cleaner(year):
-        candPresenters = []
-        tweet = tweet.replace('\n', ' ')
-        
-        if any(keyword in tweet for keyword in pres_keywords) and "best" in tweet.lower():
-            people = find_persons(tweet)
-            people = [person for person in people if not any(keyword in person.lower() for keyword in not_pres_keywords)]
-            candPresenters = candPresenters + people
-            
-            doc = nlp(tweet)
-            noun_phrases = [noun_chunk.text.strip('"').strip("''").lower() for noun_chunk in doc.noun_chunks if 'RT @' not in noun_chunk.text]
-            
-            
-            mostRelevantAward = awardList[0]
-            highestRelevancy = 0
-            for ggAward in awardList:
-                currentAwardRelevancy = 0
-                
-                
-                for noun_phrase in noun_phrases:
-                    for word in noun_phrase.split(" "):
-                        if any(word in award for award in ggAward.keywords if len(word)>2):
-                            currentAwardRelevancy += 1
-                            
-                if currentAwardRelevancy > highestRelevancy or (currentAwardRelevancy == highestRelevancy and len(ggAward.keywords) < len(mostRelevantAward.keywords)):
-                    mostRelevantAward = ggAward
-                    highestRelevancy = currentAwardRelevancy
-                    
-                
-            if (highestRelevancy>0):
-    #             print("most relevant nomination for ", mostRelevantAward.name)
-                for candPresenter in candPresenters:
-                    try:
-                        presDict[mostRelevantAward][candPresenter] += 1
-    #                     print("add " , presDict[mostRelevantAward])
-        #                     print("award for this tweet: ", mostRelevantAward.name)
-                    except:
-                        presDict[mostRelevantAward][candPresenter] = 1
-    #                     print("create " , presDict[mostRelevantAward])
-            else:
-    #             print("no award from this tweet")
-                    continue
-
-    # print(presDict)
-    final_presenters_dict = {}
-    for award, presenters in presDict.items():
-        if award not in final_presenters_dict:
-            final_presenters_dict[award.name] = []
-        # print("\n\n", award.name)
-        
-        i = 0
-        presenters = dict(sorted(presenters.items(), key=lambda item: item[1], reverse=True))
-        for presenter in presenters:
-            if i > 3:
-                break
-            # print(presenter, presDict[award][presenter])
-            if '.' not in presenter and ':' not in presenter:
-                final_presenters_dict[award.name].append(presenter)
-                i+=1
-    return final_presenters_dict
+    return {award: list(presenters) for award, presenters in get_analysis(year).presenters.items()}
 
+@instrument('pre_ceremony')
 def pre_ceremony():
     '''This function loads/fetches/processes any data your program
     will use, and stores that data in your DB or in a json, csv, or
     plain text file. It is the first thing the TA will run when grading.
     Do NOT change the name of this function or what it returns.'''
-    # Your code here
+    # convert every available JSON dump into a memory-mapped binary corpus (gg<year>.corpus)
+    #   - later runs open it in milliseconds and never re-parse JSON (see corpus.get_corpus)
+    # and save the hashtag parser state built from it (gg<year>.hashtags)
+    #   - counting, casing and linking the hashtags is skipped by later runs (see CeremonyAnalysis.hashtag_parser)
+    for year in CEREMONY_YEARS:
+        if os.path.exists(corpus_path(year)):
+            write_binary_corpus(year)
+            # labels and analyses computed on the old corpus are stale now
+            clear_label_cache(year)
+            _analyses.pop(str(year), None)
+            hp = HashtagParser(get_corpus(year, reload=True), year=year, n_workers=HASHTAG_N_WORKERS)
+            hp.get_candidate_hashtags()
+            hp.save_state(hashtag_state_path(year))
     print("Pre-ceremony processing complete.")
     return
 
+@instrument('get_extras')
 def get_extras(year):
 
     tweet_list = tweet_cleaner(year)
@@ -639,20 +988,27 @@ def get_extras(year):
     funny_jokes = []
     namePattern = r"[A-Z][a-z]+ [A-Z][a-z]+"
 
+    worse_dressed_hints = ['ugly', 'bad', 'awful', 'horrible', 'hate', 'gross', 'worse']
+    best_dressed_hints = ['gorgeous', 'stunning', 'beautiful', 'handsome', 'pretty']
+    best_jokes_hints = ['funny', 'joke', 'haha', 'funniest', 'hillarious']
+    hint_matcher = MultiPatternMatcher({'best_dressed': best_dressed_hints, 'worse_dressed': worse_dressed_hints,
+                                        'best_jokes': best_jokes_hints})
+
     #finding tweets that contain 'host'
     for i, tweet in enumerate(tqdm(tweet_list, desc='Searching for best/worse dressed and funniest jokes')):
         tweet_lower = tweet.lower()
-        worse_dressed_hints = ['ugly', 'bad', 'awful', 'horrible', 'hate', 'gross', 'worse']
-        best_dressed_hints = ['gorgeous', 'stunning', 'beautiful', 'handsome', 'pretty']
-        best_jokes_hints = ['funny', 'joke', 'haha', 'funniest', 'hillarious']
+        hints_found = hint_matcher.phrases_in(tweet_lower)
+        if not hints_found:
+            continue
+        # one entry per hint found, as before
         for hint in best_dressed_hints:
-            if hint in tweet_lower:
+            if hint in hints_found:
                 best_dressed.append(re.findall(namePattern, tweet))
         for hint in worse_dressed_hints:
-            if hint in tweet_lower:
+            if hint in hints_found:
                 worse_dressed.append(re.findall(namePattern, tweet))
         for hint in best_jokes_hints:
-            if hint in tweet_lower:
+            if hint in hints_found:
                 funny_jokes.append(re.findall(namePattern, tweet))
 
 
@@ -700,15 +1056,10 @@ def main():
     run when grading. Do NOT change the name of this function or
     what it returns.'''
     year = 2013 # <------- Change to another year. 
-    tweet_list = tweet_cleaner(year)
-
-    people_words_hardcode = ['actor', 'actress', 'director', 'cecil']
+    # every get_* call below shares this year's analysis: the corpus, labels, hashtag parser, award names
+    # and NER results are computed once
+    get_analysis(year)
 
-    print("\n**************************** presenters ****************************")
-    presenters = get_presenters(year)
-    for award, presenters in presenters.items():
-        print(award, " PRESENTERS: ", presenters)
-    
     print("\n**************************** hosts ****************************")
     hosts = get_hosts(year)
     print("         ", hosts[0], "\n         ", hosts[1])
@@ -754,6 +1105,9 @@ def main():
 
     with open('gg' + str(year) + 'answers.json', 'w') as f: 
         json.dump(answers_dict, f, indent=2)
+
+    if _ner is not None and _ner.cache is not None:
+        print('NER cache:', _ner.cache.stats())
         
     return
 
@@ -0,0 +1,157 @@
+from typing import Callable, Dict, List, Set
+from Levenshtein import distance
+
+
+class BKTree(object):
+    def __init__(self, distance_fn: Callable[[str, str], int] = distance):
+        """
+        Burkhard-Keller tree: metric index answering "all strings within edit distance d of a query".
+            - every child edge is labeled with its distance to the parent node
+            - by the triangle inequality, a query at distance k from a node only needs the
+              children with edge labels in [k - d, k + d]
+        :param distance_fn: metric on strings (Levenshtein distance by default)
+        """
+        self.distance_fn = distance_fn
+        # node: [string, {edge distance: child node}]
+        self.root = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, string: str) -> None:
+        if self.root is None:
+            self.root = [string, {}]
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            d = self.distance_fn(string, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [string, {}]
+                self.size += 1
+                return
+            node = child
+
+    def query(self, string: str, max_distance: int) -> List[str]:
+        """
+        :param string: query string
+        :param max_distance: inclusive edit distance bound
+        :return: all stored strings s with distance_fn(string, s) <= max_distance
+        """
+        return self._search(string, max_distance, first_only=False)
+
+    def any_within(self, string: str, max_distance: int) -> bool:
+        return len(self._search(string, max_distance, first_only=True)) > 0
+
+    def _search(self, string: str, max_distance: int, first_only: bool) -> List[str]:
+        found = []
+        if self.root is None:
+            return found
+        stack = [self.root]
+        while stack:
+            node_string, children = stack.pop()
+            d = self.distance_fn(string, node_string)
+            if d <= max_distance:
+                found.append(node_string)
+                if first_only:
+                    return found
+            for edge, child in children.items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        return found
+
+
+def substrings(string: str) -> Set[str]:
+    # all distinct non-empty substrings (hashtags are short, so O(len^2) is fine)
+    return {string[i:j] for i in range(len(string)) for j in range(i + 1, len(string) + 1)}
+
+
+class SubstringIndex(object):
+    def __init__(self, n: int = 3):
+        """
+        n-gram index over a growing set of strings, answering substring/superstring queries
+            - containing(query): stored strings that contain the query -- candidates come from
+              intersecting the n-gram postings of the query, then get verified
+            - contained_in(query): stored strings that are substrings of the query -- every
+              substring of the query is looked up directly
+        :param n: n-gram length
+        """
+        self.n = n
+        self.strings: Set[str] = set()
+        self.ngram_postings: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __contains__(self, string: str) -> bool:
+        return string in self.strings
+
+    def add(self, string: str) -> None:
+        if string in self.strings:
+            return
+        self.strings.add(string)
+        for i in range(len(string) - self.n + 1):
+            self.ngram_postings.setdefault(string[i:i + self.n], set()).add(string)
+
+    def _candidates(self, query: str) -> Set[str]:
+        # strings sharing every n-gram of the query (or all strings, if the query is shorter than n)
+        if len(query) < self.n:
+            return self.strings
+        ngrams = sorted({query[i:i + self.n] for i in range(len(query) - self.n + 1)},
+                        key=lambda ngram: len(self.ngram_postings.get(ngram, ())))
+        candidates = set(self.ngram_postings.get(ngrams[0], ()))
+        for ngram in ngrams[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(self.ngram_postings.get(ngram, ()))
+        return candidates
+
+    def containing(self, query: str) -> List[str]:
+        return [string for string in self._candidates(query) if query in string]
+
+    def containing_all(self, queries: List[str]) -> List[str]:
+        """
+        :param queries: substrings that must all occur
+        :return: stored strings containing every query string
+        """
+        long_queries = [query for query in queries if len(query) >= self.n]
+        if long_queries:
+            candidates = set(self._candidates(long_queries[0]))
+            for query in long_queries[1:]:
+                candidates.intersection_update(self._candidates(query))
+        else:
+            candidates = self.strings
+        return [string for string in candidates if all([query in string for query in queries])]
+
+    def contained_in(self, query: str) -> List[str]:
+        return [string for string in substrings(query) if string in self.strings]
+
+
+class ChunkSetIndex(object):
+    def __init__(self):
+        """
+        Index over keys that each carry a list of word chunks, answering
+        "which keys have *all* of their chunks occurring as substrings of a query string"
+        """
+        self.chunk_to_keys: Dict[str, Set[str]] = {}
+        self.n_chunks: Dict[str, int] = {}
+
+    def add(self, key: str, chunks: List[str]) -> None:
+        # the empty string is a substring of everything, so it never constrains a key
+        unique_chunks = set(chunk for chunk in chunks if len(chunk))
+        self.n_chunks[key] = len(unique_chunks)
+        for chunk in unique_chunks:
+            self.chunk_to_keys.setdefault(chunk, set()).add(key)
+
+    def fully_contained_in(self, query: str) -> List[str]:
+        hits = {}
+        for string in substrings(query):
+            for key in self.chunk_to_keys.get(string, ()):
+                hits[key] = hits.get(key, 0) + 1
+        # keys without chunks trivially qualify
+        return [key for key, n in self.n_chunks.items() if n == 0] + \
+               [key for key, n in hits.items() if n == self.n_chunks[key]]
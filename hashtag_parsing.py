@@ -1,13 +1,42 @@
+import os
 import re
 import json
+import pickle
+import struct
+import hashlib
 from collections import Counter
-from Levenshtein import distance
-from typing import List, Dict
+from typing import Dict, Iterable, List, Tuple
 from tqdm import tqdm
 
 from string_utils import parse_hashtags_from_tweet, parse_PascalCase_to_representations
 from string_utils import is_ascii, clean_tweet, is_award_hashtag, tweet_to_alphanumeric
-from string_utils import clean_award_regex, split_award_regex
+from string_utils import clean_award_regex, split_award_regex, MultiPatternMatcher
+from loading_utils import iter_tweet_text, known_length
+from hashtag_index import BKTree, SubstringIndex, ChunkSetIndex
+from hashtag_vocab import HashtagVocabulary
+from utterance_index import UtteranceIndex
+from parallel import map_shards
+from instrumentation import instrument
+from corpus import corpus_path, binary_corpus_path
+
+# saved HashtagParser state (see HashtagParser.save_state):
+#   header: magic, version, SHA-256 of the parser + award word configs it was built with
+#   payload: pickle of plain data (hashtags as NUL-separated UTF-8, counts / parent links as little-endian arrays)
+HASHTAG_STATE_MAGIC = b'GGHASHTG'
+HASHTAG_STATE_VERSION = 1
+HASHTAG_STATE_HEADER = struct.Struct('=8sI32s')
+
+
+def hashtag_state_path(year) -> str:
+    return 'gg' + str(year) + '.hashtags'
+
+
+def has_hashtag_state(year) -> bool:
+    # a saved state is only used while it is at least as recent as the corpus it was built from
+    if not os.path.exists(hashtag_state_path(year)):
+        return False
+    built = os.path.getmtime(hashtag_state_path(year))
+    return all(built >= os.path.getmtime(fp) for fp in [corpus_path(year), binary_corpus_path(year)] if os.path.exists(fp))
 
 
 class HashtagLogger(object):
@@ -27,6 +56,8 @@ class HashtagLogger(object):
         self.stopword_hashtags = []
         self.stopword_chunks = []
         self.stopword_abbreviations = []
+        # edit distance index over stopword hashtags
+        self.stopword_index = BKTree()
 
         # general hashtags and award hashtags: Dicts of:
         #   str: lowercase hashtag --> {
@@ -37,13 +68,21 @@ class HashtagLogger(object):
         self.general_hashtags = {}
         self.award_hashtags = {}
 
-        # hashtag to parent -- dict that links "children" hashtags to parent hashtags
+        # hashtag to parent -- links "children" hashtags to parent hashtags
         #   e.g. #Selma50 --> #Selma; #Selma --> #Selma
-        self.hashtag_to_parent = {}
-        self.all_hashtags = []
+        #   (read-only dict view over the integer parent array of self.vocab -- written through set_parent)
+        self.vocab = HashtagVocabulary()
+        self.hashtag_to_parent = self.vocab.parent_view()
+        self.all_hashtags = self.hashtag_to_parent
+        # edit distance + substring indexes over the keys of hashtag_to_parent -- maintained by set_parent
+        self.linked_index = BKTree()
+        self.linked_substrings = SubstringIndex()
+        # index over the word chunks ('split') of general hashtags
+        self.general_chunks = ChunkSetIndex()
 
     def add_stopword_hashtag(self, hashtag, abbreviations, chunks):
         self.stopword_hashtags.append(hashtag)
+        self.stopword_index.add(hashtag)
         self.stopword_abbreviations.extend(abbreviations)
         self.stopword_chunks.extend(chunks)
 
@@ -58,7 +97,22 @@ class HashtagLogger(object):
             self.general_hashtags[hashtag] = {
                 'frequency': frequency, 'children': [], 'abbreviations': abbreviations, 'split': chunks
             }
-            self.hashtag_to_parent[hashtag] = hashtag
+            self.general_chunks.add(hashtag, chunks)
+            self.set_parent(hashtag, hashtag)
+
+    def set_parent(self, hashtag, parent):
+        # single entry point for hashtag_to_parent updates, so that the linked hashtag index stays in sync
+        if self.vocab.set_parent(hashtag, parent):
+            self.linked_index.add(hashtag)
+            self.linked_substrings.add(hashtag)
+
+    def is_stopword_related(self, hashtag):
+        """
+        True if the hashtag is a substring of a stopword hashtag or within edit distance 2 of one
+        """
+        if any([hashtag in stopword for stopword in self.stopword_hashtags]):
+            return True
+        return self.stopword_index.any_within(hashtag, 2)
 
     def get_edit_distance_rule(self, hashtag):
         """
@@ -81,17 +135,18 @@ class HashtagLogger(object):
         :param parent:
         :return:
         """
-        self.hashtag_to_parent[hashtag] = parent
+        self.set_parent(hashtag, parent)
         self.general_hashtags[parent]['children'].append(hashtag)
         self.general_hashtags[parent]['frequency'] += frequency
         for abbr in abbreviations:
             if abbr not in self.general_hashtags[parent]['abbreviations']:
                 self.general_hashtags[parent]['abbreviations'].append(abbr)
 
+    @instrument('hashtags.linking')
     def attempt_hashtag_linking(self, hashtag, frequency, abbreviations, chunks):
         # ignore if hashtag has small edit distance to another (dependent on hashtag length)
         edit_distance = self.get_edit_distance_rule(hashtag)
-        close_tags = list(set([p for t, p in self.hashtag_to_parent.items() if distance(hashtag, t) <= edit_distance]))
+        close_tags = list(set([self.hashtag_to_parent[t] for t in self.linked_index.query(hashtag, edit_distance)]))
         close_filtered = []
         for p in close_tags:
             if any([abbr in self.general_hashtags[p]['abbreviations'] for abbr in abbreviations]):
@@ -115,7 +170,7 @@ class HashtagLogger(object):
                         self.general_hashtags[parent]['children'].extend(p_children)
                         self.general_hashtags[parent]['frequency'] += self.general_hashtags[p]['frequency']
                         for c in p_children:
-                            self.hashtag_to_parent[c] = parent
+                            self.set_parent(c, parent)
             else:
                 parent = self.hashtag_to_parent[close_tags[0]]
                 self.add_child_to_parent(hashtag, frequency, abbreviations, parent)
@@ -124,8 +179,8 @@ class HashtagLogger(object):
         # check if a hashtag is a ***subset*** of more popular hashtags
         #   - ignore if other hashtags are significantly more popular
         #   - (very helpful for names of actors/actresses -- #GeorgeClooney vs. #George)
-        superset_hashtags = [p for t, p in self.hashtag_to_parent.items() if all([chunk in t for chunk in chunks])]
-        superset_hashtags = list(set(superset_hashtags + [p for t, p in self.hashtag_to_parent.items() if hashtag in t]))
+        superset_hashtags = [self.hashtag_to_parent[t] for t in self.linked_substrings.containing_all(chunks)]
+        superset_hashtags = list(set(superset_hashtags + [self.hashtag_to_parent[t] for t in self.linked_substrings.containing(hashtag)]))
         if len(superset_hashtags):
             if len(superset_hashtags) == 1:
                 parent = superset_hashtags[0]
@@ -137,8 +192,8 @@ class HashtagLogger(object):
 
         # check if a hashtag is a ***superset*** of a more popular hashtag
         #   - #SelmaMovie --> #Selma
-        subset_hashtags = [t for t, v in self.general_hashtags.items() if all([chunk in hashtag for chunk in v['split']])]
-        subset_hashtags = list(set(subset_hashtags + [p for t, p in self.hashtag_to_parent.items() if t in hashtag]))
+        subset_hashtags = [t for t in self.general_chunks.fully_contained_in(hashtag) if t in self.general_hashtags]
+        subset_hashtags = list(set(subset_hashtags + [self.hashtag_to_parent[t] for t in self.linked_substrings.contained_in(hashtag)]))
         if len(subset_hashtags):
             if len(subset_hashtags) == 1:
                 # if the hashtag is a subset of only one hashtag, then group them together
@@ -177,7 +232,7 @@ class HashtagLogger(object):
         TODO: write out a better docstring
         :return:
         """
-        all_parent_hashtags = list(set(self.hashtag_to_parent.values()))
+        all_parent_hashtags = set(self.hashtag_to_parent.values())
         del_hashtags = []
         for candidate_hashtag in self.general_hashtags:
             if candidate_hashtag not in all_parent_hashtags:
@@ -186,23 +241,128 @@ class HashtagLogger(object):
         for hashtag in del_hashtags:
             del self.general_hashtags[hashtag]
 
-        self.all_hashtags = list(set(self.hashtag_to_parent.keys()))
+        # every linked hashtag (O(1) membership via the vocabulary)
+        self.all_hashtags = self.hashtag_to_parent
 
+    def get_state(self) -> Dict:
+        """
+        :return: the hashtag tables and links as plain data (see HashtagParser.save_state);
+            the lookup indexes are left out -- they are rebuilt from the tables by from_state
+        """
+        return {'is_initialized': self.is_initialized,
+                'stopword_hashtags': self.stopword_hashtags, 'stopword_chunks': self.stopword_chunks,
+                'stopword_abbreviations': self.stopword_abbreviations,
+                'general_hashtags': self.general_hashtags, 'award_hashtags': self.award_hashtags,
+                'vocab': self.vocab.get_state()}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'HashtagLogger':
+        logger = cls()
+        logger.is_initialized = state['is_initialized']
+        logger.stopword_hashtags = state['stopword_hashtags']
+        logger.stopword_chunks = state['stopword_chunks']
+        logger.stopword_abbreviations = state['stopword_abbreviations']
+        logger.general_hashtags = state['general_hashtags']
+        logger.award_hashtags = state['award_hashtags']
+        logger.vocab = HashtagVocabulary.from_state(state['vocab'])
+        logger.hashtag_to_parent = logger.vocab.parent_view()
+        logger.all_hashtags = logger.hashtag_to_parent
+
+        for hashtag in logger.stopword_hashtags:
+            logger.stopword_index.add(hashtag)
+        for hashtag in logger.hashtag_to_parent:
+            logger.linked_index.add(hashtag)
+            logger.linked_substrings.add(hashtag)
+        for hashtag, v in logger.general_hashtags.items():
+            logger.general_chunks.add(hashtag, v['split'])
+        return logger
+
+
+
+
+def count_hashtags(tweets: List[str]) -> HashtagVocabulary:
+    # hashtag counts of one shard of the corpus (module-level so worker processes can run it)
+    vocab = HashtagVocabulary()
+    for tweet in tweets:
+        vocab.update(parse_hashtags_from_tweet(tweet))
+    return vocab
+
+
+class AwardPhraseMiner(object):
+    def __init__(self, award_suffix_regex, award_suffix_phrases, award_prefix_phrases,
+                 award_prefix_starts_with_regex, award_prefix_ends_with_regex, hashtag_to_parent):
+        """
+        Win-related regex search for candidate award names, plus the (parent) hashtags co-occurring with them.
+        Picklable, so shards of tweets can be mined in worker processes (see HashtagParser.parse_award_names)
+        :param hashtag_to_parent: dict of linked hashtags --> parent hashtag
+        """
+        self.suffix_regexes = [re.compile(award_suffix_regex + verb_phrase) for verb_phrase in award_suffix_phrases]
+        self.prefix_regexes = [(re.compile(verb_phrase + award_prefix_starts_with_regex),
+                                re.compile(verb_phrase + award_prefix_ends_with_regex))
+                               for verb_phrase in award_prefix_phrases]
+        self.hashtag_to_parent = hashtag_to_parent
 
+    def search(self, tweet: str) -> List[str]:
+        """
+        :param tweet: cleaned, lowercased, space-padded tweet
+        :return: candidate award names found via the first matching win-related phrase (empty if none)
+        """
+        # search for award-winner suffix-related strings
+        for suffix_regex in self.suffix_regexes:
+            award_regex = suffix_regex.findall(tweet)
+            if len(award_regex):
+                return clean_award_regex(award_regex)
+
+        # search for award-winner prefix-related strings (if suffix-related search failed)
+        for starts_with_regex, ends_with_regex in self.prefix_regexes:
+            award_regex = starts_with_regex.findall(tweet)
+            if len(award_regex):
+                return clean_award_regex(award_regex)
+            award_regex = ends_with_regex.findall(tweet)
+            if len(award_regex):
+                return clean_award_regex(award_regex)
+        return []
+
+    @instrument('regex.award_phrases')
+    def mine(self, tweets: Iterable[str]) -> Tuple[Counter, Dict[str, Counter]]:
+        """
+        :param tweets: cleaned, lowercased, space-padded tweets
+        :return: (award name counter, award name --> co-occurring parent hashtag counter)
+        """
+        award_phrase_counter = Counter()
+        award_hashtags = {}
+        for tweet in tweets:
+            award_regex = self.search(tweet)
+            if not len(award_regex):
+                continue
+            award_phrase_counter.update(award_regex)
+
+            # if either step succeeded, then get co-occurring hashtags
+            hashtags = parse_hashtags_from_tweet(tweet)
+            hashtags = [self.hashtag_to_parent[tag] for tag in hashtags if tag in self.hashtag_to_parent]
+            hashtags = list(set(hashtags))
+            for award in award_regex:
+                if award not in award_hashtags:
+                    award_hashtags[award] = Counter()
+                award_hashtags[award].update(hashtags)
+        return award_phrase_counter, award_hashtags
 
 
 class HashtagParser(object):
     def __init__(self, data=None, year='2015', hashtag_parser_config_path='hashtag_parser_config',
-                 award_word_config_path='award_word_config.json'):
+                 award_word_config_path='award_word_config.json', n_workers: int = 1):
 
         # ---------- internal data structs ----------
-        self.raw_hashtag_counter = Counter()
+        # interned hashtag vocabulary with array-backed frequency counts (Counter-like reads)
+        self.raw_hashtag_counter = HashtagVocabulary()
 
         self.hashtag_total_count = 0
         self.uncased_to_cased = None
         self.uncased_ordered = None
         self.hashtags = HashtagLogger()
         self.award_name_to_hashtags = None
+        # worker processes for the per-tweet passes (hashtag counting, award phrase mining); 1 = serial
+        self.n_workers = n_workers
 
         # ---------- Award words config ----------
         with open(award_word_config_path) as f:
@@ -214,6 +374,7 @@ class HashtagParser(object):
         self.awards_might_end_with = award_word_config['awards_might_end_with']
         # award-related words = both of the above
         self.award_related_words = self.awards_might_start_with + self.awards_might_end_with
+        self.award_related_matcher = MultiPatternMatcher({'award_related': self.award_related_words})
 
         # award *winner*-related strings
         #    award suffix phrases: phrases *after* an award name that might indicate winning
@@ -269,18 +430,80 @@ class HashtagParser(object):
         self.award_winner_candidate_threshold_capture = int(parser_config['award_winner_candidate_threshold_capture'])
         self.award_winner_candidate_threshold_filter = int(parser_config['award_winner_candidate_threshold_filter'])
 
+        # identifies the settings a saved state was built with (see save_state)
+        self.config_digest = hashlib.sha256(json.dumps([parser_config, award_word_config], sort_keys=True)
+                                            .encode('utf-8')).digest()
+
         if data is not None:
             self.initialize_hashtag_counter(data)
             self.initialize_uncased_mappings()
 
+    # ---------- saved state (warm starts) ----------
+    def save_state(self, fp: str) -> str:
+        """
+        Saves the state built by initialize_hashtag_counter, initialize_uncased_mappings and get_candidate_hashtags
+        (raw hashtag counts, uncased mappings, hashtag tables and links) in a versioned binary file.
+        :param fp: output file, e.g. hashtag_state_path(year)
+        :return: fp
+        """
+        state = {'raw_hashtag_counter': self.raw_hashtag_counter.get_state(),
+                 'hashtag_total_count': self.hashtag_total_count,
+                 'uncased_to_cased': self.uncased_to_cased, 'uncased_ordered': self.uncased_ordered,
+                 'hashtags': self.hashtags.get_state()}
+        tmp_fp = fp + '.tmp'
+        with open(tmp_fp, 'wb') as f:
+            f.write(HASHTAG_STATE_HEADER.pack(HASHTAG_STATE_MAGIC, HASHTAG_STATE_VERSION, self.config_digest))
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_fp, fp)
+        return fp
+
+    def load_state(self, fp: str) -> None:
+        """
+        Replaces this parser's hashtag state with the one saved by save_state.
+        Raises ValueError if fp is not a current state file or was built with different parser/award word configs.
+        """
+        with open(fp, 'rb') as f:
+            header = f.read(HASHTAG_STATE_HEADER.size)
+            if len(header) < HASHTAG_STATE_HEADER.size:
+                raise ValueError('%s is not a version %i hashtag parser state' % (fp, HASHTAG_STATE_VERSION))
+            magic, version, config_digest = HASHTAG_STATE_HEADER.unpack(header)
+            if magic != HASHTAG_STATE_MAGIC or version != HASHTAG_STATE_VERSION:
+                raise ValueError('%s is not a version %i hashtag parser state' % (fp, HASHTAG_STATE_VERSION))
+            if config_digest != self.config_digest:
+                raise ValueError('%s was built with different hashtag parser settings' % fp)
+            state = pickle.load(f)
+
+        self.raw_hashtag_counter = HashtagVocabulary.from_state(state['raw_hashtag_counter'])
+        self.hashtag_total_count = state['hashtag_total_count']
+        self.uncased_to_cased = state['uncased_to_cased']
+        self.uncased_ordered = state['uncased_ordered']
+        self.hashtags = HashtagLogger.from_state(state['hashtags'])
+        self.award_name_to_hashtags = None
+
+    @classmethod
+    def from_state(cls, fp: str, year='2015', hashtag_parser_config_path='hashtag_parser_config',
+                   award_word_config_path='award_word_config.json', n_workers: int = 1) -> 'HashtagParser':
+        """
+        HashtagParser whose hashtag state is loaded from fp (see save_state) instead of being built from the data
+        """
+        hp = cls(year=year, hashtag_parser_config_path=hashtag_parser_config_path,
+                 award_word_config_path=award_word_config_path, n_workers=n_workers)
+        hp.load_state(fp)
+        return hp
+
+    @instrument('hashtags.count', items_arg=1)
     def initialize_hashtag_counter(self, data: List[Dict]) -> None:
         """
         Initial storage of all hashtags in dataset.
-        :param data: List[Dict] of tweet instances, where Dict must have key='text'
+        :param data: List[Dict] of tweet instances, where Dict must have key='text' (or a (streaming) corpus)
         :return: None - update self.hashtag_counter
         """
-        for line in tqdm(data, desc='Counting all hashtags in the corpus'):
-            tweet = line['text']
+        if self.n_workers > 1:
+            # shards are merged in corpus order --> same vocabulary order and counts as the serial pass
+            for shard_vocab in map_shards(count_hashtags, data, self.n_workers, desc='Counting all hashtags in the corpus'):
+                self.raw_hashtag_counter.merge(shard_vocab)
+            return
+        for tweet in tqdm(iter_tweet_text(data), desc='Counting all hashtags in the corpus', total=known_length(data)):
             self.raw_hashtag_counter.update(parse_hashtags_from_tweet(tweet))
 
     def initialize_uncased_mappings(self):
@@ -304,6 +527,7 @@ class HashtagParser(object):
             self.uncased_to_cased[uncased_tag][tag] = freq
         self.uncased_ordered = dict(sorted(uncased_counter.items(), key=lambda item: item[1], reverse=True))
 
+    @instrument('hashtags.candidates')
     def get_candidate_hashtags(self, verbose: bool = False):
         """
         Generate a unique set of hashtags which are maybe important and might map to utterances outside of hashtags
@@ -371,7 +595,7 @@ class HashtagParser(object):
             #   - close Levenshtein distance to stopwords
             if any([chunk in self.hashtags.stopword_chunks for chunk in cased_chunks]):
                 continue
-            if any([tag in stopword or distance(tag, stopword) < 3 for stopword in self.hashtags.stopword_hashtags]):
+            if self.hashtags.is_stopword_related(tag):
                 continue
 
             # --- case-based rules for ignoring hashtags (common vs. infrequent hashtags)
@@ -396,16 +620,33 @@ class HashtagParser(object):
             for k, v in self.hashtags.general_hashtags.items():
                 print('Concept hashtag:', k, '\n\tlinked children hashtags:', v['children'])
 
+    @instrument('awards.parse_names')
     def parse_award_names(self, data: List[Dict], verbose: bool = True) -> List[str]:
         """
         Leverages hashtag co-occurrence to generate a probable list of award names.
 
-        :param data: List[Dict], where Dict must have key='text'
+        :param data: List[Dict], where Dict must have key='text' (or a (streaming) corpus)
         :return: list of best-guess award names from the data.
         """
         if not self.hashtags.is_initialized:
             self.get_candidate_hashtags()
 
+        award_phrase_counter, award_hashtags = self.mine_award_phrases(data)
+        return self.filter_award_names(award_phrase_counter, award_hashtags, verbose=verbose)
+
+    def award_phrase_miner(self) -> AwardPhraseMiner:
+        # win-related regex search configured for this parser, with the current hashtag linking
+        return AwardPhraseMiner(self.award_suffix_regex, self.award_suffix_phrases, self.award_prefix_phrases,
+                                self.award_prefix_starts_with_regex, self.award_prefix_ends_with_regex,
+                                dict(self.hashtags.hashtag_to_parent))
+
+    @instrument('awards.mine_phrases', items_arg=1)
+    def mine_award_phrases(self, data: List[Dict]) -> Tuple[Counter, Dict[str, Counter]]:
+        """
+        First half of parse_award_names: candidate award strings found via win-related phrases
+        :param data: List[Dict], where Dict must have key='text' (or a (streaming) corpus)
+        :return: (award string counter, award string --> co-occurring parent hashtag counter)
+        """
         # we want natural language (i.e. not hashtag) candidates for award names mined from tweets related to awards
         #   - lowercase the tweets
         #   - remove twitter account mentions (don't yet have a way of linking/interpreting them)
@@ -414,11 +655,11 @@ class HashtagParser(object):
         # separate cleaned + filtered tweets into "retweets" and "non-retweet" lists
         tweets_filtered_list = []
         retweets_filtered_list = []
-        for line in tqdm(data, desc="Filtering tweets for award-related words"):
-            tweet = line['text'].lower()
+        for tweet in tqdm(iter_tweet_text(data), desc="Filtering tweets for award-related words", total=known_length(data)):
+            tweet = tweet.lower()
             tweet = clean_tweet(tweet, remove_hashtags=False)
 
-            if not any([award_word in tweet for award_word in self.award_related_words]):
+            if not self.award_related_matcher.any_in(tweet):
                 continue
 
             if tweet.startswith('"') or tweet.startswith('rt '):
@@ -430,53 +671,42 @@ class HashtagParser(object):
         tweets_filtered_list = list(set(tweets_filtered_list))
 
         # get unfiltered list of candidate award names via win-related regular expressions
-        award_phrase_counter = Counter()
-        award_hashtags = {}
-        for tweet in tqdm(tweets_filtered_list + retweets_filtered_list,
-                          desc="Searching for award name candidates using win-related phrases"):
-            regex_found, award_regex = False, []
-
-            # search for award-winner suffix-related strings
-            for verb_phrase in self.award_suffix_phrases:
-                award_regex = re.findall(self.award_suffix_regex + verb_phrase, tweet)
-                if len(award_regex):
-                    award_regex = clean_award_regex(award_regex)
-                    award_phrase_counter.update(award_regex)
-                    regex_found = True
-                    break
-
-            # search for award-winner prefix-related strings (if suffix-related search failed)
-            if not regex_found:
-                for verb_phrase in self.award_prefix_phrases:
-                    award_regex = re.findall(verb_phrase + self.award_prefix_starts_with_regex, tweet)
-                    if len(award_regex):
-                        award_regex = clean_award_regex(award_regex)
-                        award_phrase_counter.update(award_regex)
-                        regex_found = True
-                        break
-                    else:
-                        award_regex = re.findall(verb_phrase + self.award_prefix_ends_with_regex, tweet)
-                        if len(award_regex):
-                            award_regex = clean_award_regex(award_regex)
-                            award_phrase_counter.update(award_regex)
-                            regex_found = True
-                            break
-
-            # if either step succeeded, then get co-occurring hashtags
-            if regex_found:
-                hashtags = parse_hashtags_from_tweet(tweet)
-                hashtags = [self.hashtags.hashtag_to_parent[tag] for tag in hashtags if tag in self.hashtags.all_hashtags]
-                hashtags = list(set(hashtags))
-                for award in award_regex:
+        miner = self.award_phrase_miner()
+        desc = "Searching for award name candidates using win-related phrases"
+        if self.n_workers > 1:
+            # merge shard results in order --> same counts and insertion orders as the serial pass
+            award_phrase_counter = Counter()
+            award_hashtags = {}
+            for shard_counter, shard_hashtags in map_shards(miner.mine, tweets_filtered_list + retweets_filtered_list,
+                                                            self.n_workers, desc=desc):
+                award_phrase_counter.update(shard_counter)
+                for award, hashtag_counter in shard_hashtags.items():
                     if award not in award_hashtags:
                         award_hashtags[award] = Counter()
-                    award_hashtags[award].update(hashtags)
-            
+                    award_hashtags[award].update(hashtag_counter)
+        else:
+            award_phrase_counter, award_hashtags = miner.mine(tqdm(tweets_filtered_list + retweets_filtered_list, desc=desc))
+        return award_phrase_counter, award_hashtags
 
+    @instrument('awards.filter_names')
+    def filter_award_names(self, award_phrase_counter: Counter, award_hashtags: Dict[str, Counter],
+                           verbose: bool = True) -> List[str]:
+        """
+        Second half of parse_award_names: filter and link candidate award strings via their co-occurring hashtags
+        :param award_phrase_counter: award string counter (see mine_award_phrases)
+        :param award_hashtags: award string --> co-occurring parent hashtag counter (see mine_award_phrases)
+        :return: list of best-guess award names
+        """
         # filter through candidate award strings
         award_counter = sorted(award_phrase_counter.items(), key=lambda item: item[1], reverse=True)
         award_counter = [list(tup) for tup in award_counter]
         kept_awards = []
+        # representations of kept award strings, computed once per phrase:
+        #   kept_award_sets: award string --> word set (reused by the final filtering below)
+        #   kept_by_reduce / kept_by_set: reduced alphanumeric form / frozen word set --> first kept_awards index
+        kept_award_sets = {}
+        kept_by_reduce = {}
+        kept_by_set = {}
         for ix, (k, freq) in enumerate(tqdm(award_counter, desc="Performing initial filtering and linking of potential award names")):
             # sorted list --> break will skip anything with less than 10 occurrences
             # this initial filtering is more relaxed, permitting consolidation of award names in this first step
@@ -496,22 +726,24 @@ class HashtagParser(object):
                 continue
 
             # check if award string is a punctuation-insensitive match to already added award candidates -- if so, ignore
+            #   (links to the earliest kept candidate matching on either representation)
             k_reduce = tweet_to_alphanumeric(k)
-            reject = False
-            for jx, (k_, _) in enumerate(kept_awards):
-                k_set_ = split_award_regex(k_)
-                if tweet_to_alphanumeric(k_) == k_reduce or k_set_ == k_set:
-                    reject = True
-                    kept_awards[jx][1] += freq
-                    if k not in award_hashtags:
-                        award_hashtags[k] = Counter()
-                    if k_ not in award_hashtags:
-                        award_hashtags[k_] = Counter()
-                    award_hashtags[k_] += award_hashtags[k]
-                    break
-
-            # if not rejection boolean, then everything passed! add the candidate
-            if not reject:
+            k_frozen = frozenset(k_set)
+            matches = [jx for jx in (kept_by_reduce.get(k_reduce), kept_by_set.get(k_frozen)) if jx is not None]
+            if len(matches):
+                jx = min(matches)
+                k_ = kept_awards[jx][0]
+                kept_awards[jx][1] += freq
+                if k not in award_hashtags:
+                    award_hashtags[k] = Counter()
+                if k_ not in award_hashtags:
+                    award_hashtags[k_] = Counter()
+                award_hashtags[k_] += award_hashtags[k]
+            # otherwise, everything passed! add the candidate
+            else:
+                kept_by_reduce.setdefault(k_reduce, len(kept_awards))
+                kept_by_set.setdefault(k_frozen, len(kept_awards))
+                kept_award_sets.setdefault(k, k_set)
                 kept_awards.append([k, freq])
 
         # re-sort on frequency of candidate award strings
@@ -537,13 +769,22 @@ class HashtagParser(object):
                     children_to_parent[child] = tag
             filtered_award_hashtags[k] = Counter(temp_hashtags)
 
+        # top co-occurring hashtag per award string -- recomputed only when its hashtag counter is merged into
+        top_hashtags = {}
+
+        def top_hashtag(award: str) -> str:
+            if award not in top_hashtags:
+                award_hash = filtered_award_hashtags[award]
+                top_hashtags[award] = max(award_hash, key=award_hash.get)
+            return top_hashtags[award]
+
         temp_kept = []
         acceptable_set_differences = []
         for ix, (k, freq) in enumerate(tqdm(kept_awards, desc="Performing final filtering and linking of award names")):
             # filter on a more aggressive occurrence requirement for the award string (100 occurrences)
             if freq < self.award_winner_candidate_threshold_filter:
                 continue
-            k_set = split_award_regex(k)
+            k_set = kept_award_sets[k]
             k_hash = filtered_award_hashtags[k]
             reject = False
             swap = False
@@ -552,7 +793,7 @@ class HashtagParser(object):
                 reject = True
             else:
                 # if two awards are similar enough, check if they have similar co-occurring hashtags
-                top_hash = max(k_hash, key=k_hash.get)
+                top_hash = top_hashtag(k)
 
                 # reject if
                 #   1. the award string has limited co-occurring hashtags
@@ -568,10 +809,10 @@ class HashtagParser(object):
 
                 # track award name vs. other already added award names
                 for k_other, _ in temp_kept:
-                    k_set_other = split_award_regex(k_other)
+                    k_set_other = kept_award_sets[k_other]
                     k_hash_other = filtered_award_hashtags[k_other]
 
-                    top_hash_other = max(k_hash_other, key=k_hash_other.get)
+                    top_hash_other = top_hashtag(k_other)
                     if top_hash_other == top_hash or top_hash in k_hash_other or top_hash_other in k_hash:
                         # true subset of other
                         if not len(k_set.difference(k_set_other)):
@@ -597,12 +838,14 @@ class HashtagParser(object):
                     if k_other == swap:
                         temp_kept[ix] = [k, freq_other + freq]
                         filtered_award_hashtags[k] += filtered_award_hashtags[k_other]
+                        top_hashtags.pop(k, None)
             else:
                 if len(all_subset_other) == 1:
                     for jx, (k_other, freq_other) in enumerate(temp_kept):
                         if k_other == all_subset_other[0]:
                             temp_kept[jx][1] += freq
                             filtered_award_hashtags[k_other] += filtered_award_hashtags[k]
+                            top_hashtags.pop(k_other, None)
                             break
 
         if verbose:
@@ -623,6 +866,7 @@ class HashtagParser(object):
 
         return award_name_list
 
+    @instrument('awards.title_winners')
     def get_title_award_to_winner(self, data, award_names_found, award_names_canonical, people_words_hardcode):
         assert self.award_name_to_hashtags is not None, 'parse_award_names must be called before get_canonical_winner_utterances'
         found_to_canonical = {}
@@ -685,8 +929,8 @@ class HashtagParser(object):
                                for c in award_names_canonical if c not in canonical_to_found]
 
         award_to_tweets = {tup[0]: [] for tup in remaining_canonical}
-        for line in tqdm(data, desc="Filtering tweets for missing canonical award names"):
-            tweet = line['text'].lower()
+        for tweet in tqdm(iter_tweet_text(data), desc="Filtering tweets for missing canonical award names", total=known_length(data)):
+            tweet = tweet.lower()
             tweet = clean_tweet(tweet, remove_hashtags=False)
 
             for c, c_set in remaining_canonical:
@@ -713,24 +957,31 @@ class HashtagParser(object):
             if top_hash not in hashtags_to_resolve:
                 hashtags_to_resolve.append(top_hash)
 
+        # tweets are stored once (tweet_ids), each hashtag keeps the ids of its matching tweets (with repeats)
+        tweet_ids = {}
         hashtag_to_tweets = {h: [] for h in hashtags_to_resolve}
-        for line in tqdm(data, desc="Filtering tweets for award winners found by hashtags"):
-            tweet = line['text'].lower()
+        for tweet in tqdm(iter_tweet_text(data), desc="Filtering tweets for award winners found by hashtags", total=known_length(data)):
+            tweet = tweet.lower()
             tweet = clean_tweet(tweet, remove_hashtags=True)
             reduced_tweet = tweet_to_alphanumeric(tweet)
             for h in hashtags_to_resolve:
                 if h in reduced_tweet:
-                    hashtag_to_tweets[h].append(' ' + tweet + ' ')
+                    hashtag_to_tweets[h].append(tweet_ids.setdefault(' ' + tweet + ' ', len(tweet_ids)))
+
+        # wonky regex equivalent --> allow any spacing/symbols between alphanumeric characters when searching
+        #   - we want to resolve spacing/punctuation of mapping from hashtag to utterances in tweets
+        #   - (hashtags are not always easily parsed from capitalization of tweet; also no punctuation allowed)
+        #   - all hashtags are searched in a single pass over the stored tweets (see UtteranceIndex)
+        hashtag_to_utterances = {h: {} for h in hashtags_to_resolve}
+        for h, matches in UtteranceIndex(tweet_ids).find(hashtags_to_resolve).items():
+            for tweet_id, utterance in matches:
+                hashtag_to_utterances[h].setdefault(tweet_id, []).append(utterance)
 
         award_to_winner = {}
         for h, h_tweets in tqdm(hashtag_to_tweets.items(), desc='Mapping hashtags to most frequent utterance forms'):
-            h_tweets = '~'.join(h_tweets)
-
-            # wonky regex --> allow any spacing/symbols between alphanumeric characters when searching
-            #   - we want to resolve spacing/punctuation of mapping from hashtag to utterances in tweets
-            #   - (hashtags are not always easily parsed from capitalization of tweet; also no punctuation allowed)
-            nl_regex = r' (' + ''.join([char + r'[^\w~]*' for char in h[:-1]]) + h[-1] + r'\.?)[\.,\)\(\-"\'\!:;]? '
-            nl_counter = Counter(re.findall(nl_regex, h_tweets))
+            nl_counter = Counter()
+            for tweet_id in h_tweets:
+                nl_counter.update(hashtag_to_utterances[h].get(tweet_id, []))
             nl_total = sum(nl_counter.values())
             try:
                 nl_top_utterance = nl_counter.most_common(1)[0][0]
@@ -745,11 +996,12 @@ class HashtagParser(object):
         return award_to_winner
 
 
+    @instrument('hashtags.concepts')
     def parse_hashtag_concepts(self, data: List[Dict]):
         """
         TODO
 
-        :param data: List[Dict], where Dict must have key='text'
+        :param data: List[Dict], where Dict must have key='text' (or a (streaming) corpus)
         :return: TODO
         """
         if not self.hashtags.is_initialized:
@@ -760,8 +1012,8 @@ class HashtagParser(object):
         #   - remove twitter account mentions (don't yet have a way of linking/interpreting them)
         tweets_filtered = []
         retweets_filtered = []
-        for line in data:
-            tweet = line['text'].lower()
+        for tweet in iter_tweet_text(data):
+            tweet = tweet.lower()
             # # ignore tweets which don't include "best" or "award" -- significant speedup
             # if 'best' not in tweet and 'award' not in tweet:
             #     continue
@@ -771,23 +1023,26 @@ class HashtagParser(object):
             else:
                 tweets_filtered.append(' ' + tweet + ' ')
 
-        # enforce uniqueness of tweets and join with ~ as a special token --> can search on regex without iterating
+        # enforce uniqueness of tweets and index them once --> can search all hashtags without iterating
         tweets_filtered_list = list(set(tweets_filtered))
         # retweets_filtered_list = list(set(retweets_filtered))
         retweets_filtered_list = retweets_filtered
         tweets_full_reduce = '~'.join([tweet_to_alphanumeric(t) for t in tweets_filtered])
-        tweets_filtered = '~'.join(tweets_filtered_list)
+
+        # wonky regex equivalent --> allow any spacing/symbols between alphanumeric characters when searching
+        #   - we want to resolve spacing/punctuation of mapping from hashtag to utterances in tweets
+        #   - (hashtags are not always easily parsed from capitalization of tweet; also no punctuation allowed)
+        #   - utterances of every award + general hashtag are collected in a single pass (see UtteranceIndex)
+        hashtag_to_nl_counter = UtteranceIndex(tweets_filtered_list).utterance_counters(
+            list(self.hashtags.award_hashtags) + list(self.hashtags.general_hashtags))
 
         for k in tqdm(self.hashtags.award_hashtags):
             if k in tweets_full_reduce:
-                tag_counter = {'#' + tag: freq for tag, freq in self.raw_hashtag_counter.items() if k == tag.lower()}
+                # cased variants of the award hashtag (same order as the raw counter -- no scan over the vocabulary)
+                tag_counter = {'#' + tag: freq for tag, freq in self.uncased_to_cased[k].items()}
                 tag_total = sum(tag_counter.values())
 
-                # wonky regex --> allow any spacing/symbols between alphanumeric characters when searching
-                #   - we want to resolve spacing/punctuation of mapping from hashtag to utterances in tweets
-                #   - (hashtags are not always easily parsed from capitalization of tweet; also no punctuation allowed)
-                nl_regex = r' (' + ''.join([char + r'[^\w~]*' for char in k[:-1]]) + k[-1] + r'\.?)[\.,\)\(\-"\'\!:;]? '
-                nl_counter = Counter(re.findall(nl_regex, tweets_filtered))
+                nl_counter = Counter(hashtag_to_nl_counter[k])
                 nl_total = sum(nl_counter.values())
 
                 try:
@@ -902,15 +1157,10 @@ class HashtagParser(object):
                 tag_counter = {'#' + tag: freq for tag, freq in self.raw_hashtag_counter.items() if tag.lower() in tag_matches}
                 tag_total = sum(tag_counter.values())
 
-                # wonky regex --> allow any spacing/symbols between alphanumeric characters when searching
-                #   - we want to resolve spacing/punctuation of mapping from hashtag to utterances in tweets
-                #   - (hashtags are not always easily parsed from capitalization of tweet; also no punctuation allowed)
-                # nl_regex = ''.join([char + r'[^\w~]*' for char in k[:-1]]) + k[-1] + r'\.?[\.,)(-"\'!:;]? '
-
+                # utterances of the hashtag (from the single UtteranceIndex pass above)
                 nl_counter = Counter()
                 for search_tag in tag_matches:
-                    nl_regex = r' (' + ''.join([char + r'[^\w~]*' for char in k[:-1]]) + k[-1] + r'\.?)[\.,\)\(\-"\'\!:;]? '
-                    nl_counter.update(re.findall(nl_regex, tweets_filtered))
+                    nl_counter.update(hashtag_to_nl_counter[k])
                 nl_total = sum(nl_counter.values())
 
                 try:
@@ -0,0 +1,175 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
+import numpy as np
+
+
+class HashtagVocabulary(object):
+    def __init__(self):
+        """
+        Interned hashtag vocabulary: every distinct hashtag string gets a dense integer id (in first-seen order)
+            - frequency counts live in an int64 NumPy array indexed by id
+            - parent links live in an int32 NumPy array indexed by id (-1 = no parent)
+            - membership is a single dict probe
+        Supports the read side of a Counter (items/keys/[]/len/in/iteration in first-seen order), so it can stand
+        in for the raw hashtag Counter.
+        """
+        self.tag_to_id: Dict[str, int] = {}
+        self.id_to_tag: List[str] = []
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._parents = np.full(0, -1, dtype=np.int32)
+        self._n_linked = 0
+        # ids counted by update() but not yet added to self._counts -- flushed in bulk via np.bincount
+        self._pending = array('I')
+
+    # ---------- interning ----------
+    def intern(self, tag: str) -> int:
+        tag_id = self.tag_to_id.get(tag)
+        if tag_id is None:
+            tag_id = len(self.id_to_tag)
+            self.tag_to_id[tag] = tag_id
+            self.id_to_tag.append(tag)
+            if tag_id >= len(self._counts):
+                self._grow(max(1024, 2 * len(self._counts)))
+        return tag_id
+
+    def _grow(self, capacity: int) -> None:
+        counts = np.zeros(capacity, dtype=np.int64)
+        counts[:len(self._counts)] = self._counts
+        parents = np.full(capacity, -1, dtype=np.int32)
+        parents[:len(self._parents)] = self._parents
+        self._counts, self._parents = counts, parents
+
+    def id_of(self, tag: str) -> int:
+        return self.tag_to_id[tag]
+
+    def tag_of(self, tag_id: int) -> str:
+        return self.id_to_tag[tag_id]
+
+    def __len__(self) -> int:
+        return len(self.id_to_tag)
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self.tag_to_id
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.id_to_tag)
+
+    # ---------- frequency counts ----------
+    def update(self, tags: Iterable[str]) -> None:
+        # same semantics as Counter.update(list_of_tags): +1 per occurrence
+        intern = self.intern
+        self._pending.extend(intern(tag) for tag in tags)
+
+    def add_count(self, tag: str, frequency: int) -> None:
+        self._flush()
+        self._counts[self.intern(tag)] += frequency
+
+    def _flush(self) -> None:
+        if len(self._pending):
+            pending = np.frombuffer(self._pending, dtype=np.uint32)
+            self._counts[:len(self.id_to_tag)] += np.bincount(pending, minlength=len(self.id_to_tag))
+            self._pending = array('I')
+
+    @property
+    def counts(self) -> np.ndarray:
+        """
+        :return: frequency per hashtag id (view of length len(self))
+        """
+        self._flush()
+        return self._counts[:len(self.id_to_tag)]
+
+    def __getitem__(self, tag: str) -> int:
+        tag_id = self.tag_to_id.get(tag)
+        return 0 if tag_id is None else int(self.counts[tag_id])
+
+    def get(self, tag: str, default: int = None) -> int:
+        return self[tag] if tag in self.tag_to_id else default
+
+    def keys(self) -> List[str]:
+        return list(self.id_to_tag)
+
+    def items(self) -> List[Tuple[str, int]]:
+        return list(zip(self.id_to_tag, self.counts.tolist()))
+
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def merge(self, other: 'HashtagVocabulary') -> None:
+        """
+        Add the counts of another vocabulary (e.g. built over another shard of the corpus).
+        Hashtags new to self are appended in the other vocabulary's id order.
+        """
+        ids = np.fromiter((self.intern(tag) for tag in other.id_to_tag), dtype=np.int64, count=len(other))
+        self._flush()
+        np.add.at(self._counts, ids, other.counts)
+
+    # ---------- parent links ----------
+    def set_parent(self, tag: str, parent: str) -> bool:
+        """
+        :return: True if tag had no parent before (i.e. it is newly linked)
+        """
+        tag_id = self.intern(tag)
+        parent_id = self.intern(parent)
+        is_new = self._parents[tag_id] < 0
+        if is_new:
+            self._n_linked += 1
+        self._parents[tag_id] = parent_id
+        return is_new
+
+    def parent_id(self, tag: str) -> int:
+        tag_id = self.tag_to_id.get(tag)
+        return -1 if tag_id is None else int(self._parents[tag_id])
+
+    @property
+    def parents(self) -> np.ndarray:
+        """
+        :return: parent id per hashtag id, -1 where unlinked (view of length len(self))
+        """
+        return self._parents[:len(self.id_to_tag)]
+
+    def parent_view(self) -> 'HashtagParentView':
+        return HashtagParentView(self)
+
+    # ---------- serialization ----------
+    def get_state(self) -> Dict[str, bytes]:
+        """
+        :return: compact state -- NUL-separated UTF-8 hashtags (in id order), little-endian counts and parents
+        """
+        return {'tags': '\0'.join(self.id_to_tag).encode('utf-8'),
+                'counts': self.counts.astype('<i8').tobytes(),
+                'parents': self.parents.astype('<i4').tobytes()}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, bytes]) -> 'HashtagVocabulary':
+        vocab = cls()
+        vocab.id_to_tag = state['tags'].decode('utf-8').split('\0') if state['counts'] else []
+        vocab.tag_to_id = {tag: tag_id for tag_id, tag in enumerate(vocab.id_to_tag)}
+        vocab._counts = np.frombuffer(state['counts'], dtype='<i8').astype(np.int64)
+        vocab._parents = np.frombuffer(state['parents'], dtype='<i4').astype(np.int32)
+        vocab._n_linked = int((vocab._parents >= 0).sum())
+        return vocab
+
+
+class HashtagParentView(Mapping):
+    def __init__(self, vocab: HashtagVocabulary):
+        """
+        Read-only dict-like view {hashtag: parent hashtag} over the parent links of a HashtagVocabulary.
+        Only linked hashtags are keys, so `tag in view` doubles as an O(1) "is this a known hashtag" check.
+        """
+        self.vocab = vocab
+
+    def __getitem__(self, tag: str) -> str:
+        parent_id = self.vocab.parent_id(tag)
+        if parent_id < 0:
+            raise KeyError(tag)
+        return self.vocab.id_to_tag[parent_id]
+
+    def __contains__(self, tag) -> bool:
+        return self.vocab.parent_id(tag) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        id_to_tag = self.vocab.id_to_tag
+        return (id_to_tag[tag_id] for tag_id in np.flatnonzero(self.vocab.parents >= 0).tolist())
+
+    def __len__(self) -> int:
+        return self.vocab._n_linked
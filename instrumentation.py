@@ -0,0 +1,260 @@
+'''Lightweight per-stage instrumentation: wall time, CPU time, items processed and peak allocations per stage,
+plus plain counters, exported as a JSON report and as Prometheus text.
+
+Switched on by the GG_INSTRUMENT environment variable, read once at import time:
+    GG_INSTRUMENT=1          timings, items and counters
+    GG_INSTRUMENT=memory     ... and peak Python allocations per stage (tracemalloc -- noticeably slower)
+    GG_INSTRUMENT_REPORT=fp  write <fp>.json and <fp>.prom when the process exits
+
+Statistics are per process: worker processes send theirs back as a snapshot() their parent merge()s
+(see gg_api.run_award_jobs).
+
+Off by default, at zero cost: @instrument returns the function itself undecorated, stage() hands out a shared
+no-op context manager and count() returns immediately.
+
+    from instrumentation import instrument, stage, count
+
+    @instrument('ner.persons', items_arg=0)     # items = len(first positional argument)
+    def find_persons_batch(texts): ...
+
+    with stage('hashtags.count') as s:
+        for tweet in tweets:
+            ...
+            s.add(1)
+'''
+import os
+import json
+import time
+import atexit
+import functools
+import tracemalloc
+from typing import Callable, Dict, List
+
+INSTRUMENT_ENV = 'GG_INSTRUMENT'
+REPORT_ENV = 'GG_INSTRUMENT_REPORT'
+PROMETHEUS_PREFIX = 'gg'
+
+_mode = os.environ.get(INSTRUMENT_ENV, '').strip().lower()
+ENABLED = _mode not in ('', '0', 'false', 'off', 'no')
+TRACE_MEMORY = ENABLED and _mode == 'memory'
+# tracemalloc.reset_peak is Python 3.9+; without it, stage peaks are measured against the process-wide peak
+_reset_peak = getattr(tracemalloc, 'reset_peak', lambda: None)
+
+
+class StageStats(object):
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.items = 0
+        self.peak_alloc_bytes = 0
+
+    def as_dict(self) -> Dict:
+        return {'calls': self.calls, 'wall_s': self.wall_s, 'cpu_s': self.cpu_s, 'items': self.items,
+                'items_per_s': self.items / self.wall_s if self.items and self.wall_s > 0 else None,
+                'peak_alloc_bytes': self.peak_alloc_bytes if TRACE_MEMORY else None}
+
+
+class _NullStage(object):
+    # shared do-nothing stage handed out while instrumentation is off
+    def __enter__(self) -> '_NullStage':
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def add(self, n_items: int = 1) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+    def __init__(self, recorder: 'Instrumentation', name: str, n_items: int = 0):
+        self.recorder = recorder
+        self.name = name
+        self.n_items = n_items or 0
+
+    def add(self, n_items: int = 1) -> None:
+        self.n_items += n_items
+
+    def __enter__(self) -> '_Stage':
+        if TRACE_MEMORY:
+            self.recorder._enter_memory_frame()
+        self.wall, self.cpu = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        wall, cpu = time.perf_counter() - self.wall, time.process_time() - self.cpu
+        peak = self.recorder._exit_memory_frame() if TRACE_MEMORY else 0
+        stats = self.recorder.stats.get(self.name)
+        if stats is None:
+            stats = self.recorder.stats[self.name] = StageStats(self.name)
+        stats.calls += 1
+        stats.wall_s += wall
+        stats.cpu_s += cpu
+        stats.items += self.n_items
+        stats.peak_alloc_bytes = max(stats.peak_alloc_bytes, peak)
+        return False
+
+
+class Instrumentation(object):
+    def __init__(self):
+        """
+        Collects stage statistics (by stage name, accumulated over calls) and named counters for this process.
+        Nested stages are each timed in full; peak allocations are measured relative to the allocations live
+        when the stage was entered.
+        """
+        self.stats: Dict[str, StageStats] = {}
+        self.counters: Dict[str, int] = {}
+        # open stages while tracing memory: [traced bytes at entry, highest traced bytes seen]
+        self._memory_frames: List[List[int]] = []
+
+    def stage(self, name: str, n_items: int = 0):
+        return _Stage(self, name, n_items) if ENABLED else _NULL_STAGE
+
+    def count(self, name: str, n: int = 1) -> None:
+        if ENABLED:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self) -> None:
+        self.stats.clear()
+        self.counters.clear()
+
+    # ---------- worker processes ----------
+    def snapshot(self) -> Dict:
+        """
+        :return: picklable copy of the statistics and counters, e.g. to send from a worker process to its parent
+        """
+        return {'stages': {name: (stats.calls, stats.wall_s, stats.cpu_s, stats.items, stats.peak_alloc_bytes)
+                           for name, stats in self.stats.items()},
+                'counters': dict(self.counters)}
+
+    def merge(self, snapshot: Dict) -> None:
+        """
+        Add the statistics and counters of a snapshot (see snapshot) to this recorder.
+        Calls, times, items and counters are summed -- so stages run concurrently in several workers add up to more
+        wall time than elapsed -- and peak allocations are the highest of the two.
+        """
+        for name, (calls, wall_s, cpu_s, items, peak_alloc_bytes) in snapshot['stages'].items():
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = StageStats(name)
+            stats.calls += calls
+            stats.wall_s += wall_s
+            stats.cpu_s += cpu_s
+            stats.items += items
+            stats.peak_alloc_bytes = max(stats.peak_alloc_bytes, peak_alloc_bytes)
+        for name, value in snapshot['counters'].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    # ---------- peak allocations (tracemalloc keeps a single global peak, so it is re-based per stage) ----------
+    def _enter_memory_frame(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._memory_frames:
+            self._memory_frames[-1][1] = max(self._memory_frames[-1][1], peak)
+        _reset_peak()
+        self._memory_frames.append([current, current])
+
+    def _exit_memory_frame(self) -> int:
+        start, highest = self._memory_frames.pop()
+        highest = max(highest, tracemalloc.get_traced_memory()[1])
+        if self._memory_frames:
+            self._memory_frames[-1][1] = max(self._memory_frames[-1][1], highest)
+        _reset_peak()
+        return highest - start
+
+    # ---------- export ----------
+    def report(self) -> Dict:
+        return {'enabled': ENABLED, 'trace_memory': TRACE_MEMORY,
+                'stages': {name: stats.as_dict() for name, stats in self.stats.items()},
+                'counters': dict(self.counters)}
+
+    def prometheus_text(self) -> str:
+        metrics = [('stage_calls_total', 'counter', 'Calls of a pipeline stage', 'calls'),
+                   ('stage_wall_seconds_total', 'counter', 'Wall time spent in a pipeline stage', 'wall_s'),
+                   ('stage_cpu_seconds_total', 'counter', 'CPU time spent in a pipeline stage', 'cpu_s'),
+                   ('stage_items_total', 'counter', 'Items processed by a pipeline stage', 'items')]
+        if TRACE_MEMORY:
+            metrics.append(('stage_peak_alloc_bytes', 'gauge', 'Peak Python allocations during a pipeline stage',
+                            'peak_alloc_bytes'))
+        lines = []
+        for metric, kind, description, attribute in metrics:
+            lines.append('# HELP %s_%s %s' % (PROMETHEUS_PREFIX, metric, description))
+            lines.append('# TYPE %s_%s %s' % (PROMETHEUS_PREFIX, metric, kind))
+            for name, stats in self.stats.items():
+                lines.append('%s_%s{stage="%s"} %s' % (PROMETHEUS_PREFIX, metric, _escape(name), getattr(stats, attribute)))
+        if self.counters:
+            lines.append('# HELP %s_events_total Named event counters' % PROMETHEUS_PREFIX)
+            lines.append('# TYPE %s_events_total counter' % PROMETHEUS_PREFIX)
+            for name, value in self.counters.items():
+                lines.append('%s_events_total{name="%s"} %s' % (PROMETHEUS_PREFIX, _escape(name), value))
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, fp: str) -> None:
+        with open(fp, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_prometheus(self, fp: str) -> None:
+        with open(fp, 'w') as f:
+            f.write(self.prometheus_text())
+
+    def write_reports(self, fp_prefix: str) -> None:
+        # <fp_prefix>.json and <fp_prefix>.prom
+        self.write_json(fp_prefix + '.json')
+        self.write_prometheus(fp_prefix + '.prom')
+
+
+def _escape(label: str) -> str:
+    return label.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# process-wide recorder used by stage / count / instrument
+recorder = Instrumentation()
+
+
+def stage(name: str, n_items: int = 0):
+    """
+    :param name: stage name (calls under the same name are accumulated)
+    :param n_items: items processed, if known up front (more can be added with .add(n) on the handle)
+    :return: context manager timing the block
+    """
+    return recorder.stage(name, n_items)
+
+
+def count(name: str, n: int = 1) -> None:
+    recorder.count(name, n)
+
+
+def instrument(name: str = None, items_arg: int = None) -> Callable[[Callable], Callable]:
+    """
+    Decorator timing every call of a function as a stage.
+    Decided at decoration time: with instrumentation off, the function is returned unchanged.
+    :param name: stage name (default: module.qualname of the function)
+    :param items_arg: index of the positional argument whose len() is the number of items processed
+    """
+    def decorator(fn: Callable) -> Callable:
+        if not ENABLED:
+            return fn
+        stage_name = name or fn.__module__ + '.' + fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            n_items = 0
+            if items_arg is not None and items_arg < len(args):
+                try:
+                    n_items = len(args[items_arg])
+                except TypeError:
+                    pass
+            with recorder.stage(stage_name, n_items):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if ENABLED and os.environ.get(REPORT_ENV):
+    atexit.register(recorder.write_reports, os.path.abspath(os.environ[REPORT_ENV]))
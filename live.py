@@ -0,0 +1,303 @@
+'''Live (streaming) mode: tallies award names and winners while tweets arrive during the ceremony.
+
+    python live.py 2015 replay --speedup 60     # replay gg2015.json in timestamp_ms order, 1 minute per second
+    python live.py 2015 tail tweets.jsonl       # follow a JSON-lines feed as it is written
+    python live.py 2015 socket 127.0.0.1:8765   # read a newline-delimited JSON feed from a socket
+'''
+import json
+import time
+import socket
+import argparse
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+
+from corpus import corpus_path, has_binary_corpus, MappedTweetCorpus
+from loading_utils import iter_tweet_columns_from_json
+from hashtag_parsing import HashtagParser, HashtagLogger
+from string_utils import parse_hashtags_from_tweet, clean_tweet
+from tweet_labels import TweetClassifier, RETWEET, is_reasonable
+from gg_api import OFFICIAL_AWARDS_1315, AwardObj, awardNameToKeywords, findTripwords, indicatesWin, isWinningTweet
+from gg_api import find_persons_batch, tallyWinnerCandidates, rankWinnerCandidates
+
+PEOPLE_WORDS_HARDCODE = ['actor', 'actress', 'director', 'cecil']
+
+
+# ----------------------------------- Tweet sources -----------------------------------
+# every source yields (timestamp_ms, tweet text) pairs
+
+def paced(tweets: Iterable[Tuple[int, str]], speedup: float = None) -> Iterator[Tuple[int, str]]:
+    '''Re-emits tweets at their original pace (timestamp_ms), sped up by <speedup>; no delays if speedup is None'''
+    start_wall, start_timestamp = None, None
+    for timestamp, text in tweets:
+        if speedup:
+            if start_wall is None:
+                start_wall, start_timestamp = time.monotonic(), timestamp
+            delay = (timestamp - start_timestamp) / 1000.0 / speedup - (time.monotonic() - start_wall)
+            if delay > 0:
+                time.sleep(delay)
+        yield timestamp, text
+
+
+def replay_corpus(year, speedup: float = None) -> Iterator[Tuple[int, str]]:
+    '''Replays the tweets of gg<year> in timestamp_ms order (ties keep corpus order)'''
+    corpus = MappedTweetCorpus(year) if has_binary_corpus(year) else None
+    if corpus is not None and corpus.timestamps is not None:
+        timestamps = np.frombuffer(corpus.timestamps, dtype=np.int64)
+        order = np.argsort(timestamps, kind='stable').tolist()
+        tweets = ((int(timestamps[ix]), corpus[ix]) for ix in order)
+    else:
+        tweets = sorted([(timestamp, text) for text, _, _, timestamp in iter_tweet_columns_from_json(corpus_path(year))],
+                        key=lambda item: item[0])
+    return paced(tweets, speedup)
+
+
+def encode_tweet(timestamp: int, text: str) -> str:
+    # one line of the JSON-lines feed format read by tail_jsonl / read_socket
+    return json.dumps({'text': text, 'timestamp_ms': timestamp}) + '\n'
+
+
+def decode_tweet(line: str) -> Tuple[int, str]:
+    record = json.loads(line)
+    return int(record.get('timestamp_ms', -1)), record['text']
+
+
+def write_jsonl(tweets: Iterable[Tuple[int, str]], fp: str) -> None:
+    '''File stand-in for the live feed: appends tweets to a JSON-lines file as they come (see tail_jsonl)'''
+    with open(fp, 'a') as f:
+        for timestamp, text in tweets:
+            f.write(encode_tweet(timestamp, text))
+            f.flush()
+
+
+def tail_jsonl(fp: str, poll_interval: float = 0.2, idle_timeout: float = None) -> Iterator[Tuple[int, str]]:
+    '''
+    Follows a JSON-lines feed while it is being written (like tail -f)
+    :param idle_timeout: stop after this many seconds without new tweets (None: follow forever)
+    '''
+    partial = ''
+    idle_since = time.monotonic()
+    with open(fp) as f:
+        while True:
+            line = f.readline()
+            if line:
+                partial += line
+                if partial.endswith('\n'):
+                    if partial.strip():
+                        yield decode_tweet(partial)
+                    partial = ''
+                    idle_since = time.monotonic()
+                continue
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                return
+            time.sleep(poll_interval)
+
+
+def serve_tweets(tweets: Iterable[Tuple[int, str]], host: str = '127.0.0.1', port: int = 8765) -> None:
+    '''Socket stand-in for the live feed: streams tweets as JSON lines to the first client that connects'''
+    with socket.create_server((host, port)) as server:
+        connection, _ = server.accept()
+        with connection, connection.makefile('w', encoding='utf-8') as f:
+            for timestamp, text in tweets:
+                f.write(encode_tweet(timestamp, text))
+                f.flush()
+
+
+def read_socket(host: str = '127.0.0.1', port: int = 8765) -> Iterator[Tuple[int, str]]:
+    '''Reads a JSON-lines feed from a socket until the sender closes it'''
+    with socket.create_connection((host, port)) as connection, connection.makefile('r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield decode_tweet(line)
+
+
+# ----------------------------------- Incremental state -----------------------------------
+
+class LiveCeremony(object):
+    def __init__(self, year, awards: List[str] = OFFICIAL_AWARDS_1315, ner_batch_size: int = 64,
+                 max_ner_delay: float = 2.0):
+        '''
+        Incremental version of the batch pipeline (gg_api.get_awards / get_winner), updated one tweet at a time
+            - HashtagParser hashtag counts
+            - award phrase counts (win-related phrases) + the hashtags they co-occur with
+            - per-award PERSON candidate tallies, with and without tripwords (same fallback as get_winner)
+        Per-tweet work is a fixed set of string checks; NER runs on micro-batches of winning tweets, flushed every
+        <ner_batch_size> tweets or after <max_ner_delay> seconds. Answers can be queried at any time.
+        :param year: ceremony year (selects hashtag_parser_config_<year>.json and the historical-tweet rule)
+        :param awards: official award names
+        :param ner_batch_size: winning tweets per NER batch
+        :param max_ner_delay: maximum age (seconds) of a winning tweet waiting for NER
+        '''
+        self.year = year
+        self.hp = HashtagParser(year=year)
+        self.classifier = TweetClassifier(year)
+        self.ner_batch_size = ner_batch_size
+        self.max_ner_delay = max_ner_delay
+
+        # everything received so far -- title awards are resolved from these at query time
+        self.texts = []
+        self.last_timestamp = None
+        self.linked_at = None
+
+        # award phrase mining: hashtags are stored raw (as the set of hashtags per tweet) and linked at query time,
+        # since hashtag linking depends on the counts of the whole stream
+        self.miner = self.hp.award_phrase_miner()
+        self.award_phrase_counter = Counter()
+        self.award_hashtag_sets: Dict[str, Counter] = {}
+        self.mined_tweets = set()
+
+        # winner tallies of people awards
+        awardList = [AwardObj(name=a, keywords=awardNameToKeywords(a)) for a in awards]
+        for a in awardList:
+            a.tripwords = findTripwords(award=a, awardList=awardList)
+        self.people_awards = [a for a in awardList if any([w in a.keywords for w in PEOPLE_WORDS_HARDCODE])]
+        self.title_awards = [a.name for a in awardList if a not in self.people_awards]
+        self.strict_tallies = {a.name: {} for a in self.people_awards}
+        self.relaxed_tallies = {a.name: {} for a in self.people_awards}
+        self.strict_hits = Counter()
+        self.pending = []
+        self.pending_since = None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, timestamp: int, text: str) -> None:
+        '''Consumes one tweet'''
+        self.texts.append(text)
+        self.last_timestamp = timestamp
+        self.hp.raw_hashtag_counter.update(parse_hashtags_from_tweet(text))
+
+        # award phrases -- same filtering as HashtagParser.mine_award_phrases (unique non-retweets, all retweets)
+        tweet = clean_tweet(text.lower(), remove_hashtags=False)
+        if self.hp.award_related_matcher.any_in(tweet):
+            is_retweet = tweet.startswith('"') or tweet.startswith('rt ')
+            tweet = ' ' + tweet + ' '
+            if is_retweet or tweet not in self.mined_tweets:
+                if not is_retweet:
+                    self.mined_tweets.add(tweet)
+                award_regex = self.miner.search(tweet)
+                if len(award_regex):
+                    self.award_phrase_counter.update(award_regex)
+                    hashtags = frozenset(parse_hashtags_from_tweet(tweet))
+                    for award in award_regex:
+                        self.award_hashtag_sets.setdefault(award, Counter())[hashtags] += 1
+
+        # winning tweets -- same filtering as get_winner (reasonable non-retweets; tripwords checked separately)
+        label = self.classifier.label(text)
+        if not label & RETWEET and is_reasonable(label) and indicatesWin(text.lower()):
+            text_lower = text.lower()
+            strict, relaxed = [], []
+            for ggAward in self.people_awards:
+                if isWinningTweet(text, ggAward.keywords):
+                    relaxed.append(ggAward.name)
+                    if not any([t in text_lower for t in ggAward.tripwords]):
+                        strict.append(ggAward.name)
+                        self.strict_hits[ggAward.name] += 1
+            if len(relaxed):
+                if not len(self.pending):
+                    self.pending_since = time.monotonic()
+                self.pending.append((text, strict, relaxed))
+
+        if len(self.pending) >= self.ner_batch_size or \
+                (len(self.pending) and time.monotonic() - self.pending_since > self.max_ner_delay):
+            self.flush()
+
+    def consume(self, tweets: Iterable[Tuple[int, str]], report_every: int = None) -> None:
+        '''Consumes a tweet source; prints the current people-award winners every <report_every> tweets'''
+        for timestamp, text in tweets:
+            self.add(timestamp, text)
+            if report_every and len(self) % report_every == 0:
+                self.report()
+        self.flush()
+
+    def flush(self) -> None:
+        '''Runs NER on the winning tweets waiting in the micro-batch and adds their candidates to the tallies'''
+        if not len(self.pending):
+            return
+        pending, self.pending = self.pending, []
+        for (text, strict, relaxed), people in zip(pending, find_persons_batch([p[0] for p in pending])):
+            for name in strict:
+                tallyWinnerCandidates(self.strict_tallies[name], list(people))
+            for name in relaxed:
+                tallyWinnerCandidates(self.relaxed_tallies[name], list(people))
+
+    # ---------- queries ----------
+    def link_hashtags(self) -> None:
+        '''(Re-)links the hashtags counted so far -- rebuilt from scratch, only when new tweets arrived'''
+        if self.linked_at == len(self.texts):
+            return
+        self.hp.hashtags = HashtagLogger()
+        self.hp.uncased_ordered = None
+        self.hp.hashtag_total_count = 0
+        self.hp.get_candidate_hashtags()
+        self.linked_at = len(self.texts)
+
+    def award_names(self) -> List[str]:
+        '''Current best guess of get_awards'''
+        self.link_hashtags()
+        hashtag_to_parent = self.hp.hashtags.hashtag_to_parent
+        award_hashtags = {}
+        for award, hashtag_sets in self.award_hashtag_sets.items():
+            award_hashtags[award] = Counter()
+            for hashtags, count in hashtag_sets.items():
+                for parent in set([hashtag_to_parent[tag] for tag in hashtags if tag in hashtag_to_parent]):
+                    award_hashtags[award][parent] += count
+        return self.hp.filter_award_names(Counter(self.award_phrase_counter), award_hashtags, verbose=False)
+
+    def people_winners(self) -> Dict[str, str]:
+        '''Current winners of people awards (tally-based, like get_winner)'''
+        self.flush()
+        winners = {}
+        for ggAward in self.people_awards:
+            # as in get_winner: drop the tripword requirement only if no winning tweet passed it
+            tallies = self.strict_tallies if self.strict_hits[ggAward.name] else self.relaxed_tallies
+            winnerCounts = rankWinnerCandidates(tallies[ggAward.name], ggAward.name)
+            winners[ggAward.name] = winnerCounts[0][0] if len(winnerCounts) else "we don't know"
+        return winners
+
+    def winners(self, include_titles: bool = True) -> Dict[str, str]:
+        '''
+        Current best answer of get_winner
+        :param include_titles: if True, also resolve title awards via hashtag co-occurrence -- this re-reads every
+            tweet received so far, so it costs a pass over the stream (people awards are answered from tallies)
+        '''
+        winners = {}
+        if include_titles:
+            award_names = self.award_names()
+            winners.update(self.hp.get_title_award_to_winner(self.texts, award_names, self.title_awards,
+                                                             PEOPLE_WORDS_HARDCODE))
+        winners.update(self.people_winners())
+        return winners
+
+    def report(self) -> None:
+        print('---- %i tweets (last timestamp_ms: %s) ----' % (len(self), self.last_timestamp))
+        for award, winner in self.people_winners().items():
+            print(award, ' WINNER : ', winner)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tally Golden Globes winners while tweets arrive.')
+    parser.add_argument('year', type=int)
+    parser.add_argument('source', choices=['replay', 'tail', 'socket'])
+    parser.add_argument('location', nargs='?', help='JSON-lines file (tail) or host:port (socket)')
+    parser.add_argument('--speedup', type=float, default=None, help='replay pace relative to the ceremony')
+    parser.add_argument('--report-every', type=int, default=10000, help='print current winners every N tweets')
+    args = parser.parse_args()
+
+    if args.source == 'replay':
+        tweets = replay_corpus(args.year, speedup=args.speedup)
+    elif args.source == 'tail':
+        tweets = tail_jsonl(args.location)
+    else:
+        host, port = args.location.rsplit(':', 1)
+        tweets = read_socket(host, int(port))
+
+    live = LiveCeremony(args.year)
+    live.consume(tweets, report_every=args.report_every)
+    print('\n**************************** Award Winners ****************************')
+    for award, winner in live.winners().items():
+        print(award, ' WINNER : ', winner)
+
+
+if __name__ == '__main__':
+    main()
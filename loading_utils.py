@@ -1,26 +1,71 @@
 import ijson
 
-def load_tweet_text_from_json(fp):
-    tweets = []
-    with open(fp, "r") as f:
-        for record in ijson.items(f, "item"):
-            tweets.append({'text': record['text']})
-    return tweets
+# ijson backends, fastest first -- yajl2_c is a C extension, 'python' is always available
+IJSON_BACKEND_PREFERENCE = ['yajl2_c', 'yajl2_cffi', 'yajl2', 'python']
+_ijson_backend = None
 
-def load_all_from_json(fp):
-    tweets = []
-    with open(fp, "r") as f:
-        for record in ijson.items(f, "item"):
-            tweets.append({
-                'id': record['int'],
+
+def get_ijson_backend():
+    """
+    Select the fastest ijson backend installed on this machine (looked up once per process)
+    :return: ijson backend module (exposes items(), kvitems(), parse(), ...)
+    """
+    global _ijson_backend
+    if _ijson_backend is None:
+        for name in IJSON_BACKEND_PREFERENCE:
+            try:
+                _ijson_backend = ijson.get_backend(name)
+                break
+            except ImportError:
+                continue
+    return _ijson_backend
+
+
+def iter_tweet_text_from_json(fp):
+    # stream only the text of each tweet -- no per-tweet record is ever built
+    with open(fp, "rb") as f:
+        for text in get_ijson_backend().items(f, "item.text"):
+            yield text
+
+def iter_all_from_json(fp):
+    with open(fp, "rb") as f:
+        for record in get_ijson_backend().items(f, "item"):
+            yield {
+                'id': record['id'],
                 'text': record['text'],
                 'user': {
                     'id': record['user']['id'],
                     'screen_name': record['user']['screen_name'],
                 },
                 'timestamp_ms': record['timestamp_ms']
-            })
-    return tweets
+            }
 
-# data = load_tweet_text_from_json('gg2015.json')
+def iter_tweet_columns_from_json(fp):
+    # (text, tweet id, user id, timestamp_ms) per tweet; missing numeric fields are reported as -1
+    with open(fp, "rb") as f:
+        for record in get_ijson_backend().items(f, "item"):
+            user = record.get('user') or {}
+            yield (record['text'],
+                   int(record.get('id', -1)),
+                   int(user.get('id', -1)),
+                   int(record.get('timestamp_ms', -1)))
 
+def load_tweet_text_from_json(fp):
+    return [{'text': text} for text in iter_tweet_text_from_json(fp)]
+
+def load_all_from_json(fp):
+    return list(iter_all_from_json(fp))
+
+def iter_tweet_text(data):
+    # accepts raw tweet records (dicts with a 'text' key) or plain tweet strings, e.g. a TweetCorpus
+    for line in data:
+        yield line if isinstance(line, str) else line['text']
+
+def known_length(data):
+    # number of tweets if cheaply known (lists, in-memory corpora), otherwise None (streams)
+    try:
+        return len(data)
+    except TypeError:
+        return None
+
+# data = load_tweet_text_from_json('gg2015.json')
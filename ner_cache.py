@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from typing import Dict, Iterable
+
+# analyses stored per tweet text
+ENTITIES = 'entities'
+NOUN_CHUNKS = 'noun_chunks'
+
+
+def model_key(nlp) -> str:
+    """
+    Identify the model that produced an analysis, e.g. 'spacy-3.3.1/en_core_web_sm-3.3.0'
+    :param nlp: loaded spaCy Language object
+    """
+    import spacy
+    meta = nlp.meta
+    return 'spacy-%s/%s_%s-%s' % (spacy.__version__, meta.get('lang', ''), meta.get('name', ''), meta.get('version', ''))
+
+
+class NERCache(object):
+    def __init__(self, path: str = 'gg_ner_cache.sqlite', model: str = '', max_entries: int = 1000000):
+        """
+        Persistent, content-addressed store of spaCy analyses (SQLite)
+            - key: sha1 of model name/version + tweet text (as given to the model)
+            - value: all (label, text) entity spans and/or the noun chunks of the tweet
+            - bounded to max_entries rows; least recently used rows are evicted first
+        :param path: SQLite file, kept next to the corpus
+        :param model: model identifier (see model_key) -- analyses of other models are never returned
+        :param max_entries: maximum number of cached tweets
+        """
+        self.path = path
+        self.model = model
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn = None
+        self._conn_pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections must not cross a fork -- reconnect in child processes
+        if self._conn is None or self._conn_pid != os.getpid():
+            # concurrent writers (forked award workers) wait for the write lock instead of failing
+            self._conn = sqlite3.connect(self.path, timeout=60)
+            self._conn_pid = os.getpid()
+            self._conn.execute('CREATE TABLE IF NOT EXISTS analyses ('
+                               'key TEXT PRIMARY KEY, entities TEXT, noun_chunks TEXT, last_used REAL)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS analyses_last_used ON analyses (last_used)')
+        return self._conn
+
+    def key(self, text: str) -> str:
+        # the exact text the model ran on: even texts differing only in unicode normalization (NFC / NFD) get
+        # entries of their own, since their entity spans can differ
+        return hashlib.sha1((self.model + '\x00' + text).encode('utf-8')).hexdigest()
+
+    def get_many(self, texts: Iterable[str], analysis: str) -> Dict[str, object]:
+        """
+        :param texts: tweet strings
+        :param analysis: ENTITIES or NOUN_CHUNKS
+        :return: dict of text --> cached analysis, for every text with a cached analysis
+        """
+        conn = self._connection()
+        text_keys = {}
+        for text in texts:
+            text_keys.setdefault(self.key(text), []).append(text)
+
+        found = {}
+        found_keys = []
+        keys = list(text_keys)
+        # stay below SQLite's bound-parameter limit
+        for ix in range(0, len(keys), 500):
+            chunk = keys[ix:ix + 500]
+            rows = conn.execute('SELECT key, %s FROM analyses WHERE key IN (%s) AND %s IS NOT NULL'
+                                % (analysis, ','.join('?' * len(chunk)), analysis), chunk).fetchall()
+            for key, value in rows:
+                found_keys.append(key)
+                value = json.loads(value)
+                for text in text_keys[key]:
+                    found[text] = value
+        if found_keys:
+            now = time.time()
+            conn.executemany('UPDATE analyses SET last_used = ? WHERE key = ?', [(now, k) for k in found_keys])
+            conn.commit()
+
+        self.hits += len(found_keys)
+        self.misses += len(keys) - len(found_keys)
+        return found
+
+    def put_many(self, analyses: Dict[str, object], analysis: str) -> None:
+        """
+        :param analyses: dict of text --> analysis (JSON-serializable)
+        :param analysis: ENTITIES or NOUN_CHUNKS
+        """
+        if not analyses:
+            return
+        conn = self._connection()
+        now = time.time()
+        rows = [(self.key(text), json.dumps(value), now) for text, value in analyses.items()]
+        conn.executemany('INSERT OR IGNORE INTO analyses (key, last_used) VALUES (?, ?)', [(k, t) for k, _, t in rows])
+        conn.executemany('UPDATE analyses SET %s = ?, last_used = ? WHERE key = ?' % analysis,
+                         [(v, t, k) for k, v, t in rows])
+        self._evict(conn)
+        conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        n_entries = conn.execute('SELECT COUNT(*) FROM analyses').fetchone()[0]
+        if n_entries <= self.max_entries:
+            return
+        # drop the least recently used rows, with some slack so we don't evict on every insert
+        n_evict = n_entries - int(self.max_entries * 0.9)
+        conn.execute('DELETE FROM analyses WHERE key IN '
+                     '(SELECT key FROM analyses ORDER BY last_used LIMIT ?)', (n_evict,))
+        self.evictions += n_evict
+
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM analyses').fetchone()[0]
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute('DELETE FROM analyses')
+        conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'entries': len(self)}
+
+    def close(self) -> None:
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
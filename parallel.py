@@ -0,0 +1,106 @@
+import math
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, TypeVar
+from tqdm import tqdm
+
+from loading_utils import iter_tweet_text, known_length
+
+T = TypeVar('T')
+
+# shards handed to each worker (more shards than workers evens out uneven shards)
+SHARDS_PER_WORKER = 4
+# shard size when the number of tweets is unknown up front (streamed corpora)
+DEFAULT_SHARD_SIZE = 10000
+
+
+def get_mp_context():
+    """
+    Prefer fork: workers then share the parent's memory (loaded corpus, models) copy-on-write, and inherit its
+    string hash seed, so set iteration orders -- and therefore merged results -- match the serial path.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def make_executor(n_workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=n_workers, mp_context=get_mp_context())
+
+
+def iter_shards(data, shard_size: int) -> Iterator[List[str]]:
+    """
+    :param data: tweets (dicts with key='text' or strings) or a corpus
+    :param shard_size: number of tweets per shard
+    :return: consecutive lists of tweet strings, in corpus order
+    """
+    shard = []
+    for tweet in iter_tweet_text(data):
+        shard.append(tweet)
+        if len(shard) == shard_size:
+            yield shard
+            shard = []
+    if len(shard):
+        yield shard
+
+
+def map_shards(fn: Callable[[List[str]], T], data, n_workers: int, desc: str = None) -> Iterator[T]:
+    """
+    Run fn over consecutive shards of a corpus in worker processes.
+    Results are yielded in shard order (so merging them in order reproduces a serial left-to-right pass),
+    with at most 2 shards per worker in flight, so streamed corpora are never fully materialized.
+    :param fn: picklable function (module-level function or method of a picklable object) of a list of tweet strings
+    :param data: tweets (dicts with key='text' or strings) or a corpus
+    :param n_workers: number of worker processes
+    :param desc: tqdm description
+    :return: iterator over fn(shard) results
+    """
+    n_tweets = known_length(data)
+    if n_tweets is None:
+        shard_size, n_shards = DEFAULT_SHARD_SIZE, None
+    else:
+        shard_size = max(1, math.ceil(n_tweets / (n_workers * SHARDS_PER_WORKER)))
+        n_shards = math.ceil(n_tweets / shard_size)
+
+    with make_executor(n_workers) as executor:
+        in_flight = deque()
+        for shard in tqdm(iter_shards(data, shard_size), desc=desc, total=n_shards):
+            in_flight.append(executor.submit(fn, shard))
+            if len(in_flight) >= 2 * n_workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+# job run by forked workers (see map_forked) -- inherited through fork instead of being pickled
+_forked_job = None
+
+
+def _run_forked_job(ix: int):
+    return _forked_job(ix)
+
+
+def map_forked(fn: Callable[[int], T], n_jobs: int, n_workers: int, initializer: Callable = None) -> List[T]:
+    """
+    Run fn(0), ..., fn(n_jobs - 1) in forked worker processes.
+    fn and everything it references (loaded models, corpora, indexes) are inherited by the workers copy-on-write,
+    so only job indices and results cross process boundaries; fn may be a closure.
+    Without fork (or with a single worker) the jobs run serially in this process.
+    :param fn: job function of the job index
+    :param n_jobs: number of jobs
+    :param n_workers: number of worker processes
+    :param initializer: optional function run once in every worker before its first job
+    :return: job results, in job order
+    """
+    global _forked_job
+    if n_workers <= 1 or n_jobs <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        return [fn(ix) for ix in range(n_jobs)]
+
+    _forked_job = fn
+    try:
+        with ProcessPoolExecutor(max_workers=min(n_workers, n_jobs), mp_context=multiprocessing.get_context('fork'),
+                                 initializer=initializer) as executor:
+            return list(executor.map(_run_forked_job, range(n_jobs)))
+    finally:
+        _forked_job = None
@@ -0,0 +1,249 @@
+'''
+Scoring engine behind the autograder: a memoized pairwise scorer with the same scores as the original
+implementation. Every result/answer pair is still scored one at a time in Python (difflib), but
+    - every string is normalized and tokenized once (cached across calls)
+    - text_matrix scores all results against one answer with a single difflib.SequenceMatcher, whose token
+      index over the answer (set_seq2) is built once instead of once per pair
+    - pairs without a shared token skip difflib entirely (their score is 0.0 by definition)
+    - pair similarities and edit distances are cached, so repeated scoring (parameter sweeps) mostly hits the cache
+    - spelling uses the C-backed Levenshtein.distance (same plain edit distance as nltk.metrics.edit_distance)
+'''
+import difflib
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from Levenshtein import distance
+
+toMovie = {'johann johannsson': 'the theory of everything', 'alexandre desplat': 'the imitation game', 'trent reznor and atticus ross': 'gone girl', 'antonio sanchez': 'birdman', 'hans zimmer': 'interstellar', 'glory': 'selma', 'big eyes': 'big eyes', 'mercy is': 'noah', 'opportunity': 'annie', 'yellow flicker beat': 'the hunger games mockingjay part 1', 'alejandro gonzalez inarritu': 'birdman', 'wes anderson': 'the grand budapest hotel', 'gillian flynn': 'gone girl', 'richard linklater': 'boyhood', 'graham moore': 'the imitation game'}
+
+# caches are dropped once they hold this many entries
+SCORING_CACHE_MAX_ENTRIES = 1000000
+
+_norm_cache: Dict[str, str] = {}
+_token_cache: Dict[str, List[str]] = {}
+_token_set_cache: Dict[str, frozenset] = {}
+_text_cache: Dict[Tuple[str, str], float] = {}
+_distance_cache: Dict[Tuple[str, str], int] = {}
+
+
+def _bounded(cache: Dict) -> Dict:
+    if len(cache) >= SCORING_CACHE_MAX_ENTRIES:
+        cache.clear()
+    return cache
+
+
+def clear_caches() -> None:
+    for cache in (_norm_cache, _token_cache, _token_set_cache, _text_cache, _distance_cache):
+        cache.clear()
+
+
+def norm_text(textstring):
+    """Takes a string of text and returns a string of normalized text."""
+    normalized = _norm_cache.get(textstring)
+    if normalized is None:
+        normalized = "".join([c.lower() for c in textstring if c.isalnum() or c.isspace()])
+        _bounded(_norm_cache)[textstring] = normalized
+    return normalized
+
+
+def tokens(normstring):
+    tokenized = _token_cache.get(normstring)
+    if tokenized is None:
+        tokenized = normstring.split()
+        _bounded(_token_cache)[normstring] = tokenized
+    return tokenized
+
+
+def token_set(normstring):
+    tokenset = _token_set_cache.get(normstring)
+    if tokenset is None:
+        tokenset = frozenset(tokens(normstring))
+        _bounded(_token_set_cache)[normstring] = tokenset
+    return tokenset
+
+
+def _text_with_matcher(resultstr, answerstr, matcher):
+    # text() with a SequenceMatcher whose second sequence is already set to the answer tokens
+    result = tokens(resultstr)
+    answer = tokens(answerstr)
+
+    len_result = len(result)
+    len_answer = len(answer)
+
+    if (resultstr in answerstr) or (answerstr in resultstr):
+        textscore = min(len_result, len_answer)/float(max(len_result, len_answer))
+    elif token_set(resultstr).isdisjoint(token_set(answerstr)):
+        # no common token: the longest match is empty
+        textscore = 0.0
+    else:
+        s = matcher if matcher is not None else difflib.SequenceMatcher(None, None, answer)
+        s.set_seq1(result)
+
+        longest = s.find_longest_match(0, len_result, 0, len_answer)
+        longest = longest.size/float(max(len_result, len_answer))
+
+        if longest > 0.3:
+            matchlen = sum([m[2] for m in s.get_matching_blocks() if m[2] > 1])
+            textscore = float(matchlen)/max(len_result, len_answer)
+        else:
+            textscore = longest
+
+    return textscore
+
+
+def text(resultstr, answerstr):
+    """Accepts two normalized texts, as output by the norm_text
+    function, and returns a score based on the match length relative
+    to the longest text length."""
+    key = (resultstr, answerstr)
+    score = _text_cache.get(key)
+    if score is None:
+        score = _text_with_matcher(resultstr, answerstr, None)
+        _bounded(_text_cache)[key] = score
+    return score
+
+
+def text_matrix(results: Iterable[str], answers: Iterable[str]) -> Dict[Tuple[str, str], float]:
+    """
+    :param results: normalized result strings
+    :param answers: normalized answer strings
+    :return: {(result, answer): text(result, answer)} for every pair (a dict filled pair by pair, memoized)
+    """
+    results = list(results)
+    scores = {}
+    for answerstr in answers:
+        matcher = None
+        for resultstr in results:
+            key = (resultstr, answerstr)
+            score = _text_cache.get(key)
+            if score is None:
+                if matcher is None:
+                    matcher = difflib.SequenceMatcher(None, None, tokens(answerstr))
+                score = _text_with_matcher(resultstr, answerstr, matcher)
+                _bounded(_text_cache)[key] = score
+            scores[key] = score
+    return scores
+
+
+def edit_distance(r, a):
+    key = (r, a)
+    d = _distance_cache.get(key)
+    if d is None:
+        d = distance(r, a)
+        _bounded(_distance_cache)[key] = d
+    return d
+
+
+def spell_check(r, a, s, scores, weight=1):
+    change = weight*(1-(edit_distance(r, a)/float(max(len(r), len(a)))))
+    if s in scores:
+        # penalty for returning multiple of the same result when
+        # one instance is incorrectly spelled
+        return (scores[s] + change)/2.0
+    else:
+        return change
+
+
+def calc_translation(result, answer):
+    '''Accepts two lists of strings, determines the best matches
+    between them, and returns a translation dictionary and
+    score.'''
+
+    resultmap = {norm_text(r): r for r in result}
+    answermap = {norm_text(a): a for a in answer}
+    result = set(resultmap.keys())
+    answer = set(answermap.keys())
+
+    intersection = result.intersection(answer)
+    translation = {resultmap[i]: answermap[i] for i in intersection}
+    scores = dict(list(zip(list(translation.values()), [1]*len(intersection))))
+    score_by_results = {}
+    score_by_answers = {}
+
+    # loop through results that didn't have a perfect match
+    # and get a score for each of them.
+    comp = list(result - intersection)
+    similarity = text_matrix(comp, answer)
+
+    for r in comp:
+        score_by_results[r] = Counter()
+        for a in answer:
+            if a not in score_by_answers:
+                score_by_answers[a] = Counter()
+
+            score_by_results[r][a] = similarity[(r, a)]
+            score_by_answers[a][r] = score_by_results[r][a]
+
+    for r in score_by_results:
+        cnt = 0
+        ranking = score_by_results[r].most_common()
+        flag = True
+        while flag:
+            # The answer that best matches the result
+            answer_match = ranking[cnt][0]
+            # The top result matching that answer
+            max_result = score_by_answers[answer_match].most_common(1)[0]
+
+            if score_by_results[r][answer_match] < 0.45:
+                bestAnswer = False
+                score = 0
+
+                # Unacceptably low score.
+                # Check if we have a case of returning the movie instead
+                # of the person, or vice versa.
+                for ha in toMovie:
+                    tempScore = text(r, ha)
+                    if tempScore > score:
+                        score = tempScore
+                        bestAnswer = ha
+
+                if bestAnswer and score > 0.45:
+                    translation[resultmap[r]] = toMovie[ha]
+                    scores[toMovie[ha]] = spell_check(r, ha, toMovie[ha], scores, 0.5)
+
+                flag = False
+            elif (max_result[0] == r) or (score_by_results[r][answer_match] > score_by_answers[answer_match][max_result[0]]):
+                # if the top result matching that answer is our current result or
+                # if the current result's score is greater than the previous top result
+                translation[resultmap[r]] = answermap[answer_match]
+                scores[answermap[answer_match]] = spell_check(r, answer_match, answer_match, scores)
+                flag = False
+
+            cnt += 1
+            if cnt == len(ranking):
+                flag = False
+
+    if scores:
+        return sum(scores.values())/float(len(scores)), translation
+    else:
+        return 0, translation
+
+
+def calc_score(result, answer):
+    result = set(result)
+    intersection = result.intersection(answer)
+    len_intersection = len(intersection)
+    len_union = len(result.union(answer))
+    len_result = len(result)
+    len_answer = len(answer)
+
+    if len_union == 0:
+        return 0
+    elif len_result == len_answer and len_intersection == len_answer:
+        m = 1.0
+    elif len_intersection == len_result:
+        # all results correspond to a correct answer, but some
+        # answers are missing
+        m = 0.95
+    elif len_intersection == len_answer:
+        # all answers correspond to a result, but there are
+        # some extra results as well
+        m = 0.9
+    elif len_intersection > 0:
+        # there is some post-translation intersection between
+        # results and answers.
+        m = 0.85
+    else:
+        return 0
+
+    return (len_intersection / float(len_union)) * m
@@ -1,5 +1,6 @@
 import re
-from typing import List, Set
+from collections import deque
+from typing import Dict, FrozenSet, List, Set
 
 # hardcoded regex rules
 ACCOUNT_REGEX = r"@[^\W]+"
@@ -39,6 +40,80 @@ def clean_tweet(tweet_string: str,
     return re.sub(r' +', ' ', tweet_string).strip()
 
 
+class MultiPatternMatcher(object):
+    def __init__(self, groups: Dict[str, List[str]]):
+        """
+        Finds all configured literal phrases in a text in one left-to-right pass (Aho-Corasick)
+        (replaces repeated `any(word in text for word in LIST)` scans)
+            - the phrases are built into a trie whose failure links are folded into a full transition table,
+              so the scan is one dict lookup per character, however many phrases there are
+            - every state knows the phrases ending at it (its own and those of its failure chain)
+        :param groups: group name --> list of phrases, e.g. {'win': ['won', 'win', 'goes to']}
+        """
+        self.groups = {group: list(phrases) for group, phrases in groups.items()}
+        phrase_groups = {}
+        for group, phrases in self.groups.items():
+            for phrase in phrases:
+                if len(phrase):
+                    phrase_groups.setdefault(phrase, set()).add(group)
+        self._groups_of: Dict[str, FrozenSet[str]] = {phrase: frozenset(g) for phrase, g in phrase_groups.items()}
+
+        # trie: state --> {character: next state}; state 0 is the root
+        goto: List[Dict[str, int]] = [{}]
+        ends: List[Set[str]] = [set()]
+        for phrase in phrase_groups:
+            state = 0
+            for ch in phrase:
+                if ch not in goto[state]:
+                    goto[state][ch] = len(goto)
+                    goto.append({})
+                    ends.append(set())
+                state = goto[state][ch]
+            ends[state].add(phrase)
+
+        # breadth first, so the failure state (the longest proper suffix in the trie) of a state is complete
+        # before the state itself: copy in its transitions and the phrases ending at it
+        fail = [0] * len(goto)
+        self._delta: List[Dict[str, int]] = [dict(transitions) for transitions in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in goto[state].items():
+                fail[next_state] = self._delta[fail[state]].get(ch, 0)
+                queue.append(next_state)
+            for ch, next_state in self._delta[fail[state]].items():
+                self._delta[state].setdefault(ch, next_state)
+            ends[state] |= ends[fail[state]]
+        self._ends: List[FrozenSet[str]] = [frozenset(phrases) for phrases in ends]
+
+    def any_in(self, text: str) -> bool:
+        delta, ends = self._delta, self._ends
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if ends[state]:
+                return True
+        return False
+
+    def phrases_in(self, text: str) -> Set[str]:
+        # every distinct configured phrase that occurs in text
+        delta, ends = self._delta, self._ends
+        found = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if ends[state]:
+                found |= ends[state]
+        return found
+
+    def groups_in(self, text: str) -> Set[str]:
+        # every group with at least one phrase occurring in text
+        found = set()
+        for phrase in self.phrases_in(text):
+            found.update(self._groups_of[phrase])
+        return found
+
+
 def tweet_to_alphanumeric(tweet_string: str) -> str:
     """
     Util for removing all spacing + symbols of a tweet. Can be used to find hashtags that map to NL utterances.
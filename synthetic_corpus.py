@@ -0,0 +1,252 @@
+'''Deterministic synthetic award-show tweet corpora, for benchmarking at scales beyond the real dumps.
+
+    python synthetic_corpus.py 100k                     # writes synthetic_100k/gg2015.json (+ answers, configs)
+    python synthetic_corpus.py 10m --out-dir /data/gg10m --seed 3
+    python benchmark.py 2015 --dir synthetic_100k       # run the stage benchmark on it
+
+The same size, year and seed always produce byte-identical files. Tweets follow the gg<year>.json schema
+(text, id, user.id, user.screen_name, timestamp_ms) and are written one at a time, so 10M tweets never
+have to fit in memory.
+'''
+import os
+import re
+import json
+import shutil
+import random
+import argparse
+from collections import deque
+from typing import Dict, Iterator
+
+from gg_api import OFFICIAL_AWARDS_1315
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SIZES = {'100k': 100000, '1m': 1000000, '10m': 10000000}
+PEOPLE_WORDS = ['actor', 'actress', 'director', 'cecil']
+# words dropped from award names when turning them into hashtags (#BestActressMotion)
+AWARD_HASHTAG_STOPWORDS = ['in', 'a', 'an', 'or', 'by', 'for', 'made', 'b.']
+
+# ceremony start (timestamp_ms); the corpus covers the red carpet before and the chatter after the show
+CEREMONY_START = {2013: 1358125200000, 2015: 1421020800000}
+PRE_SHOW_MS = 60 * 60 * 1000
+SHOW_MS = 3 * 60 * 60 * 1000
+POST_SHOW_MS = 60 * 60 * 1000
+
+# share of each kind of tweet; retweets copy a recent tweet ("RT @user: ...")
+TWEET_MIX = [('win', 0.24), ('hypothetical', 0.12), ('presenter', 0.06), ('host', 0.04),
+             ('retweet', 0.22), ('chatter', 0.32)]
+# win tweets are about the latest announced award with this probability (--> announcement bursts)
+LATEST_AWARD_PROBABILITY = 0.7
+# recent tweets retweets are drawn from
+RETWEET_POOL_SIZE = 2000
+# per-hashtag chance of a casing variant / a typo
+HASHTAG_CASE_VARIANT_PROBABILITY = 0.05
+HASHTAG_TYPO_PROBABILITY = 0.02
+
+FIRST_NAMES = ['Amy', 'Tina', 'George', 'Julianne', 'Eddie', 'Michael', 'Kevin', 'Maggie', 'Ruth', 'Gina', 'Richard',
+               'Patricia', 'Joanne', 'Jeffrey', 'Matt', 'Billy', 'Emma', 'Jessica', 'Keira', 'Meryl', 'Clive',
+               'Viola', 'Bill', 'David', 'Jennifer', 'Reese', 'Benedict', 'Lena', 'Mark', 'Helen', 'Colin', 'Salma']
+LAST_NAMES = ['Poehler', 'Fey', 'Clooney', 'Moore', 'Redmayne', 'Keaton', 'Spacey', 'Gyllenhaal', 'Wilson',
+              'Rodriguez', 'Linklater', 'Arquette', 'Froggatt', 'Tambor', 'Bomer', 'Thornton', 'Stone', 'Chastain',
+              'Knightley', 'Streep', 'Owen', 'Davis', 'Murray', 'Fincher', 'Aniston', 'Witherspoon', 'Cumberbatch',
+              'Dunham', 'Ruffalo', 'Mirren', 'Farrell', 'Hayek']
+TITLE_WORDS = ['boyhood', 'birdman', 'selma', 'fargo', 'transparent', 'affair', 'ida', 'leviathan', 'whiplash',
+               'foxcatcher', 'interstellar', 'annie', 'noah', 'woods', 'dragon', 'hotel', 'game', 'girl', 'theory',
+               'everything', 'house', 'cards', 'thrones', 'detective', 'missing', 'heart', 'silicon', 'valley',
+               'orange', 'black', 'lego', 'movie', 'book', 'life', 'eyes', 'vice', 'night', 'crawler', 'pride']
+
+WIN_SUFFIX_TEMPLATES = ['{award} {suffix} {winner}!', '{award} {suffix} {winner} #{tag}', 'And {award} {suffix}... {winner}']
+WIN_PREFIX_TEMPLATES = ['{winner} {prefix}{modifier} {award}!', '{winner} {prefix}{modifier} {award} #{tag}',
+                        'YES! {winner} {prefix}{modifier} {award}']
+WIN_OTHER_TEMPLATES = ['Congrats {winner} on winning {award}! #{tag}', 'So happy {winner} won {award}',
+                       '{winner} just won {award} #GoldenGlobes']
+HYPOTHETICAL_TEMPLATES = ['I hope {nominee} wins {award}', '{nominee} should win {award} #{tag}',
+                          '{nominee} is nominated for {award}', 'Rooting for {nominee} to win {award}',
+                          '{nominee} better win {award} tonight']
+PRESENTER_TEMPLATES = ['{presenter} presenting {award}', '{presenter} and {presenter2} present {award}',
+                       '{presenter} announces {award} #GoldenGlobes', 'Loved {presenter} presenting tonight']
+HOST_TEMPLATES = ['{host} and {host2} hosting the #GoldenGlobes', '{host} is killing it as host',
+                  '{host} and {host2} are the best hosts #GoldenGlobes']
+CHATTER_TEMPLATES = ['{name} looks amazing on the red carpet #RedCarpet', '#GoldenGlobes {name} #{tag}',
+                     '{title} was robbed #{tag}', 'Watching the #GoldenGlobes with friends', '{name} in that dress #{tag}',
+                     'Who is wearing what? #RedCarpet #GoldenGlobes']
+
+
+def parse_size(size: str) -> int:
+    # '100k', '1m', '10m' or a plain number of tweets
+    return SIZES[size.lower()] if size.lower() in SIZES else int(size)
+
+
+def camel_hashtag(words: str) -> str:
+    return ''.join(word[:1].upper() + word[1:] for word in re.findall(r'\w+', words))
+
+
+def short_award_name(award: str) -> str:
+    # how people actually tweet award names, e.g. 'best actress in a motion picture drama'
+    return award.replace('performance by an ', '').replace(' - ', ' ').replace(',', '')
+
+
+class SyntheticCeremony(object):
+    def __init__(self, year: int = 2015, seed: int = 0):
+        """
+        A fictional ceremony over the official award catalog: hosts, and per award its nominees, winner,
+        presenters and announcement time, all drawn deterministically from <seed>.
+        :param year: ceremony year (sets the timestamps)
+        :param seed: random seed
+        """
+        self.year = int(year)
+        self.random = random.Random(seed)
+        with open(os.path.join(REPO_DIR, 'award_word_config.json')) as f:
+            self.award_word_config = json.load(f)
+
+        people = [first + ' ' + last for first in FIRST_NAMES for last in LAST_NAMES]
+        self.random.shuffle(people)
+        titles = sorted(set(' '.join(self.random.sample(TITLE_WORDS, self.random.choice([1, 1, 2, 3])))
+                            for _ in range(200)))
+        self.random.shuffle(titles)
+
+        self.hosts = people[:2]
+        self.awards = list(OFFICIAL_AWARDS_1315)
+        self.random.shuffle(self.awards)  # announcement order
+        self.start = CEREMONY_START.get(self.year, CEREMONY_START[2015])
+        self.award_data = {}
+        for ix, award in enumerate(self.awards):
+            is_people_award = any(word in award for word in PEOPLE_WORDS)
+            pool = people[2:] if is_people_award else titles
+            nominees = self.random.sample(pool, 1 if 'cecil' in award else 5)
+            self.award_data[award] = {
+                'nominees': nominees,
+                'winner': nominees[0],
+                'presenters': self.random.sample(people[2:], self.random.choice([1, 2])),
+                'announced': self.start + int((ix + 0.5) * SHOW_MS / len(self.awards)),
+                'mentions': [award, short_award_name(award)],
+                'hashtag': camel_hashtag(' '.join([word for word in short_award_name(award).split()
+                                                   if word not in AWARD_HASHTAG_STOPWORDS][:3]))
+            }
+        self.names = people[:200]
+        self.titles = titles
+
+    def answers(self) -> Dict:
+        # ground truth in the autograder's gg<year>answers.json format
+        return {'hosts': [host.lower() for host in self.hosts],
+                'award_data': {award: {'nominees': [n.lower() for n in data['nominees'][1:]],
+                                       'presenters': [p.lower() for p in data['presenters']],
+                                       'winner': data['winner'].lower()}
+                               for award, data in self.award_data.items()}}
+
+    def hashtag(self, words: str) -> str:
+        tag = camel_hashtag(words)
+        r = self.random.random()
+        if r < HASHTAG_CASE_VARIANT_PROBABILITY:
+            tag = self.random.choice([tag.lower(), tag.upper()])
+        elif r < HASHTAG_CASE_VARIANT_PROBABILITY + HASHTAG_TYPO_PROBABILITY and len(tag) > 3:
+            ix = self.random.randrange(1, len(tag) - 1)
+            tag = tag[:ix] + tag[ix + 1:]
+        return tag
+
+    def tweet_kind(self) -> str:
+        r = self.random.random()
+        for kind, share in TWEET_MIX:
+            if r < share:
+                return kind
+            r -= share
+        return TWEET_MIX[-1][0]
+
+    def text(self, timestamp: int, retweet_pool: deque) -> str:
+        r = self.random
+        kind = self.tweet_kind()
+        announced = [award for award in self.awards if self.award_data[award]['announced'] <= timestamp]
+        upcoming = self.awards[len(announced):]
+
+        if kind == 'retweet' and len(retweet_pool):
+            screen_name, text = r.choice(retweet_pool)
+            return 'RT @%s: %s' % (screen_name, text)
+        if kind == 'win' and len(announced):
+            award = announced[-1] if r.random() < LATEST_AWARD_PROBABILITY else r.choice(announced)
+            data = self.award_data[award]
+            fields = {'award': r.choice(data['mentions']), 'winner': data['winner'],
+                      'tag': r.choice([self.hashtag(data['winner']), data['hashtag']])}
+            style = r.random()
+            if style < 0.4:
+                return r.choice(WIN_SUFFIX_TEMPLATES).format(suffix=r.choice(self.award_word_config['award_suffix_phrases']), **fields)
+            if style < 0.8:
+                modifier = r.choice([''] + self.award_word_config['award_prefix_modifiers'])
+                return r.choice(WIN_PREFIX_TEMPLATES).format(prefix=r.choice(self.award_word_config['award_prefix_phrases']),
+                                                             modifier=modifier, **fields)
+            return r.choice(WIN_OTHER_TEMPLATES).format(**fields)
+        if kind in ('win', 'hypothetical') and len(upcoming):
+            award = upcoming[0] if r.random() < 0.5 else r.choice(upcoming)
+            data = self.award_data[award]
+            nominee = r.choice(data['nominees'])
+            return r.choice(HYPOTHETICAL_TEMPLATES).format(nominee=nominee, award=r.choice(data['mentions']),
+                                                           tag=self.hashtag(nominee))
+        if kind == 'presenter' and len(upcoming):
+            data = self.award_data[upcoming[0]]
+            presenters = data['presenters'] * 2
+            return r.choice(PRESENTER_TEMPLATES).format(presenter=presenters[0], presenter2=presenters[1],
+                                                        award=r.choice(data['mentions']))
+        if kind == 'host':
+            return r.choice(HOST_TEMPLATES).format(host=self.hosts[0], host2=self.hosts[1])
+        name = r.choice(self.names)
+        title = r.choice(self.titles)
+        return r.choice(CHATTER_TEMPLATES).format(name=name, title=title.title(),
+                                                  tag=self.hashtag(r.choice([name, title, 'golden globes'])))
+
+    def tweets(self, n_tweets: int) -> Iterator[Dict]:
+        """
+        :param n_tweets: corpus size
+        :return: tweet records in timestamp order, in the gg<year>.json schema
+        """
+        first = self.start - PRE_SHOW_MS
+        span = PRE_SHOW_MS + SHOW_MS + POST_SHOW_MS
+        n_users = max(1000, n_tweets // 20)
+        retweet_pool = deque(maxlen=RETWEET_POOL_SIZE)
+        for ix in range(n_tweets):
+            timestamp = first + ix * span // n_tweets
+            user_id = self.random.randrange(n_users)
+            screen_name = 'user%i' % user_id
+            text = self.text(timestamp, retweet_pool)
+            if not text.startswith('RT @'):
+                retweet_pool.append((screen_name, text))
+            yield {'text': text, 'id': 550000000000000000 + ix, 'user': {'id': user_id, 'screen_name': screen_name},
+                   'timestamp_ms': timestamp}
+
+
+def write_corpus(out_dir: str, n_tweets: int, year: int = 2015, seed: int = 0) -> str:
+    """
+    Writes a self-contained run directory: gg<year>.json (streamed, one tweet at a time), the matching
+    gg<year>answers.json ground truth, and the parser configs the pipeline reads from its working directory.
+    :return: path of the corpus
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    ceremony = SyntheticCeremony(year, seed)
+    fp = os.path.join(out_dir, 'gg%i.json' % ceremony.year)
+    with open(fp, 'w') as f:
+        f.write('[')
+        for ix, tweet in enumerate(ceremony.tweets(n_tweets)):
+            if ix:
+                f.write(', ')
+            f.write(json.dumps(tweet))
+        f.write(']')
+    with open(os.path.join(out_dir, 'gg%ianswers.json' % ceremony.year), 'w') as f:
+        json.dump(ceremony.answers(), f, indent=2)
+    for config in ['award_word_config.json', 'hashtag_parser_config_%i.json' % ceremony.year]:
+        if os.path.exists(os.path.join(REPO_DIR, config)):
+            shutil.copy(os.path.join(REPO_DIR, config), os.path.join(out_dir, config))
+    return fp
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a deterministic synthetic award-show tweet corpus')
+    parser.add_argument('size', help='number of tweets: 100k, 1m, 10m or any integer')
+    parser.add_argument('--year', type=int, default=2015)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out-dir', default=None, help='default: synthetic_<size>')
+    args = parser.parse_args()
+
+    out_dir = args.out_dir or 'synthetic_' + args.size.lower()
+    fp = write_corpus(out_dir, parse_size(args.size), args.year, args.seed)
+    print('Wrote', fp)
+
+
+if __name__ == '__main__':
+    main()
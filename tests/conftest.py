@@ -0,0 +1,28 @@
+import os
+import sys
+import json
+
+import pytest
+
+# the modules live at the top level of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import clear_corpus_cache
+
+
+def write_corpus(directory, texts, year=2015):
+    # gg<year>.json dump of the given tweet texts, one tweet a minute
+    tweets = [{'id': ix, 'text': text, 'user': {'id': 1, 'screen_name': 'a'}, 'timestamp_ms': 60000 * ix}
+              for ix, text in enumerate(texts)]
+    with open(os.path.join(str(directory), 'gg%s.json' % year), 'w') as f:
+        json.dump(tweets, f)
+
+
+@pytest.fixture
+def corpus_dir(request, tmp_path, monkeypatch):
+    '''working directory holding gg2015.json with the TEXTS of the test module, and no cached corpus'''
+    write_corpus(tmp_path, request.module.TEXTS)
+    monkeypatch.chdir(tmp_path)
+    clear_corpus_cache()
+    yield tmp_path
+    clear_corpus_cache()
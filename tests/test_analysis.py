@@ -0,0 +1,37 @@
+import pytest
+
+import gg_api
+
+TEXTS = ['Boyhood wins best motion picture drama', 'I hope Boyhood wins', 'Amy Adams wins best actress',
+         'RT Boyhood wins best motion picture drama']
+
+
+@pytest.fixture
+def analysis(corpus_dir):
+    return gg_api.CeremonyAnalysis(2015)
+
+
+def test_transient_artifact_is_dropped_once_its_consumers_are_computed(analysis, monkeypatch):
+    monkeypatch.setattr(gg_api, 'BURST_WINDOWS', True)
+    ids, index = analysis.reasonable_tweets
+    assert ids == [0, 2]
+
+    analysis.announcement_bursts
+    assert 'reasonable_tweets' in analysis.computed()
+
+    # stands in for the (NER-backed) winners
+    analysis._artifacts['winners'] = {}
+    analysis.release()
+    assert 'reasonable_tweets' not in analysis.computed()
+    assert 'announcement_bursts' in analysis.computed()
+
+    # recomputed on access, then dropped again
+    assert analysis.reasonable_tweets[0] == ids
+    assert 'reasonable_tweets' not in analysis.computed()
+
+
+def test_announcement_bursts_do_not_hold_transients_without_burst_windows(analysis, monkeypatch):
+    monkeypatch.setattr(gg_api, 'BURST_WINDOWS', False)
+    analysis._artifacts['winners'] = {}
+    assert analysis.reasonable_tweets[0] == [0, 2]
+    assert 'reasonable_tweets' not in analysis.computed()
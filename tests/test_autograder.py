@@ -0,0 +1,76 @@
+import os
+import json
+import shutil
+
+import pytest
+
+import autograder
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def answers_dir(tmp_path):
+    # answer key for 2015 only
+    shutil.copy(os.path.join(REPO_DIR, 'gg2015answers.json'), str(tmp_path / 'gg2015answers.json'))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def answer_key(answers_dir):
+    with open(os.path.join(answers_dir, 'gg2015answers.json')) as f:
+        return json.load(f)
+
+
+@pytest.fixture(autouse=True)
+def no_live_pipeline(monkeypatch):
+    def live_results(year, info_type):
+        raise AssertionError('graded %s of a results file with the live pipeline' % info_type)
+    monkeypatch.setattr(autograder, 'live_results', live_results)
+
+
+def write_results(path, output):
+    with open(str(path), 'w') as f:
+        json.dump(output, f)
+    return str(path)
+
+
+def test_partial_results_file_scores_missing_categories_zero(tmp_path, answers_dir, answer_key):
+    awards = list(answer_key['award_data'])[:3]
+    partial = {'hosts': answer_key['hosts'],
+               'award_data': {award: {'winner': answer_key['award_data'][award]['winner']} for award in awards}}
+    fp = write_results(tmp_path / 'gg2015results.json', partial)
+
+    scores = autograder.main(['2015'], autograder.GRADING, [fp], answers_dir)['2015']
+
+    assert scores['hosts'] == {'spelling': 1.0, 'completeness': 1.0}
+    for g in ['awards', 'nominees', 'presenters']:
+        assert scores[g] == {'spelling': 0, 'completeness': 0}
+    # only the awards present in the file count
+    assert scores['winner']['spelling'] == pytest.approx(3 / 26.0)
+
+
+def test_results_file_without_award_data_or_with_bad_content(tmp_path, answers_dir):
+    fp = write_results(tmp_path / 'gg2015results.json', {'hosts': ['amy poehler']})
+    scores = autograder.main(['2015'], autograder.GRADING, [fp], answers_dir)['2015']
+    assert scores['winner'] == {'spelling': 0}
+
+    fp = write_results(tmp_path / 'gg2015answers.json.bak', ['not', 'a', 'results', 'file'])
+    with pytest.raises(ValueError):
+        autograder.main(['2015'], autograder.GRADING, [fp], answers_dir)
+
+
+def test_year_is_taken_from_the_results_file_name(tmp_path, answers_dir, answer_key):
+    fp = write_results(tmp_path / 'gg2015results.json', answer_key)
+    # no 2013 answer key: the file must not be graded for 2013
+    scores = autograder.main(autograder.YEARS, ['hosts'], [fp], answers_dir)
+    assert list(scores) == ['2015']
+
+
+def test_results_file_without_year_needs_one_selected_year(tmp_path, answers_dir, answer_key):
+    fp = write_results(tmp_path / 'run_results.json', answer_key)
+    with pytest.raises(ValueError, match='select one year'):
+        autograder.main(autograder.YEARS, ['hosts'], [fp], answers_dir)
+
+    scores = autograder.main(['2015'], ['hosts'], [fp], answers_dir)
+    assert scores['2015']['hosts'] == {'spelling': 1.0, 'completeness': 1.0}
@@ -0,0 +1,27 @@
+from corpus import get_corpus, write_binary_corpus
+from corpus import TweetCorpus, StreamingTweetCorpus, MappedTweetCorpus
+
+TEXTS = ['Amy Poehler hosts', 'Boyhood wins best motion picture - drama', 'Tina Fey hosts']
+
+
+def test_requested_kind_replaces_a_cached_corpus_of_the_other_kind(corpus_dir):
+    in_memory = get_corpus(2015)
+    assert isinstance(in_memory, TweetCorpus)
+    assert get_corpus(2015) is in_memory
+
+    streamed = get_corpus(2015, stream=True)
+    assert isinstance(streamed, StreamingTweetCorpus)
+    assert list(streamed) == TEXTS
+    # no preference: the cached corpus, whatever its kind
+    assert get_corpus(2015) is streamed
+
+    assert isinstance(get_corpus(2015, stream=False), TweetCorpus)
+
+
+def test_binary_corpus_always_wins(corpus_dir):
+    get_corpus(2015, stream=False)
+    write_binary_corpus(2015)
+    for stream in [None, True, False]:
+        mapped = get_corpus(2015, stream=stream)
+        assert isinstance(mapped, MappedTweetCorpus)
+        assert list(mapped) == TEXTS
@@ -0,0 +1,13 @@
+import os
+import sys
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_gg_api_does_not_load_spacy():
+    # a clean interpreter: the spaCy model (and spaCy itself) is only loaded once NER is needed
+    code = "import gg_api, sys; assert 'spacy' not in sys.modules, 'spacy imported by import gg_api'"
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,48 @@
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+
+import gg_api
+import instrumentation
+from instrumentation import Instrumentation, recorder, stage, count
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(instrumentation, 'ENABLED', True)
+    recorder.reset()
+    yield
+    recorder.reset()
+
+
+def test_merge_adds_up_snapshots(enabled):
+    worker = Instrumentation()
+    with worker.stage('job', 3):
+        pass
+    worker.count('found', 2)
+
+    parent = Instrumentation()
+    parent.merge(worker.snapshot())
+    parent.merge(worker.snapshot())
+    assert parent.stats['job'].calls == 2
+    assert parent.stats['job'].items == 6
+    assert parent.counters == {'found': 4}
+
+
+def award_job(ix):
+    with stage('test.award_job', 1):
+        count('test.award_jobs')
+    return ix, ['award %d' % ix]
+
+
+@pytest.mark.parametrize('n_workers', [1, 3])
+def test_award_jobs_report_their_instrumentation_to_the_parent(enabled, monkeypatch, capsys, n_workers):
+    monkeypatch.setattr(gg_api, 'AWARD_N_WORKERS', n_workers)
+    # no model needed: the jobs don't run NER
+    monkeypatch.setattr(gg_api, 'get_ner', lambda: SimpleNamespace(n_process=1))
+
+    assert gg_api.run_award_jobs([partial(award_job, ix) for ix in range(6)]) == list(range(6))
+    assert capsys.readouterr().out.split('\n')[:6] == ['award %d' % ix for ix in range(6)]
+    assert recorder.stats['test.award_job'].calls == 6
+    assert recorder.counters['test.award_jobs'] == 6
@@ -0,0 +1,37 @@
+import unicodedata
+from types import SimpleNamespace
+
+from ner_cache import NERCache, ENTITIES
+from entity_extraction import EntityExtractor, PERSON
+
+NFC = unicodedata.normalize('NFC', 'Beyoncé presents best actor')
+NFD = unicodedata.normalize('NFD', NFC)
+
+
+class EchoNLP(object):
+    # stand-in for a spaCy pipeline: the first word of every text is a PERSON entity
+    pipe_names = ['ner']
+
+    def pipe(self, texts, **kwargs):
+        for text in texts:
+            yield SimpleNamespace(ents=[SimpleNamespace(label_=PERSON, text=text.split()[0])])
+
+
+def test_nfc_and_nfd_texts_have_separate_entries(tmp_path):
+    assert NFC != NFD
+    cache = NERCache(str(tmp_path / 'cache.sqlite'), model='test')
+    cache.put_many({NFC: [[PERSON, NFC.split()[0]]]}, ENTITIES)
+
+    assert cache.key(NFC) != cache.key(NFD)
+    assert cache.get_many([NFD], ENTITIES) == {}
+    assert cache.get_many([NFC], ENTITIES) == {NFC: [[PERSON, NFC.split()[0]]]}
+
+
+def test_cached_entities_match_the_text_analyzed(tmp_path):
+    cache = NERCache(str(tmp_path / 'cache.sqlite'), model='test')
+    ner = EntityExtractor(EchoNLP(), cache=cache)
+
+    assert ner.extract_entities([NFC]) == [[NFC.split()[0]]]
+    # a cache hit for the NFC text must not answer for the NFD one
+    assert ner.extract_entities([NFD, NFC]) == [[NFD.split()[0]], [NFC.split()[0]]]
+    assert cache.stats()['entries'] == 2
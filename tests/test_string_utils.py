@@ -0,0 +1,24 @@
+import random
+
+from string_utils import MultiPatternMatcher
+
+
+def test_matcher_finds_overlapping_and_nested_phrases():
+    matcher = MultiPatternMatcher({'win': ['won', 'win', 'goes to', 'wins'], 'host': ['host', 'hosts', 'st']})
+    text = 'amy poehler hosts and boyhood wins -- best picture goes to boyhood'
+    assert matcher.phrases_in(text) == {'hosts', 'host', 'st', 'win', 'wins', 'goes to'}
+    assert matcher.groups_in(text) == {'win', 'host'}
+    assert matcher.any_in(text)
+    assert not matcher.any_in('nothing to see here')
+    assert not MultiPatternMatcher({'empty': ['']}).any_in('anything')
+
+
+def test_matcher_agrees_with_substring_checks():
+    rng = random.Random(0)
+    for _ in range(2000):
+        groups = {group: [''.join(rng.choice('ab c') for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(0, 5))]
+                  for group in 'xyz'[:rng.randint(1, 3)]}
+        text = ''.join(rng.choice('ab c') for _ in range(rng.randint(0, 30)))
+        matcher = MultiPatternMatcher(groups)
+        assert matcher.phrases_in(text) == {p for phrases in groups.values() for p in phrases if p in text}
+        assert matcher.groups_in(text) == {g for g, phrases in groups.items() if any(p in text for p in phrases)}
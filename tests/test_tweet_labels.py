@@ -0,0 +1,25 @@
+from conftest import write_corpus
+from corpus import get_corpus, clear_corpus_cache
+from tweet_labels import get_tweet_labels, HYPOTHETICAL, HISTORICAL
+
+TEXTS = ['Amy Poehler hosts', 'I hope Boyhood wins', 'Tina Fey hosted in 2013']
+
+
+def test_labels_are_shared_per_corpus(corpus_dir):
+    labels = get_tweet_labels(2015)
+    assert list(labels) == [0, HYPOTHETICAL, HISTORICAL]
+    assert get_tweet_labels('2015') is labels
+
+
+def test_labels_follow_a_reloaded_corpus(corpus_dir):
+    get_tweet_labels(2015)
+    write_corpus(corpus_dir, TEXTS + ['Will Ferrell should win'])
+    get_corpus(2015, reload=True)
+    assert list(get_tweet_labels(2015)) == [0, HYPOTHETICAL, HISTORICAL, HYPOTHETICAL]
+
+
+def test_clear_corpus_cache_drops_the_labels(corpus_dir):
+    get_tweet_labels(2015)
+    write_corpus(corpus_dir, TEXTS[:1])
+    clear_corpus_cache()
+    assert list(get_tweet_labels(2015)) == [0]
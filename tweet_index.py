@@ -0,0 +1,98 @@
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Set
+from tqdm import tqdm
+
+from instrumentation import instrument
+
+
+class InvertedIndex(object):
+    @instrument('index.build', items_arg=1)
+    def __init__(self, texts: Iterable[str]):
+        """
+        Token-level inverted index over (lowercased) tweets, built once and queried per award.
+        Queries keep the substring semantics of the original `keyword in tweet.lower()` checks:
+            - a keyword without whitespace can only occur inside a single whitespace-delimited token,
+              so its postings are the union of the postings of every vocabulary token containing it
+            - keywords with whitespace are narrowed down via their parts, then verified on the text
+        :param texts: tweet strings; document ids are their positions in this sequence
+        """
+        self.texts = list(texts)
+
+        postings = {}
+        for doc_id, text in enumerate(tqdm(self.texts, desc='Building inverted index')):
+            for token in set(text.lower().split()):
+                postings.setdefault(token, []).append(doc_id)
+        self.postings: Dict[str, array] = {token: array('I', ids) for token, ids in postings.items()}
+
+        # all vocabulary tokens joined into one string -- substring lookups then run at C speed via str.find
+        self._vocab = list(self.postings)
+        self._vocab_starts = []
+        position = 0
+        for token in self._vocab:
+            self._vocab_starts.append(position)
+            position += len(token) + 1
+        self._vocab_blob = '\n'.join(self._vocab)
+        self._term_cache: Dict[str, frozenset] = {}
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def tokens_containing(self, term: str) -> List[str]:
+        # vocabulary tokens that contain term as a substring
+        tokens = []
+        start = self._vocab_blob.find(term)
+        while start != -1:
+            ix = bisect_right(self._vocab_starts, start) - 1
+            tokens.append(self._vocab[ix])
+            # continue after the end of the matched token
+            next_token_start = self._vocab_starts[ix + 1] if ix + 1 < len(self._vocab_starts) else len(self._vocab_blob)
+            start = self._vocab_blob.find(term, next_token_start)
+        return tokens
+
+    def term_postings(self, term: str) -> frozenset:
+        """
+        :param term: lowercase keyword
+        :return: ids of all documents whose lowercased text contains term as a substring
+        """
+        term = term.lower()
+        if term not in self._term_cache:
+            parts = term.split()
+            if len(parts) == 1 and parts[0] == term:
+                doc_ids = set()
+                for token in self.tokens_containing(term):
+                    doc_ids.update(self.postings[token])
+            elif len(parts):
+                doc_ids = set.intersection(*[set(self.term_postings(part)) for part in parts])
+                doc_ids = {doc_id for doc_id in doc_ids if term in self.texts[doc_id].lower()}
+            else:
+                doc_ids = set(range(len(self.texts)))
+            self._term_cache[term] = frozenset(doc_ids)
+        return self._term_cache[term]
+
+    def candidates(self, terms: Sequence[str], min_hits: int, excluded: Sequence[str] = ()) -> List[int]:
+        """
+        Documents containing at least min_hits of terms (counted with multiplicity) and none of the excluded terms
+        :param terms: keywords to count
+        :param min_hits: minimum number of terms that must occur in a document
+        :param excluded: tripwords -- documents containing any of them are dropped
+        :return: sorted document ids
+        """
+        if min_hits > len(terms):
+            return []
+
+        if min_hits <= 0:
+            matches: Set[int] = set(range(len(self.texts)))
+        else:
+            term_postings = sorted((self.term_postings(term) for term in terms), key=len)
+            # pigeonhole: a document with min_hits of n terms appears in one of the (n - min_hits + 1) rarest postings
+            pool = set().union(*term_postings[:len(terms) - min_hits + 1])
+            hits = Counter()
+            for doc_ids in term_postings:
+                hits.update(pool.intersection(doc_ids))
+            matches = {doc_id for doc_id, count in hits.items() if count >= min_hits}
+
+        for term in excluded:
+            matches.difference_update(self.term_postings(term))
+        return sorted(matches)
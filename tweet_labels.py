@@ -0,0 +1,81 @@
+import re
+from typing import Dict, Iterable, Tuple
+from tqdm import tqdm
+
+from corpus import get_corpus
+from loading_utils import known_length
+from instrumentation import instrument
+
+# label bit flags -- a tweet is "reasonable" when it is neither hypothetical nor historical
+HYPOTHETICAL = 1
+HISTORICAL = 2
+RETWEET = 4
+
+HYPOTHETICAL_REGEX = re.compile(r"\?|\bhope\b|\bhoping\b|\bbet|\bthink|\bwill\b|\bpredict|\bgoing to\b|\bgonna\b|\bshould|\bif\b|\bnomin")
+YEAR_REGEX = re.compile(r"\d\d\d\d")
+
+
+def is_reasonable(label: int) -> bool:
+    return not label & (HYPOTHETICAL | HISTORICAL)
+
+
+class TweetClassifier(object):
+    def __init__(self, year):
+        """
+        Labels each tweet once with HYPOTHETICAL / HISTORICAL / RETWEET bit flags
+            - hypothetical: predictions, hopes, questions, nomination talk
+            - historical: mentions a year other than the ceremony year (or the year before it), or "last year"
+            - retweet: contains "RT" (case-sensitive)
+        :param year: ceremony year -- determines which 4-digit years are *not* historical
+        """
+        self.year = str(year)
+        self.previous_year = str(int(year) - 1)
+
+    def label(self, text: str) -> int:
+        text_lower = text.lower()
+        label = 0
+        if HYPOTHETICAL_REGEX.search(text_lower):
+            label |= HYPOTHETICAL
+        if 'last year' in text_lower or (YEAR_REGEX.search(text_lower) and self.year not in text_lower
+                                         and self.previous_year not in text_lower):
+            label |= HISTORICAL
+        if 'RT' in text:
+            label |= RETWEET
+        return label
+
+    @instrument('labels.classify', items_arg=1)
+    def label_all(self, texts: Iterable[str]) -> bytearray:
+        """
+        :param texts: tweet strings
+        :return: one label byte per tweet, in corpus order
+        """
+        return bytearray(self.label(text) for text in tqdm(texts, desc='Labeling tweets', total=known_length(texts)))
+
+
+# labels are computed once per corpus and shared by every stage that filters on them:
+# year --> (corpus the labels were computed on, labels)
+_label_cache: Dict[str, Tuple[object, bytearray]] = {}
+
+
+def get_tweet_labels(year) -> bytearray:
+    """
+    :param year: ceremony year
+    :return: label byte per tweet of get_corpus(year), in corpus order --
+        recomputed whenever get_corpus(year) returns another corpus (reloaded, or rewritten by pre_ceremony)
+    """
+    year = str(year)
+    corpus = get_corpus(year)
+    cached = _label_cache.get(year)
+    if cached is None or cached[0] is not corpus:
+        _label_cache[year] = (corpus, TweetClassifier(year).label_all(corpus))
+    return _label_cache[year][1]
+
+
+def clear_label_cache(year=None) -> None:
+    """
+    :param year: drop the labels of this year only (None: of every year)
+    """
+    if year is None:
+        _label_cache.clear()
+    else:
+        _label_cache.pop(str(year), None)
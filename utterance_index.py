@@ -0,0 +1,108 @@
+import re
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from instrumentation import instrument
+
+# characters kept in the projection: word characters plus the '~' tweet separator
+PROJECTED_RUN_REGEX = re.compile(r'[\w~]+')
+# optional punctuation allowed between an utterance and the following space
+TRAILING_PUNCTUATION = set('.,)(-"\'!:;')
+
+
+class UtteranceIndex(object):
+    @instrument('regex.utterance_projection', items_arg=1)
+    def __init__(self, texts: Iterable[str]):
+        """
+        Recovers natural language utterances of hashtags, e.g. #GrandBudapestHotel --> "grand budapest hotel"
+        Same matches as running the per-hashtag "wonky regex"
+            r' (' + ''.join([char + r'[^\w~]*' for char in h[:-1]]) + h[-1] + r'\.?)[\.,\)\(\-"\'\!:;]? '
+        with re.findall over '~'.join(texts), but all hashtags are found in one pass:
+            - the joined text is projected once onto its [\w~] characters, keeping an offset map back to the text
+              (one entry per run of kept characters)
+            - a hashtag matches where it occurs in the projection starting right after a space;
+              the surface span, its optional trailing period/punctuation and the closing space are then
+              checked on the original text via the offset map
+        :param texts: (lowercased, space-padded) tweet strings
+        """
+        texts = list(texts)
+        self.text = '~'.join(texts)
+        self.doc_starts = array('Q')
+        position = 0
+        for text in texts:
+            self.doc_starts.append(position)
+            position += len(text) + 1
+
+        runs = []
+        # offset map: text offset and projection offset of every run of [\w~] characters
+        self.run_text_starts = array('Q')
+        self.run_projected_starts = array('Q')
+        projected_position = 0
+        for match in PROJECTED_RUN_REGEX.finditer(self.text):
+            runs.append(match.group())
+            self.run_text_starts.append(match.start())
+            self.run_projected_starts.append(projected_position)
+            projected_position += len(runs[-1])
+        self.projection = ''.join(runs)
+
+    def _text_offset(self, projected_position: int) -> int:
+        run = bisect_right(self.run_projected_starts, projected_position) - 1
+        return self.run_text_starts[run] + projected_position - self.run_projected_starts[run]
+
+    def _match_end(self, end: int) -> Tuple[int, int]:
+        """
+        :param end: text offset right after the last hashtag character
+        :return: (end of the utterance, end of the whole match) or (-1, -1) if the match fails at the tail
+        """
+        text = self.text
+        char = text[end:end + 1]
+        if char == '.':
+            following = text[end + 1:end + 2]
+            if following in TRAILING_PUNCTUATION and text[end + 2:end + 3] == ' ':
+                return end + 1, end + 3
+            if following == ' ':
+                return end + 1, end + 2
+        if char in TRAILING_PUNCTUATION and text[end + 1:end + 2] == ' ':
+            return end, end + 2
+        if char == ' ':
+            return end, end + 1
+        return -1, -1
+
+    @instrument('regex.utterances', items_arg=1)
+    def find(self, hashtags: Iterable[str]) -> Dict[str, List[Tuple[int, str]]]:
+        """
+        :param hashtags: lowercase hashtags (without '#')
+        :return: hashtag --> [(document id, utterance), ...] in text order (non-overlapping, like re.findall)
+        """
+        targets = set(tag for tag in hashtags if len(tag))
+        found = {tag: [] for tag in targets}
+        lengths = sorted(set(len(tag) for tag in targets))
+        last_end = {tag: 0 for tag in targets}
+        text, projection = self.text, self.projection
+
+        for run_start, projected_start in zip(self.run_text_starts, self.run_projected_starts):
+            # utterances start right after a space
+            if run_start == 0 or text[run_start - 1] != ' ':
+                continue
+            for length in lengths:
+                tag = projection[projected_start:projected_start + length]
+                if len(tag) < length:
+                    break
+                if tag not in targets or run_start - 1 < last_end[tag]:
+                    continue
+                utterance_end, match_end = self._match_end(self._text_offset(projected_start + length - 1) + 1)
+                if match_end < 0:
+                    continue
+                last_end[tag] = match_end
+                doc_id = bisect_right(self.doc_starts, run_start) - 1
+                found[tag].append((doc_id, text[run_start:utterance_end]))
+        return found
+
+    def utterance_counters(self, hashtags: Iterable[str]) -> Dict[str, Counter]:
+        """
+        :param hashtags: lowercase hashtags (without '#')
+        :return: hashtag --> Counter of utterances (same as Counter(re.findall(<wonky regex>, '~'.join(texts))))
+        """
+        return {tag: Counter([utterance for _, utterance in matches]) for tag, matches in self.find(hashtags).items()}